@@ -3,6 +3,7 @@ import sys
 from functools import wraps
 from typing import Any, Callable, TYPE_CHECKING, Union, no_type_check
 
+from arcor2 import codec
 from arcor2.data.common import ActionState, ActionStateEnum, PackageState, PackageStateEnum
 from arcor2.data.events import ActionStateEvent, Event, PackageStateEvent
 
@@ -70,7 +71,7 @@ def print_event(event: Event) -> None:
     Used from main script to print event as JSON.
     """
 
-    print(event.to_json())
+    print(codec.to_json(event))
     sys.stdout.flush()
 
 
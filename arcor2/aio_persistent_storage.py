@@ -1,94 +1,451 @@
-from arcor2 import persistent_storage
-from arcor2.data.common import IdDescList, Project, ProjectSources, Scene
-from arcor2.data.object_type import Mesh, MeshList, Model3dType, Models, ObjectType
+import asyncio
+import copy
+import os
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, List, Optional, Sequence, Tuple, TypeVar, Union
+
+from arcor2 import aio_rest, rest
+from arcor2.cache import Cache, SingleFlight
+from arcor2.data.common import IdDescList, Project, ProjectSources, Scene, StorageChange, StorageChanges
+from arcor2.data.object_type import MODEL_MAPPING, Mesh, MeshList, MetaModel3d, Model3dType, ObjectModel, Models, \
+    ObjectType
 from arcor2.data.services import ServiceType
-from arcor2.helpers import run_in_executor
-from arcor2.persistent_storage import PersistentStorageException  # noqa
+from arcor2.persistent_storage import BULK_NOT_SUPPORTED_STATUSES, ModelKey, NO_BULK, PersistentStorageException, \
+    URL, models_from_bulk, sort_by_keys  # noqa
+from arcor2.write_behind import WriteBehind
 
+_PROJECTS: Cache[str, Project] = Cache()
+_SCENES: Cache[str, Scene] = Cache()
+_OBJECT_TYPES: Cache[str, ObjectType] = Cache()
+_SERVICE_TYPES: Cache[str, ServiceType] = Cache()
+_MODELS: Cache[ModelKey, Models] = Cache()
+_MESHES: Cache[str, Mesh] = Cache()
 
+CACHES: Dict[str, Cache] = {
+    "projects": _PROJECTS,
+    "scenes": _SCENES,
+    "object_types": _OBJECT_TYPES,
+    "service_types": _SERVICE_TYPES,
+    "models": _MODELS,
+    "meshes": _MESHES
+}
+
+
+# for reads that are not cached
+_FLIGHTS: SingleFlight[Hashable, Any] = SingleFlight()
+
+V = TypeVar('V')
+
+# max. number of concurrent requests when many items have to be fetched one by one
+CONCURRENCY = int(os.getenv("ARCOR2_STORAGE_CONCURRENCY", 8))
+
+# ("project" | "scene", id) -> document
+WRITE_BEHIND: WriteBehind[Tuple[str, str], Union[Project, Scene]] = WriteBehind()
+
+
+async def _coalesced(key: Hashable, fetch: Callable[[], Awaitable[V]]) -> V:
+    """
+    Concurrent identical reads share one request.
+    """
+
+    return copy.deepcopy(await _FLIGHTS.do(key, fetch))
+
+
+async def _gather(coros: Sequence[Awaitable[V]]) -> List[V]:
+    """
+    Like asyncio.gather, but with at most CONCURRENCY coroutines running at once.
+    """
+
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+
+    async def bounded(coro: Awaitable[V]) -> V:
+        async with semaphore:
+            return await coro
+
+    return await asyncio.gather(*[bounded(coro) for coro in coros])
+
+
+def clear_caches() -> None:
+
+    for cache in CACHES.values():
+        cache.clear()
+
+
+def _invalidate_model(model_id: str) -> None:
+
+    _MODELS.invalidate_if(lambda key: key[0] == model_id)
+    _MESHES.invalidate(model_id)
+    _FLIGHTS.forget("meshes")
+
+
+def apply_changes(changes: Iterable[StorageChange]) -> None:
+    """
+    Invalidates cached data affected by changes made elsewhere (see arcor2.change_feed).
+    :param changes:
+    :return:
+    """
+
+    kinds = StorageChange.KindEnum
+
+    for change in changes:
+        if change.kind == kinds.PROJECT:
+            _PROJECTS.invalidate(change.id)
+            _FLIGHTS.forget("projects")
+            _FLIGHTS.forget(("project_sources", change.id))
+        elif change.kind == kinds.SCENE:
+            _SCENES.invalidate(change.id)
+            _FLIGHTS.forget("scenes")
+        elif change.kind == kinds.OBJECT_TYPE:
+            _OBJECT_TYPES.invalidate(change.id)
+            _FLIGHTS.forget("object_types")
+        elif change.kind == kinds.SERVICE_TYPE:
+            _SERVICE_TYPES.invalidate(change.id)
+            _FLIGHTS.forget("service_types")
+        elif change.kind == kinds.MODEL:
+            _invalidate_model(change.id)
+
+
+@rest.handle_exceptions(PersistentStorageException)
+async def get_changes(since: Optional[int] = None) -> StorageChanges:
+    return await aio_rest.get(f"{URL}/changes", StorageChanges, params=None if since is None else {"since": since})
+
+
+@rest.handle_exceptions(PersistentStorageException)
 async def get_mesh(mesh_id: str) -> Mesh:
-    return await run_in_executor(persistent_storage.get_mesh, mesh_id)
+    return await _MESHES.get(mesh_id, lambda: aio_rest.get(f"{URL}/models/{mesh_id}/mesh", Mesh))
 
 
+@rest.handle_exceptions(PersistentStorageException)
 async def get_meshes() -> MeshList:
-    return await run_in_executor(persistent_storage.get_meshes)
+    return await _coalesced("meshes", lambda: aio_rest.get_list(f"{URL}/models/meshes", Mesh))
 
 
+@rest.handle_exceptions(PersistentStorageException)
 async def get_model(model_id: str, model_type: Model3dType) -> Models:
-    return await run_in_executor(persistent_storage.get_model, model_id, model_type)
+    return await _MODELS.get((model_id, model_type), lambda: aio_rest.get(
+        f"{URL}/models/{model_id}/{model_type.value.lower()}", MODEL_MAPPING[model_type]))
 
 
+@rest.handle_exceptions(PersistentStorageException)
 async def put_model(model: Models) -> None:
-    await run_in_executor(persistent_storage.put_model, model)
+    try:
+        await aio_rest.put(f"{URL}/models/{model.__class__.__name__.lower()}", model)
+    finally:
+        _invalidate_model(model.id)
 
 
+@rest.handle_exceptions(PersistentStorageException)
 async def delete_model(model_id: str) -> None:
-    await run_in_executor(persistent_storage.delete_model, model_id)
+    try:
+        await aio_rest.delete(f"{URL}/models/{model_id}")
+    finally:
+        _invalidate_model(model_id)
+
+
+def _with_pending_writes(what: str, id_list: IdDescList) -> IdDescList:
+
+    for item in id_list.items:
+        pending = WRITE_BEHIND.pending((what, item.id))
+        if pending is not None:
+            item.name = pending.name
+            item.desc = pending.desc
 
+    return id_list
 
+
+@rest.handle_exceptions(PersistentStorageException)
 async def get_projects() -> IdDescList:
-    return await run_in_executor(persistent_storage.get_projects)
+    return _with_pending_writes("project", await _coalesced(
+        "projects", lambda: aio_rest.get(f"{URL}/projects", IdDescList)))
 
 
+@rest.handle_exceptions(PersistentStorageException)
 async def get_scenes() -> IdDescList:
-    return await run_in_executor(persistent_storage.get_scenes)
+    return _with_pending_writes("scene", await _coalesced("scenes", lambda: aio_rest.get(f"{URL}/scenes", IdDescList)))
 
 
+@rest.handle_exceptions(PersistentStorageException)
 async def get_project(project_id: str) -> Project:
-    return await run_in_executor(persistent_storage.get_project, project_id)
 
+    pending = WRITE_BEHIND.pending(("project", project_id))
+    if pending is not None:
+        assert isinstance(pending, Project)
+        return copy.deepcopy(pending)
+
+    return await _PROJECTS.get(project_id, lambda: aio_rest.get(f"{URL}/project/{project_id}", Project))
 
+
+@rest.handle_exceptions(PersistentStorageException)
 async def get_project_sources(project_id: str) -> ProjectSources:
-    return await run_in_executor(persistent_storage.get_project_sources, project_id)
+    return await _coalesced(("project_sources", project_id),
+                            lambda: aio_rest.get(f"{URL}/project/{project_id}/sources", ProjectSources))
 
 
+@rest.handle_exceptions(PersistentStorageException)
 async def get_scene(scene_id: str) -> Scene:
-    return await run_in_executor(persistent_storage.get_scene, scene_id)
 
+    pending = WRITE_BEHIND.pending(("scene", scene_id))
+    if pending is not None:
+        assert isinstance(pending, Scene)
+        return copy.deepcopy(pending)
+
+    return await _SCENES.get(scene_id, lambda: aio_rest.get(f"{URL}/scene/{scene_id}", Scene))
 
+
+@rest.handle_exceptions(PersistentStorageException)
 async def get_object_type(object_type_id: str) -> ObjectType:
-    return await run_in_executor(persistent_storage.get_object_type, object_type_id)
+    return await _OBJECT_TYPES.get(object_type_id,
+                                   lambda: aio_rest.get(f"{URL}/object_types/{object_type_id}", ObjectType))
 
 
+@rest.handle_exceptions(PersistentStorageException)
 async def get_service_type(service_type_id: str) -> ServiceType:
-    return await run_in_executor(persistent_storage.get_service_type, service_type_id)
+    return await _SERVICE_TYPES.get(service_type_id,
+                                    lambda: aio_rest.get(f"{URL}/service_type/{service_type_id}", ServiceType))
 
 
+@rest.handle_exceptions(PersistentStorageException)
 async def get_object_type_ids() -> IdDescList:
-    return await run_in_executor(persistent_storage.get_object_type_ids)
+    return await _coalesced("object_types", lambda: aio_rest.get(f"{URL}/object_types", IdDescList))
 
 
+@rest.handle_exceptions(PersistentStorageException)
 async def get_service_type_ids() -> IdDescList:
-    return await run_in_executor(persistent_storage.get_service_type_ids)
+    return await _coalesced("service_types", lambda: aio_rest.get(f"{URL}/service_types", IdDescList))
+
+
+@rest.handle_exceptions(PersistentStorageException)
+async def _put_project(project: Project) -> None:
+
+    try:
+        await aio_rest.put(f"{URL}/project", project)
+    finally:
+        _PROJECTS.invalidate(project.id)
+        _FLIGHTS.forget("projects")
+
+
+@rest.handle_exceptions(PersistentStorageException)
+async def _put_scene(scene: Scene) -> None:
+
+    try:
+        await aio_rest.put(f"{URL}/scene", scene)
+    finally:
+        _SCENES.invalidate(scene.id)
+        _FLIGHTS.forget("scenes")
 
 
 async def update_project(project: Project) -> None:
-    await run_in_executor(persistent_storage.update_project, project)
+
+    assert project.id
+    await WRITE_BEHIND.write_now(("project", project.id), project, _put_project)
 
 
 async def update_scene(scene: Scene) -> None:
-    await run_in_executor(persistent_storage.update_scene, scene)
 
+    assert scene.id
+    await WRITE_BEHIND.write_now(("scene", scene.id), scene, _put_scene)
+
+
+def update_project_later(project: Project) -> None:
+    """
+    Rapid changes of the project are coalesced into one write. Failed write is reported to WRITE_BEHIND.on_error.
+    :param project: Should not be modified afterwards.
+    :return:
+    """
+
+    assert project.id
+    WRITE_BEHIND.schedule(("project", project.id), project, _put_project)
 
+
+def update_scene_later(scene: Scene) -> None:
+    """
+    Rapid changes of the scene are coalesced into one write. Failed write is reported to WRITE_BEHIND.on_error.
+    :param scene: Should not be modified afterwards.
+    :return:
+    """
+
+    assert scene.id
+    WRITE_BEHIND.schedule(("scene", scene.id), scene, _put_scene)
+
+
+async def flush_writes() -> None:
+    await WRITE_BEHIND.flush()
+
+
+@rest.handle_exceptions(PersistentStorageException)
 async def update_project_sources(project_sources: ProjectSources) -> None:
-    await run_in_executor(persistent_storage.update_project_sources, project_sources)
 
+    assert project_sources.id
+    try:
+        await aio_rest.post(f"{URL}/project/sources", project_sources)
+    finally:
+        _FLIGHTS.forget(("project_sources", project_sources.id))
 
+
+@rest.handle_exceptions(PersistentStorageException)
 async def update_object_type(object_type: ObjectType) -> None:
-    await run_in_executor(persistent_storage.update_object_type, object_type)
+
+    assert object_type.id
+    try:
+        await aio_rest.put(f"{URL}/object_type", object_type)
+    finally:
+        _OBJECT_TYPES.invalidate(object_type.id)
+        _FLIGHTS.forget("object_types")
 
 
+@rest.handle_exceptions(PersistentStorageException)
 async def delete_object_type(object_type_id: str) -> None:
-    await run_in_executor(persistent_storage.delete_object_type, object_type_id)
+    try:
+        await aio_rest.delete(f"{URL}/object_type/{object_type_id}")
+    finally:
+        _OBJECT_TYPES.invalidate(object_type_id)
+        _FLIGHTS.forget("object_types")
 
 
+@rest.handle_exceptions(PersistentStorageException)
 async def update_service_type(service_type: ServiceType) -> None:
-    await run_in_executor(persistent_storage.update_service_type, service_type)
 
+    assert service_type.id
+    try:
+        await aio_rest.put(f"{URL}/service_type", service_type)
+    finally:
+        _SERVICE_TYPES.invalidate(service_type.id)
+        _FLIGHTS.forget("service_types")
 
+
+@rest.handle_exceptions(PersistentStorageException)
 async def delete_scene(scene_id: str) -> None:
-    await run_in_executor(persistent_storage.delete_scene, scene_id)
 
+    await WRITE_BEHIND.discard(("scene", scene_id))
+
+    try:
+        await aio_rest.delete(f"{URL}/scene/{scene_id}")
+    finally:
+        _SCENES.invalidate(scene_id)
+        _FLIGHTS.forget("scenes")
 
+
+@rest.handle_exceptions(PersistentStorageException)
 async def delete_project(project_id: str) -> None:
-    await run_in_executor(persistent_storage.delete_project, project_id)
+
+    await WRITE_BEHIND.discard(("project", project_id))
+
+    try:
+        await aio_rest.delete(f"{URL}/project/{project_id}")
+    finally:
+        _PROJECTS.invalidate(project_id)
+        _FLIGHTS.forget("projects")
+
+
+@rest.handle_exceptions(PersistentStorageException)
+async def get_object_types(object_type_ids: Sequence[str]) -> List[ObjectType]:
+    """
+    Gets many object types at once (only those not cached are requested).
+    Falls back to concurrent requests if the storage can't do it in one.
+    :param object_type_ids:
+    :return: Object types in the same order as ids.
+    """
+
+    found: Dict[str, ObjectType] = {}
+
+    for ot_id in object_type_ids:
+        cached = _OBJECT_TYPES.peek(ot_id)
+        if cached is not None:
+            found[ot_id] = cached
+
+    missing = [ot_id for ot_id in dict.fromkeys(object_type_ids) if ot_id not in found]
+
+    if missing:
+
+        if "object_types" not in NO_BULK:
+            try:
+                for obj_type in await aio_rest.get_list(f"{URL}/object_types/bulk", ObjectType,
+                                                        params={"ids": missing}):
+                    _OBJECT_TYPES.put(obj_type.id, obj_type)
+                    found[obj_type.id] = obj_type
+                missing = []
+            except rest.RestHttpException as e:
+                if e.status not in BULK_NOT_SUPPORTED_STATUSES:
+                    raise
+                NO_BULK.add("object_types")
+
+        for obj_type in await _gather([get_object_type(ot_id) for ot_id in missing]):
+            found[obj_type.id] = obj_type
+
+    return sort_by_keys(object_type_ids, found, "Object type(s)")
+
+
+@rest.handle_exceptions(PersistentStorageException)
+async def get_service_types(service_type_ids: Sequence[str]) -> List[ServiceType]:
+    """
+    Gets many service types at once (only those not cached are requested).
+    Falls back to concurrent requests if the storage can't do it in one.
+    :param service_type_ids:
+    :return: Service types in the same order as ids.
+    """
+
+    found: Dict[str, ServiceType] = {}
+
+    for st_id in service_type_ids:
+        cached = _SERVICE_TYPES.peek(st_id)
+        if cached is not None:
+            found[st_id] = cached
+
+    missing = [st_id for st_id in dict.fromkeys(service_type_ids) if st_id not in found]
+
+    if missing:
+
+        if "service_types" not in NO_BULK:
+            try:
+                for srv_type in await aio_rest.get_list(f"{URL}/service_types/bulk", ServiceType,
+                                                        params={"ids": missing}):
+                    _SERVICE_TYPES.put(srv_type.id, srv_type)
+                    found[srv_type.id] = srv_type
+                missing = []
+            except rest.RestHttpException as e:
+                if e.status not in BULK_NOT_SUPPORTED_STATUSES:
+                    raise
+                NO_BULK.add("service_types")
+
+        for srv_type in await _gather([get_service_type(st_id) for st_id in missing]):
+            found[srv_type.id] = srv_type
+
+    return sort_by_keys(service_type_ids, found, "Service type(s)")
+
+
+@rest.handle_exceptions(PersistentStorageException)
+async def get_models(models: Sequence[MetaModel3d]) -> List[Models]:
+    """
+    Gets many models at once (only those not cached are requested).
+    Falls back to concurrent requests if the storage can't do it in one.
+    :param models:
+    :return: Models in the same order as requested.
+    """
+
+    keys: List[ModelKey] = [(mm.id, mm.type) for mm in models]
+    found: Dict[ModelKey, Models] = {}
+
+    for key in keys:
+        cached = _MODELS.peek(key)
+        if cached is not None:
+            found[key] = cached
+
+    missing = [key for key in dict.fromkeys(keys) if key not in found]
+
+    if missing:
+
+        if "models" not in NO_BULK:
+            try:
+                for key, model in models_from_bulk(await aio_rest.get_list(
+                        f"{URL}/models/bulk", ObjectModel, params={"ids": list({key[0] for key in missing})})).items():
+                    _MODELS.put(key, model)
+                    found[key] = model
+                missing = []
+            except rest.RestHttpException as e:
+                if e.status not in BULK_NOT_SUPPORTED_STATUSES:
+                    raise
+                NO_BULK.add("models")
+
+        for key, model in zip(missing, await _gather([get_model(*key) for key in missing])):
+            found[key] = model
+
+    return sort_by_keys(keys, found, "Model(s)")
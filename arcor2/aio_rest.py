@@ -0,0 +1,199 @@
+"""
+Native asyncio counterpart of arcor2.rest.
+
+Requests share one aiohttp session with a bounded pool of keep-alive connections,
+so there is no executor thread per request. Errors are reported using RestException
+(the same way as in arcor2.rest) so rest.handle_exceptions could be used.
+"""
+
+import asyncio
+import os
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, Type, Union
+
+import aiohttp
+
+from dataclasses_jsonschema import JsonSchemaMixin
+
+from arcor2.helpers import camel_case_to_snake_case
+from arcor2.rest import CHUNK_SIZE, HEADERS, OptionalData, ParamsDict, RETRIES, RestException, S, T, TIMEOUT, \
+    convert_keys, from_dict, parse_json, prepare_data, prepare_params, record_request, record_retry, \
+    response_exception
+
+POOL_SIZE = int(os.getenv("ARCOR2_REST_POOL_SIZE", 32))
+POOL_SIZE_PER_HOST = int(os.getenv("ARCOR2_REST_POOL_SIZE_PER_HOST", 16))
+KEEPALIVE_TIMEOUT = float(os.getenv("ARCOR2_REST_KEEPALIVE_TIMEOUT", 30.0))
+
+_SESSION: Optional[aiohttp.ClientSession] = None
+_SESSION_LOOP: Optional[asyncio.AbstractEventLoop] = None  # loop the session was created for
+
+
+def session() -> aiohttp.ClientSession:
+    """
+    Returns shared session. It is created lazily as it has to be bound to the running loop.
+    :return:
+    """
+
+    global _SESSION, _SESSION_LOOP
+
+    loop = asyncio.get_running_loop()
+
+    if _SESSION is None or _SESSION.closed or _SESSION_LOOP is not loop:
+
+        connector = aiohttp.TCPConnector(limit=POOL_SIZE, limit_per_host=POOL_SIZE_PER_HOST,
+                                         keepalive_timeout=KEEPALIVE_TIMEOUT)
+        _SESSION = aiohttp.ClientSession(connector=connector, headers=HEADERS,
+                                         timeout=aiohttp.ClientTimeout(sock_connect=TIMEOUT[0], sock_read=TIMEOUT[1]))
+        _SESSION_LOOP = loop
+
+    return _SESSION
+
+
+async def close_session() -> None:
+
+    global _SESSION, _SESSION_LOOP
+
+    if _SESSION is not None and not _SESSION.closed:
+        await _SESSION.close()
+    _SESSION = None
+    _SESSION_LOOP = None
+
+
+def _query(params: ParamsDict = None) -> List[Tuple[str, str]]:
+    """
+    Unlike requests, aiohttp does not support lists as values (parameter repeated for each item).
+    :param params:
+    :return:
+    """
+
+    ret: List[Tuple[str, str]] = []
+
+    for key, value in prepare_params(params).items():
+        if isinstance(value, (list, tuple)):
+            ret.extend((key, str(v)) for v in value)
+        else:
+            ret.append((key, str(value)))
+
+    return ret
+
+
+async def _request(method: str, url: str, data: Optional[str] = None, params: ParamsDict = None) -> str:
+
+    sent = len(data.encode()) if data else 0
+
+    for attempt in range(RETRIES + 1):
+
+        start = time.monotonic()
+
+        try:
+            async with session().request(method, url, data=data, params=_query(params)) as resp:
+                body = await resp.read()
+                record_request(method, url, start, resp.status, sent, len(body))
+                if resp.status >= 400:
+                    raise response_exception(body, f"{resp.status} {resp.reason} for url: {url}", resp.status)
+                return body.decode(resp.get_encoding())
+        except aiohttp.ClientConnectionError as e:
+            record_request(method, url, start, 0, sent, 0)
+            if method == "GET" and isinstance(e, aiohttp.ClientConnectorError) and attempt < RETRIES:
+                record_retry(method, url)
+                continue
+            raise RestException("Catastrophic system error.", str(e)) from e
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            record_request(method, url, start, 0, sent, 0)
+            raise RestException("Catastrophic system error.", str(e)) from e
+
+    raise AssertionError("Unreachable.")
+
+
+async def stream(url: str, params: ParamsDict = None, chunk_size: int = CHUNK_SIZE) -> AsyncIterator[bytes]:
+    """
+    Streams the response body, so it does not have to be held in memory at once.
+    :param url:
+    :param params:
+    :param chunk_size: Max. size of yielded chunks.
+    :return:
+    """
+
+    start = time.monotonic()
+    status = 0
+    received = 0
+
+    try:
+        async with session().get(url, params=_query(params)) as resp:
+            status = resp.status
+            if resp.status >= 400:
+                body = await resp.read()
+                received = len(body)
+                raise response_exception(body, f"{resp.status} {resp.reason} for url: {url}", resp.status)
+            async for chunk in resp.content.iter_chunked(chunk_size):
+                received += len(chunk)
+                yield chunk
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        raise RestException("Catastrophic system error.", str(e)) from e
+    finally:
+        record_request("GET", url, start, status, 0, received)
+
+
+async def _send(url: str, method: str, data: OptionalData = None, params: ParamsDict = None, get_response=False,
+                data_cls: Optional[Type[T]] = None) -> Union[None, Dict, List]:
+
+    text = await _request(method, url, prepare_data(data), params)
+
+    if not get_response:
+        return None
+
+    return convert_keys(parse_json(text), camel_case_to_snake_case, data_cls)
+
+
+async def post(url: str, data: JsonSchemaMixin, params: ParamsDict = None) -> None:
+    await _send(url, "POST", data, params)
+
+
+async def put(url: str, data: OptionalData = None, params: ParamsDict = None,
+              data_cls: Optional[Type[T]] = None) -> Optional[T]:
+    ret = await _send(url, "PUT", data, params, get_response=data_cls is not None, data_cls=data_cls)
+
+    if not data_cls:
+        return None
+
+    return from_dict(data_cls, ret)
+
+
+async def delete(url: str) -> None:
+    await _request("DELETE", url)
+
+
+async def get_data(url: str, params: ParamsDict = None, data_cls: Optional[Type[T]] = None) -> Union[Dict, List]:
+
+    data = parse_json(await _request("GET", url, params=params))
+
+    if not isinstance(data, (list, dict)):
+        raise RestException("Invalid data, not list or dict.")
+
+    return convert_keys(data, camel_case_to_snake_case, data_cls)
+
+
+async def get(url: str, data_cls: Type[T], params: ParamsDict = None) -> T:
+
+    data = await get_data(url, params, data_cls)
+
+    assert isinstance(data, dict)
+
+    return from_dict(data_cls, data)
+
+
+async def get_list(url: str, data_cls: Type[T], params: ParamsDict = None) -> List[T]:
+
+    data = await get_data(url, params, data_cls)
+
+    return [from_dict(data_cls, val) for val in data]
+
+
+async def get_primitive(url: str, desired_type: Type[S], params: ParamsDict = None) -> S:
+
+    value: Any = parse_json(await _request("GET", url, params=params))
+
+    try:
+        return desired_type(value)
+    except ValueError as e:
+        raise RestException("Invalid primitive.", str(e)) from e
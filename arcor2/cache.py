@@ -0,0 +1,221 @@
+"""
+Read-through cache for documents obtained from remote services (e.g. the persistent storage).
+"""
+
+import asyncio
+import copy
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, Generic, Hashable, Optional, TypeVar
+
+K = TypeVar('K', bound=Hashable)
+V = TypeVar('V')
+
+MAX_SIZE = int(os.getenv("ARCOR2_STORAGE_CACHE_SIZE", 256))
+MAX_AGE = float(os.getenv("ARCOR2_STORAGE_CACHE_MAX_AGE", 10.0))
+STALE_WHILE_REVALIDATE = float(os.getenv("ARCOR2_STORAGE_CACHE_STALE_WHILE_REVALIDATE", 0.0))
+
+
+@dataclass
+class CacheStats:
+
+    hits: int = 0
+    stale_hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    invalidations: int = 0
+
+
+@dataclass
+class _Entry(Generic[V]):
+
+    value: V
+    fetched: float
+
+
+def _modified(value: object) -> Optional[datetime]:
+    return getattr(value, "modified", None)
+
+
+class SingleFlight(Generic[K, V]):
+    """
+    Coalesces concurrent calls with the same key: only the first one really calls fetch, others wait for its result.
+    All awaiters get the same object (or the same exception), so it should be copied before being modified.
+    Cancellation of any awaiter does not affect the others.
+    """
+
+    def __init__(self) -> None:
+        self._in_flight: Dict[K, asyncio.Future] = {}
+
+    def __len__(self) -> int:
+        return len(self._in_flight)
+
+    async def do(self, key: K, fetch: Callable[[], Awaitable[V]]) -> V:
+
+        try:
+            fut = self._in_flight[key]
+        except KeyError:
+            fut = self._in_flight[key] = asyncio.ensure_future(fetch())
+            fut.add_done_callback(lambda f: self.forget(key, f))
+
+        return await asyncio.shield(fut)
+
+    def forget(self, key: K, fut: Optional[asyncio.Future] = None) -> None:
+        """
+        Calls started afterwards won't join the in-flight one (if there is any).
+        :param key:
+        :param fut: Forget only this particular call.
+        :return:
+        """
+
+        if fut is None or self._in_flight.get(key) is fut:
+            self._in_flight.pop(key, None)
+
+
+class Cache(Generic[K, V]):
+    """
+    Size-bounded LRU cache with time-based revalidation.
+
+    Entry younger than max_age is returned directly. Entry older than that (but within stale_while_revalidate)
+    is returned immediately while a fresh copy is fetched in the background. Older entries are fetched again.
+    A fetched document with older 'modified' timestamp than the cached one does not overwrite it.
+    Values are copied on the way out, so callers are free to modify them.
+    """
+
+    def __init__(self, max_size: int = MAX_SIZE, max_age: float = MAX_AGE,
+                 stale_while_revalidate: float = STALE_WHILE_REVALIDATE) -> None:
+
+        self.max_size = max_size
+        self.max_age = max_age
+        self.stale_while_revalidate = stale_while_revalidate
+        self.stats = CacheStats()
+
+        self._entries: "OrderedDict[K, _Entry[V]]" = OrderedDict()
+        self._revalidating: Dict[K, asyncio.Task] = {}
+        self._flights: SingleFlight[K, V] = SingleFlight()
+        self._generation = 0  # incremented on invalidation, fetches started before are not stored
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: K) -> bool:
+        return key in self._entries
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0
+
+    async def get(self, key: K, fetch: Callable[[], Awaitable[V]]) -> V:
+        """
+        Returns cached value or the one obtained using fetch.
+        :param key:
+        :param fetch: Coroutine function getting the value from the remote service.
+        :return:
+        """
+
+        if not self.enabled:
+            return copy.deepcopy(await self._flights.do(key, fetch))
+
+        entry = self._entries.get(key)
+
+        if entry is not None:
+
+            age = time.monotonic() - entry.fetched
+
+            if age < self.max_age:
+                self.stats.hits += 1
+                self._entries.move_to_end(key)
+                return copy.deepcopy(entry.value)
+
+            if age < self.max_age + self.stale_while_revalidate:
+                self.stats.stale_hits += 1
+                self._entries.move_to_end(key)
+                if key not in self._revalidating:
+                    self._revalidating[key] = asyncio.ensure_future(self._revalidate(key, fetch))
+                return copy.deepcopy(entry.value)
+
+        self.stats.misses += 1
+        return copy.deepcopy(await self._flights.do(key, lambda: self._fetch(key, fetch)))
+
+    def peek(self, key: K) -> Optional[V]:
+        """
+        Returns fresh value if there is any. Nothing is fetched.
+        :param key:
+        :return:
+        """
+
+        entry = self._entries.get(key)
+
+        if entry is None or time.monotonic() - entry.fetched >= self.max_age:
+            return None
+
+        self.stats.hits += 1
+        self._entries.move_to_end(key)
+        return copy.deepcopy(entry.value)
+
+    def put(self, key: K, value: V) -> None:
+        """
+        Stores value obtained elsewhere (e.g. using a bulk request).
+        :param key:
+        :param value:
+        :return:
+        """
+
+        if self.enabled:
+            self._store(key, copy.deepcopy(value), self._generation)
+
+    def invalidate(self, key: K) -> None:
+
+        self._generation += 1
+        self.stats.invalidations += 1
+        self._entries.pop(key, None)
+        self._flights.forget(key)
+
+    def invalidate_if(self, predicate: Callable[[K], bool]) -> None:
+
+        for key in [k for k in self._entries if predicate(k)]:
+            self.invalidate(key)
+
+    def clear(self) -> None:
+
+        self._generation += 1
+        self._entries.clear()
+
+    async def _fetch(self, key: K, fetch: Callable[[], Awaitable[V]]) -> V:
+
+        generation = self._generation
+        return self._store(key, await fetch(), generation)
+
+    async def _revalidate(self, key: K, fetch: Callable[[], Awaitable[V]]) -> None:
+
+        try:
+            await self._flights.do(key, lambda: self._fetch(key, fetch))
+        except Exception:  # the stale entry is used until it expires completely, fetch will fail again then
+            pass
+        finally:
+            del self._revalidating[key]
+
+    def _store(self, key: K, value: V, generation: int) -> V:
+
+        if generation != self._generation:  # there was an invalidation in the meantime, value might be outdated
+            return value
+
+        current = self._entries.get(key)
+
+        if current is not None:
+            cur_modified = _modified(current.value)
+            new_modified = _modified(value)
+            if cur_modified is not None and new_modified is not None and new_modified < cur_modified:
+                value = current.value
+
+        self._entries[key] = _Entry(value, time.monotonic())
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.stats.evictions += 1
+
+        return value
@@ -0,0 +1,148 @@
+"""
+Notifies about changes of documents in the persistent storage made by anyone (other ARServer, upload scripts, etc.).
+
+The storage's change feed (GET /changes) is polled. When the storage does not provide it, lists of ids are
+polled instead - additions and deletions are detected then, updates are left to the expiration of cached values.
+"""
+
+import asyncio
+import os
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+
+from arcor2 import aio_persistent_storage as storage, rest
+from arcor2.data.common import IdDescList, StorageChange
+
+POLL_INTERVAL = float(os.getenv("ARCOR2_STORAGE_POLL_INTERVAL", 1.0))
+
+Kind = StorageChange.KindEnum
+Subscriber = Callable[[List[StorageChange]], Awaitable[None]]
+ResetSubscriber = Callable[[], Awaitable[None]]
+ErrorHandler = Callable[[Exception], Awaitable[None]]
+
+_LISTS: Dict[Kind, Callable[[], Awaitable[IdDescList]]] = {
+    Kind.PROJECT: storage.get_projects,
+    Kind.SCENE: storage.get_scenes,
+    Kind.OBJECT_TYPE: storage.get_object_type_ids,
+    Kind.SERVICE_TYPE: storage.get_service_type_ids
+}
+
+
+@dataclass
+class ChangeFeedStats:
+
+    polls: int = 0
+    changes: int = 0
+    own: int = 0  # skipped changes made by this process
+    resets: int = 0  # the storage lost track of our position (e.g. it was restarted)
+    errors: int = 0
+
+
+class ChangeFeed:
+    """
+    Caches of arcor2.aio_persistent_storage are invalidated first, then subscribers are called with the changes.
+    Changes made by this process are skipped if the storage tells who made them (see rest.WRITER_ID).
+    When the storage loses track of our position, all caches are cleared and reset subscribers are called
+    instead, as it is not known what has changed.
+    """
+
+    def __init__(self, interval: float = POLL_INTERVAL, on_error: Optional[ErrorHandler] = None) -> None:
+
+        self.interval = interval
+        self.on_error = on_error
+        self.stats = ChangeFeedStats()
+
+        self._subscribers: List[Subscriber] = []
+        self._reset_subscribers: List[ResetSubscriber] = []
+        self._last: Optional[int] = None
+        self._ids: Optional[Dict[Kind, Set[str]]] = None  # used when the storage does not provide the feed
+        self._feed_supported = True
+
+    def subscribe(self, subscriber: Subscriber) -> None:
+        self._subscribers.append(subscriber)
+
+    def subscribe_reset(self, subscriber: ResetSubscriber) -> None:
+        self._reset_subscribers.append(subscriber)
+
+    async def poll(self) -> List[StorageChange]:
+        """
+        Gets changes made by others since the previous call (the first call just gets the current state).
+        :return: Nothing if the storage was reset.
+        """
+
+        self.stats.polls += 1
+        resets = self.stats.resets
+
+        if self._feed_supported:
+            try:
+                changes = await self._poll_feed()
+            except storage.PersistentStorageException as e:
+                if not isinstance(e.__cause__, rest.RestHttpException) or \
+                        e.__cause__.status not in storage.BULK_NOT_SUPPORTED_STATUSES:
+                    raise
+                self._feed_supported = False
+                changes = await self._poll_lists()
+        else:
+            changes = await self._poll_lists()
+
+        foreign = [change for change in changes if change.writer != rest.WRITER_ID]
+        self.stats.own += len(changes) - len(foreign)
+        changes = foreign
+
+        if self.stats.resets != resets:
+
+            for reset_subscriber in self._reset_subscribers:
+                await reset_subscriber()
+
+            return []
+
+        if changes:
+
+            self.stats.changes += len(changes)
+            storage.apply_changes(changes)
+
+            for subscriber in self._subscribers:
+                await subscriber(changes)
+
+        return changes
+
+    async def run(self) -> None:
+
+        while True:
+
+            try:
+                await self.poll()
+            except Exception as e:
+                self.stats.errors += 1
+                if self.on_error is not None:
+                    await self.on_error(e)
+
+            await asyncio.sleep(self.interval)
+
+    async def _poll_feed(self) -> List[StorageChange]:
+
+        changes = await storage.get_changes(self._last)
+
+        if self._last is not None and changes.last < self._last:
+            # we can't tell what has changed, let's start from scratch
+            self.stats.resets += 1
+            storage.clear_caches()
+
+        self._last = changes.last
+        return changes.items
+
+    async def _poll_lists(self) -> List[StorageChange]:
+
+        lists = await asyncio.gather(*[get_list() for get_list in _LISTS.values()])
+        ids = {kind: {item.id for item in id_list.items} for kind, id_list in zip(_LISTS, lists)}
+
+        changes: List[StorageChange] = []
+
+        if self._ids is not None:
+            for kind, current in ids.items():
+                previous = self._ids[kind]
+                changes.extend(StorageChange(0, kind, id) for id in current - previous)
+                changes.extend(StorageChange(0, kind, id, deleted=True) for id in previous - current)
+
+        self._ids = ids
+        return changes
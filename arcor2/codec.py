@@ -0,0 +1,115 @@
+"""
+JSON encoding/decoding used for messages (websockets, REST) and stored data.
+
+orjson is used when installed (can be turned off by ARCOR2_JSON_BACKEND=json), standard json module otherwise.
+Both backends produce the same output: compact separators, non-ASCII characters as they are,
+datetimes in ISO format, enums as their values and sets as lists. The only difference is
+the notation of floats with exponent (1e20 vs 1e+20), which is the same value.
+
+MessagePack (an alternative wire encoding for websockets) is available when msgpack is installed.
+"""
+
+import json
+import os
+from datetime import date, datetime, time
+from enum import Enum
+from typing import Any, Union
+
+from dataclasses_jsonschema import JsonSchemaMixin
+
+from arcor2.exceptions import Arcor2Exception
+
+DecodeError = json.JSONDecodeError  # orjson.JSONDecodeError is its subclass
+
+
+class CodecException(Arcor2Exception):
+    pass
+
+
+_BACKEND = os.getenv("ARCOR2_JSON_BACKEND", "orjson")
+
+
+def _default(obj: Any) -> Any:
+
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+
+    if isinstance(obj, Enum):
+        return obj.value
+
+    if isinstance(obj, (datetime, date, time)):
+        return obj.isoformat()
+
+    raise TypeError(f"Object of type {obj.__class__.__name__} is not JSON serializable")
+
+
+try:
+    if _BACKEND != "orjson":
+        raise ImportError
+
+    import orjson  # type: ignore
+
+    BACKEND = "orjson"
+
+    # orjson would serialize datetimes itself (without microseconds when they are zero)
+    _OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+    def loads(data: Union[str, bytes]) -> Any:
+        return orjson.loads(data)
+
+    def dumps_bytes(obj: Any) -> bytes:
+        return orjson.dumps(obj, default=_default, option=_OPTIONS)
+
+    def dumps(obj: Any) -> str:
+        return orjson.dumps(obj, default=_default, option=_OPTIONS).decode()
+
+except ImportError:
+
+    BACKEND = "json"
+
+    _decoder = json.JSONDecoder()
+    _encoder = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False, default=_default)
+
+    def loads(data: Union[str, bytes]) -> Any:
+
+        if isinstance(data, (bytes, bytearray)):
+            data = data.decode()
+        return _decoder.decode(data)
+
+    def dumps(obj: Any) -> str:
+        return _encoder.encode(obj)
+
+    def dumps_bytes(obj: Any) -> bytes:
+        return _encoder.encode(obj).encode()
+
+
+def to_json(obj: JsonSchemaMixin) -> str:
+    """
+    Replacement of JsonSchemaMixin.to_json().
+    :param obj:
+    :return:
+    """
+
+    return dumps(obj.to_dict())
+
+
+try:
+    import msgpack  # type: ignore
+
+    MSGPACK = True
+
+    def packb(obj: Any) -> bytes:
+        return msgpack.packb(obj, default=_default, use_bin_type=True)
+
+    def unpackb(data: bytes) -> Any:
+        return msgpack.unpackb(data, raw=False)
+
+except ImportError:
+
+    MSGPACK = False
+
+    def packb(obj: Any) -> bytes:
+        raise CodecException("msgpack is not installed.")
+
+    def unpackb(data: bytes) -> Any:
+        raise CodecException("msgpack is not installed.")
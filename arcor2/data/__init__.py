@@ -1,6 +1,7 @@
 import importlib
 import inspect
 import pkgutil
+from typing import Optional
 
 from dataclasses_jsonschema import JsonSchemaMixin, ValidationError
 
@@ -11,12 +12,19 @@ class DataException(Arcor2Exception):
     pass
 
 
-def compile_json_schemas():
+def compile_json_schemas(cache_path: Optional[str] = None) -> None:
     """
     Force compilation of json schema (otherwise it might cause troubles later when executed in parallel)
+    :param cache_path: Directory where compiled validators are shared by processes (see arcor2.json_schema_cache).
     :return:
     """
 
+    from arcor2 import json_schema_cache
+
+    if json_schema_cache.available():
+        json_schema_cache.prepare_validators(cache_path)
+        return
+
     from arcor2 import data
 
     for _, module_name, _ in pkgutil.iter_modules(data.__path__):  # type: ignore
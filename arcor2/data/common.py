@@ -6,14 +6,15 @@ from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from enum import Enum, unique
 from json import JSONEncoder
-from typing import Any, Iterator, List, Optional, Set, Tuple, Union
+from typing import Any, Dict, Iterator, List, NewType, Optional, Set, TYPE_CHECKING, Tuple, Union
 
-from dataclasses_jsonschema import JsonSchemaMixin
-
-import quaternion  # type: ignore
+from dataclasses_jsonschema import FieldEncoder, JsonSchemaMixin
 
 from arcor2.exceptions import Arcor2Exception
 
+if TYPE_CHECKING:
+    import quaternion  # type: ignore  # imported on demand, it takes long (imports scipy)
+
 
 def uid() -> str:
     return uuid.uuid4().hex
@@ -41,6 +42,20 @@ class ActionIOEnum(StrEnum):
     LAST: str = "end"
 
 
+# arbitrary JSON value (object, array, string, number, boolean), passed as it is
+JsonValue = NewType("JsonValue", object)
+
+
+class JsonValueEncoder(FieldEncoder):
+
+    @property
+    def json_schema(self) -> Dict[str, Any]:
+        return {"description": "Any JSON value."}
+
+
+JsonSchemaMixin.register_field_encoders({JsonValue: JsonValueEncoder()})
+
+
 class DataClassEncoder(JSONEncoder):
 
     def default(self, o: Any) -> Any:
@@ -74,6 +89,8 @@ class Position(IterableIndexable):
 
     def rotated(self, rot: "Orientation", inverse: bool = False) -> "Position":
 
+        import quaternion  # type: ignore
+
         q = rot.as_quaternion()
 
         if inverse:
@@ -91,10 +108,13 @@ class Orientation(IterableIndexable):
     z: float = 0.0
     w: float = 1.0
 
-    def as_quaternion(self) -> quaternion.quaternion:
+    def as_quaternion(self) -> "quaternion.quaternion":
+
+        import quaternion  # type: ignore
+
         return quaternion.quaternion(self.w, self.x, self.y, self.z).normalized()
 
-    def set_from_quaternion(self, q: quaternion.quaternion) -> None:
+    def set_from_quaternion(self, q: "quaternion.quaternion") -> None:
 
         nq = q.normalized()
 
@@ -108,6 +128,8 @@ class Orientation(IterableIndexable):
         if not isinstance(other, Orientation):
             return False
 
+        import quaternion  # type: ignore
+
         return quaternion.isclose(self.as_quaternion(), other.as_quaternion(), rtol=1.e-8)[0]
 
 
@@ -471,6 +493,34 @@ class IdDescList(JsonSchemaMixin):
     items: List[IdDesc] = field(default_factory=list)
 
 
+@dataclass
+class StorageChange(JsonSchemaMixin):
+    """
+    Document added, updated or deleted in the persistent storage.
+    """
+
+    class KindEnum(StrEnum):
+
+        PROJECT: str = "Project"
+        SCENE: str = "Scene"
+        OBJECT_TYPE: str = "ObjectType"
+        SERVICE_TYPE: str = "ServiceType"
+        MODEL: str = "Model"
+
+    seq: int
+    kind: KindEnum
+    id: str
+    deleted: bool = False
+    writer: Optional[str] = None  # X-Arcor2-Writer header of the request that made the change, if the storage tells
+
+
+@dataclass
+class StorageChanges(JsonSchemaMixin):
+
+    last: int  # sequence number of the last change, to be used as 'since' in the next request
+    items: List[StorageChange] = field(default_factory=list)
+
+
 class PackageStateEnum(Enum):
 
     RUNNING: str = "running"
@@ -2,7 +2,7 @@
 
 import re
 from dataclasses import dataclass, field
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 
 from dataclasses_jsonschema import JsonSchemaMixin
 
@@ -36,6 +36,16 @@ class Event(JsonSchemaMixin):
     parent_id: Optional[str] = None
 
 
+@dataclass
+class EventBatch(Event):
+    """
+    Events emitted during one RPC, sent as one message (in the original order) to UIs that asked for it.
+    """
+
+    data: List[Dict[str, Any]] = field(default_factory=list)
+    event: str = field(default=wo_suffix(__qualname__), init=False)  # type: ignore  # noqa: F821
+
+
 @dataclass
 class ShowMainScreenData(JsonSchemaMixin):
 
@@ -66,7 +76,8 @@ Project / scene
 @dataclass
 class OpenSceneData(JsonSchemaMixin):
 
-    scene: common.Scene
+    scene: Optional[common.Scene] = None  # None if the client has the revision (see DocumentDelta)
+    revision: Optional[str] = None
 
 
 @dataclass
@@ -105,8 +116,10 @@ class ProjectChanged(Event):
 @dataclass
 class OpenProjectData(JsonSchemaMixin):
 
-    scene: common.Scene
-    project: common.Project
+    scene: Optional[common.Scene] = None  # None if the client has the revision (see DocumentDelta)
+    project: Optional[common.Project] = None
+    scene_revision: Optional[str] = None
+    project_revision: Optional[str] = None
 
 
 @dataclass
@@ -116,6 +129,56 @@ class OpenProject(Event):
     event: str = field(default=wo_suffix(__qualname__), init=False)  # type: ignore  # noqa: F821
 
 
+@dataclass
+class PatchOperation(JsonSchemaMixin):
+    """
+    JSON Patch (RFC 6902) operation.
+    """
+
+    class OpEnum(common.StrEnum):
+
+        ADD: str = "add"
+        REMOVE: str = "remove"
+        REPLACE: str = "replace"
+
+    op: OpEnum
+    path: str
+    value: Optional[common.JsonValue] = None  # not used for 'remove'
+
+    def to_dict(self, omit_none: bool = True, *args, **kwargs) -> Dict[str, Any]:
+
+        ret = super().to_dict(omit_none, *args, **kwargs)
+        if self.op != self.OpEnum.REMOVE:  # RFC 6902 requires the value (even null) for 'add' and 'replace'
+            ret.setdefault("value", None)
+        return ret
+
+
+@dataclass
+class DocumentDelta(JsonSchemaMixin):
+    """
+    Changes of scene/project between two revisions. Revisions are hashes of the document content.
+    """
+
+    id: str
+    base_revision: str
+    revision: str
+    patch: List[PatchOperation] = field(default_factory=list)
+
+
+@dataclass
+class SceneDelta(Event):
+
+    data: Optional[DocumentDelta] = None
+    event: str = field(default=wo_suffix(__qualname__), init=False)  # type: ignore  # noqa: F821
+
+
+@dataclass
+class ProjectDelta(Event):
+
+    data: Optional[DocumentDelta] = None
+    event: str = field(default=wo_suffix(__qualname__), init=False)  # type: ignore  # noqa: F821
+
+
 @dataclass
 class ProjectSaved(Event):
 
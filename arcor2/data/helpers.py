@@ -1,11 +1,15 @@
 import inspect
-from typing import Dict, Tuple, Type
+from typing import Any, Dict, Tuple, Type, TypeVar
+
+from dataclasses_jsonschema import JsonSchemaMixin, ValidationError
 
 import arcor2.data.events
 from arcor2.data import rpc
 from arcor2.data.events import Event
 from arcor2.data.rpc.common import Request, Response
 
+T = TypeVar('T', bound=JsonSchemaMixin)
+
 RPC_MAPPING: Dict[str, Tuple[Type[Request], Type[Response]]] = {}
 
 _requests: Dict[str, Type[Request]] = {}
@@ -35,3 +39,24 @@ for name, obj in inspect.getmembers(arcor2.data.events):
 
     if inspect.isclass(obj) and issubclass(obj, Event) and obj != Event:
         EVENT_MAPPING[obj.event] = obj
+
+
+def from_dict(cls: Type[T], data: Dict[str, Any], validate: bool = True) -> T:
+    """
+    Creates message (RPC, event) from decoded JSON.
+
+    Without validation, the object is just constructed (much faster), which is intended for trusted links only:
+    missing fields end up as None and only data that can't be converted at all are reported.
+    :param cls:
+    :param data:
+    :param validate: Validate data against the JSON schema of cls.
+    :return:
+    """
+
+    if validate:
+        return cls.from_dict(data)
+
+    try:
+        return cls.from_dict(data, validate=False)
+    except (KeyError, TypeError, ValueError, AttributeError) as e:
+        raise ValidationError(f"Failed to construct {cls.__name__}: {e}") from e
@@ -0,0 +1,51 @@
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+from dataclasses_jsonschema import JsonSchemaMixin
+
+from arcor2.data.common import StrEnum
+
+
+class MetricType(StrEnum):
+
+    COUNTER: str = "counter"
+    GAUGE: str = "gauge"
+    HISTOGRAM: str = "histogram"
+
+
+@dataclass
+class MetricSample(JsonSchemaMixin):
+
+    name: str  # e.g. 'arcor2_rest_request_seconds_bucket' for a histogram bucket
+    value: float
+    labels: Dict[str, str] = field(default_factory=dict)
+
+
+@dataclass
+class Metric(JsonSchemaMixin):
+
+    name: str
+    type: MetricType
+    help: str = ""
+    samples: List[MetricSample] = field(default_factory=list)
+
+
+@dataclass
+class RpcStats(JsonSchemaMixin):
+
+    request: str
+    count: int = 0
+    errors: int = 0
+    in_flight: int = 0
+    decode: float = 0.0  # mean durations of processing phases [s]
+    handler: float = 0.0
+    encode: float = 0.0
+    send: float = 0.0
+
+
+@dataclass
+class ServerStats(JsonSchemaMixin):
+
+    uptime: float  # [s]
+    clients: int
+    rpcs: List[RpcStats] = field(default_factory=list)
@@ -5,6 +5,8 @@ from typing import List, Optional, Set, Tuple
 
 from dataclasses_jsonschema import JsonSchemaMixin
 
+from arcor2.data.metrics import Metric, ServerStats
+
 """
 mypy does not recognize __qualname__ so far: https://github.com/python/mypy/issues/6473
 flake8 sucks here as well: https://bugs.launchpad.net/pyflakes/+bug/1648651
@@ -103,3 +105,39 @@ class VersionResponse(Response):
 
     data: VersionData = field(default_factory=VersionData)
     response: str = field(default=VersionRequest.request, init=False)
+
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+@dataclass
+class GetMetricsRequest(Request):
+    """
+    Gets metrics of the server (e.g. latencies of calls to other services).
+    """
+
+    request: str = field(default=wo_suffix(__qualname__), init=False)  # type: ignore  # noqa: F821
+
+
+@dataclass
+class GetMetricsResponse(Response):
+
+    data: List[Metric] = field(default_factory=list)
+    response: str = field(default=GetMetricsRequest.request, init=False)
+
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+@dataclass
+class GetServerStatsRequest(Request):
+    """
+    Gets statistics of RPCs processed by the server (counts, errors, mean durations).
+    """
+
+    request: str = field(default=wo_suffix(__qualname__), init=False)  # type: ignore  # noqa: F821
+
+
+@dataclass
+class GetServerStatsResponse(Response):
+
+    data: Optional[ServerStats] = None
+    response: str = field(default=GetServerStatsRequest.request, init=False)
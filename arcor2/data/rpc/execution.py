@@ -66,6 +66,34 @@ class UploadPackageResponse(Response):
 # ----------------------------------------------------------------------------------------------------------------------
 
 
+@dataclass
+class UploadPackageChunkArgs(JsonSchemaMixin):
+
+    id: str = field(metadata=dict(description="Id of the execution package."))
+    seq: int = field(metadata=dict(description="Sequence number of the chunk, starting from 0."))
+    data: str = field(metadata=dict(description="Base64 encoded part of the zip file."))
+    last: bool = field(default=False, metadata=dict(description="The package is complete with this chunk."))
+
+
+@dataclass
+class UploadPackageChunkRequest(Request):
+    """
+    Uploads the package part by part, it is installed once the last chunk arrives.
+    """
+
+    args: UploadPackageChunkArgs
+    request: str = field(default=wo_suffix(__qualname__), init=False)  # type: ignore  # noqa: F821
+
+
+@dataclass
+class UploadPackageChunkResponse(Response):
+
+    response: str = field(default=UploadPackageChunkRequest.request, init=False)
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+
+
 @dataclass
 class ListPackagesRequest(Request):
 
@@ -6,7 +6,7 @@ from typing import List, Optional
 
 from dataclasses_jsonschema import JsonSchemaMixin
 
-from arcor2.data.common import ActionIO, ActionParameter, IdDesc, Orientation, Position
+from arcor2.data.common import ActionIO, ActionParameter, IdDesc, Orientation, Position, Project, Scene
 from arcor2.data.rpc.common import IdArgs, Request, Response, RobotArg, wo_suffix
 
 
@@ -720,3 +720,30 @@ class RenameActionRequest(Request):
 class RenameActionResponse(Response):
 
     response: str = field(default=RenameActionRequest.request, init=False)
+
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+@dataclass
+class SnapshotData(JsonSchemaMixin):
+
+    scene: Optional[Scene] = None
+    project: Optional[Project] = None
+    scene_revision: Optional[str] = None
+    project_revision: Optional[str] = None
+
+
+@dataclass
+class GetSnapshotRequest(Request):
+    """
+    Gets opened scene and project with their revisions, e.g. when a delta could not be applied.
+    """
+
+    request: str = field(default=wo_suffix(__qualname__), init=False)  # type: ignore  # noqa: F821
+
+
+@dataclass
+class GetSnapshotResponse(Response):
+
+    data: SnapshotData = field(default_factory=SnapshotData)
+    response: str = field(default=GetSnapshotRequest.request, init=False)
@@ -1,14 +1,13 @@
 import asyncio
 import importlib
-import json
 import keyword
 import logging
 import os
 import re
+import stat
 import sys
 import time
 import traceback
-from collections import deque
 from datetime import datetime, timezone
 from types import ModuleType
 from typing import Any, Awaitable, Callable, Dict, Optional, Set, Tuple, Type, TypeVar
@@ -22,9 +21,10 @@ import semver  # type: ignore
 
 import websockets
 
+from arcor2 import codec, rpc_metrics, wire
 from arcor2.data.events import Event, ProjectExceptionEvent, ProjectExceptionEventData
 from arcor2.data.execution import PackageMeta
-from arcor2.data.helpers import EVENT_MAPPING, RPC_MAPPING
+from arcor2.data.helpers import EVENT_MAPPING, RPC_MAPPING, from_dict
 from arcor2.data.rpc.common import Request
 from arcor2.exceptions import Arcor2Exception
 from arcor2.settings import PROJECT_PATH
@@ -121,7 +121,7 @@ def snake_case_to_camel_case(snake_str: str) -> str:
     return re.sub(r"(?:^|_)(.)", lambda m: m.group(1).upper(), snake_str)
 
 
-async def send_json_to_client(client: websockets.WebSocketServerProtocol, data: str) -> None:
+async def send_json_to_client(client: websockets.WebSocketServerProtocol, data: wire.Encoded) -> None:
 
     try:
         await client.send(data)
@@ -129,6 +129,30 @@ async def send_json_to_client(client: websockets.WebSocketServerProtocol, data:
         pass
 
 
+READ_ONLY_ATTR = "_arcor2_read_only"
+
+# max. number of read-only RPCs of one client being processed concurrently (0 = process RPCs one by one)
+CONCURRENT_RPCS = int(os.getenv("ARCOR2_CONCURRENT_RPCS", 0))
+
+F = TypeVar('F', bound=Callable[..., Any])
+
+
+def read_only(coro: F) -> F:
+    """
+    Marks RPC callback that does not modify any state, so it might be processed concurrently with other
+    read-only RPCs of the same client (see CONCURRENT_RPCS).
+    :param coro:
+    :return:
+    """
+
+    setattr(coro, READ_ONLY_ATTR, True)
+    return coro
+
+
+def is_read_only(coro: Any) -> bool:
+    return getattr(coro, READ_ONLY_ATTR, False)
+
+
 async def server(client: Any,
                  path: str,
                  logger: Any,
@@ -136,13 +160,104 @@ async def server(client: Any,
                  unregister: Callable[[Any], Awaitable[None]],
                  rpc_dict: RPC_DICT_TYPE,
                  event_dict: Optional[EVENT_DICT_TYPE] = None,
-                 verbose: bool = False) -> None:
+                 verbose: bool = False,
+                 concurrency: Optional[int] = None,
+                 validate: bool = True,
+                 send_response: Optional[Callable[[Any, wire.Encoded], Awaitable[None]]] = None) -> None:
+    """
+    Handles messages of one websocket client.
+
+    RPCs are processed in the order of arrival. When concurrency is greater than zero,
+    RPCs marked as read-only are processed concurrently (at most concurrency of them at once), while any other RPC
+    (or event) waits until all previous ones are done and the next message is not read until it is processed.
+    Responses might then be sent out of order - clients have to match them by id.
+
+    Messages are encoded as negotiated for the connection (see the wire module).
+    Processed RPCs are measured (see the rpc_metrics module).
+    :param client:
+    :param path:
+    :param logger:
+    :param register:
+    :param unregister:
+    :param rpc_dict:
+    :param event_dict:
+    :param verbose: Log also read-only RPCs (when logger is in debug level).
+    :param concurrency: Defaults to CONCURRENT_RPCS.
+    :param validate: Validate incoming messages against JSON schema (might be turned off for trusted clients).
+    :param send_response: Sends encoded response, e.g. through a queue shared with events (so their order is kept).
+    Sent directly by default.
+    :return:
+    """
 
     if event_dict is None:
         event_dict = {}
 
-    req_last_ts: Dict[str, deque] = {}
-    ignored_reqs: Set[str] = set()
+    respond = send_json_to_client if send_response is None else send_response
+
+    if concurrency is None:
+        concurrency = CONCURRENT_RPCS
+
+    enc = wire.encoding(client)
+
+    slots = asyncio.Semaphore(concurrency) if concurrency > 0 else None
+    in_flight: Set[asyncio.Task] = set()
+
+    async def handle_rpc(req: Request, resp_cls: Type[Any], decode: float) -> None:
+
+        handler = rpc_dict[type(req)]
+        in_flight_gauge = rpc_metrics.IN_FLIGHT.labels(req.request)
+        in_flight_gauge.inc()
+
+        try:
+
+            start = time.monotonic()
+
+            try:
+                resp = await handler(req, client)
+            except Arcor2Exception as e:
+                await logger.debug(e, exc_info=True)
+                resp = False, e.message
+            except Exception:
+                rpc_metrics.ERRORS.labels(req.request).inc()
+                raise
+
+            handled = time.monotonic()
+
+            if resp is None:  # default response
+                resp = resp_cls()
+            elif isinstance(resp, tuple):
+                resp = resp_cls(result=resp[0], messages=[resp[1]])
+            else:
+                assert isinstance(resp, resp_cls)
+
+            resp.id = req.id
+            encoded = wire.encode(resp.to_dict(), enc)
+            encoded_ts = time.monotonic()
+
+            await respond(client, encoded)
+
+        finally:
+            in_flight_gauge.dec()
+
+        rpc_metrics.record(req.request, resp.result, decode, handled - start, encoded_ts - handled,
+                           time.monotonic() - encoded_ts)
+
+        # frequent read-only RPCs (e.g. polling of robot joints) would flood the log
+        if logger.level == LogLevel.DEBUG and (verbose or not is_read_only(handler)):
+            asyncio.ensure_future(logger.debug(f"RPC request: {req}, result: {resp}"))
+
+    async def handle_concurrently(req: Request, resp_cls: Type[Any], decode: float) -> None:
+
+        assert slots is not None
+
+        try:
+            await handle_rpc(req, resp_cls, decode)
+        except Exception as e:  # there is nobody else to take care of it
+            await logger.error(f"Failed to process RPC {req.request}: {e}")
+        finally:
+            slots.release()
+
+    rpc_metrics.CLIENTS.labels().inc()
 
     try:
 
@@ -150,14 +265,18 @@ async def server(client: Any,
 
         async for message in client:
 
+            start = time.monotonic()
+
             try:
-                data = json.loads(message)
-            except json.decoder.JSONDecodeError as e:
+                data = wire.decode(message, enc)
+            except wire.DecodeError as e:
+                rpc_metrics.INVALID.labels().inc()
                 await logger.error(f"Invalid data: '{message}'.")
                 await logger.debug(e)
                 continue
 
             if not isinstance(data, dict):
+                rpc_metrics.INVALID.labels().inc()
                 await logger.error(f"Invalid data: '{data}'.")
                 continue
 
@@ -166,6 +285,7 @@ async def server(client: Any,
                 try:
                     req_cls, resp_cls = RPC_MAPPING[data['request']]
                 except KeyError:
+                    rpc_metrics.INVALID.labels().inc()
                     await logger.error(f"Unknown RPC request: {data}.")
                     continue
 
@@ -174,56 +294,25 @@ async def server(client: Any,
                     continue
 
                 try:
-                    req = req_cls.from_dict(data)
+                    req = from_dict(req_cls, data, validate)
                 except ValidationError as e:
+                    rpc_metrics.INVALID.labels().inc()
                     await logger.error(f"Invalid RPC: {data}, error: {e}")
                     continue
 
-                try:
-                    resp = await rpc_dict[req_cls](req, client)
-                except Arcor2Exception as e:
-                    await logger.debug(e, exc_info=True)
-                    resp = False, e.message
+                decode = time.monotonic() - start
 
-                if resp is None:  # default response
-                    resp = resp_cls()
-                elif isinstance(resp, tuple):
-                    resp = resp_cls(result=resp[0], messages=[resp[1]])
-                else:
-                    assert isinstance(resp, resp_cls)
-
-                resp.id = req.id
-
-                await asyncio.wait([client.send(resp.to_json())])
-
-                if logger.level == LogLevel.DEBUG:
-
-                    # Silencing of repetitive log messages
-                    # ...maybe this could be done better and in a more general way using logging.Filter?
-
-                    now = time.monotonic()
-                    if req.request not in req_last_ts:
-                        req_last_ts[req.request] = deque()
-
-                    while req_last_ts[req.request]:
-                        if req_last_ts[req.request][0] < now - 5.0:
-                            req_last_ts[req.request].popleft()
-                        else:
-                            break
-
-                    req_last_ts[req.request].append(now)
-                    req_per_sec = len(req_last_ts[req.request])/5.0
+                if slots is not None and is_read_only(rpc_dict[req_cls]):
+                    await slots.acquire()  # back-pressure: stop reading when there are too many RPCs in flight
+                    task = asyncio.ensure_future(handle_concurrently(req, resp_cls, decode))
+                    in_flight.add(task)
+                    task.add_done_callback(in_flight.discard)
+                    continue
 
-                    if req_per_sec > 2:
-                        if req.request not in ignored_reqs:
-                            ignored_reqs.add(req.request)
-                            await logger.debug(f"Request of type {req.request} will be silenced.")
-                    elif req_per_sec < 1:
-                        if req.request in ignored_reqs:
-                            ignored_reqs.remove(req.request)
+                if in_flight:  # mutating RPC must not overtake previous read-only ones
+                    await asyncio.wait(in_flight)
 
-                    if req.request not in ignored_reqs:
-                        asyncio.ensure_future(logger.debug(f"RPC request: {req}, result: {resp}"))
+                await handle_rpc(req, resp_cls, decode)
 
             elif "event" in data:  # ...event from UI
 
@@ -238,11 +327,14 @@ async def server(client: Any,
                     continue
 
                 try:
-                    event = event_cls.from_dict(data)
+                    event = from_dict(event_cls, data, validate)
                 except ValidationError as e:
                     await logger.error(f"Invalid event: {data}, error: {e}")
                     continue
 
+                if in_flight:
+                    await asyncio.wait(in_flight)
+
                 await event_dict[event_cls](client, event)
 
             else:
@@ -250,6 +342,9 @@ async def server(client: Any,
     except websockets.exceptions.ConnectionClosed:
         pass
     finally:
+        rpc_metrics.CLIENTS.labels().dec()
+        for task in in_flight:
+            task.cancel()
         await unregister(client)
 
 
@@ -267,7 +362,7 @@ def print_exception(e: Exception) -> None:
     else:
         pee = ProjectExceptionEvent(data=ProjectExceptionEventData(str(e), e.__class__.__name__))
 
-    print(pee.to_json())
+    print(codec.to_json(pee))
     sys.stdout.flush()
 
     with open("traceback-{}.txt".format(time.strftime("%Y%m%d-%H%M%S")), "w") as tb_file:
@@ -300,6 +395,11 @@ def type_def_from_source(source: str, type_name: str, output_type: Type[T]) -> T
     return cls_def
 
 
+def make_executable(path_to_file: str) -> None:
+    st = os.stat(path_to_file)
+    os.chmod(path_to_file, st.st_mode | stat.S_IEXEC)
+
+
 def get_package_meta_path(package_id: str) -> str:
 
     return os.path.join(PROJECT_PATH, package_id, "package.json")
@@ -0,0 +1,184 @@
+"""
+Minimal JSON Patch (RFC 6902) - 'add', 'remove' and 'replace' operations, computed as a difference of two documents.
+
+Lists are compared element-wise after their common beginning and end are skipped,
+so inserting or removing an item results in a single operation. Items of lists of objects with unique 'id'
+(action points, actions, scene objects...) are matched by the id.
+"""
+
+import copy
+from typing import Any, Dict, List, Optional
+
+from arcor2.exceptions import Arcor2Exception
+
+Operation = Dict[str, Any]  # e.g. {"op": "replace", "path": "/action_points/0/name", "value": "ap1"}
+
+
+class JsonPatchException(Arcor2Exception):
+    pass
+
+
+def _escape(key: str) -> str:
+    return key.replace("~", "~0").replace("/", "~1")
+
+
+def _unescape(token: str) -> str:
+    return token.replace("~1", "/").replace("~0", "~")
+
+
+def _equal(a: Any, b: Any) -> bool:
+    return type(a) is type(b) and a == b  # True == 1 but they are different JSON values
+
+
+def diff(old: Any, new: Any, path: str = "") -> List[Operation]:
+    """
+    Computes operations transforming the old document into the new one.
+    :param old: JSON-compatible data (e.g. result of to_dict()).
+    :param new:
+    :param path: JSON pointer of the compared values.
+    :return:
+    """
+
+    if isinstance(old, dict) and isinstance(new, dict):
+
+        ops: List[Operation] = []
+
+        for key, value in old.items():
+            if key in new:
+                ops.extend(diff(value, new[key], f"{path}/{_escape(key)}"))
+            else:
+                ops.append({"op": "remove", "path": f"{path}/{_escape(key)}"})
+
+        for key, value in new.items():
+            if key not in old:
+                ops.append({"op": "add", "path": f"{path}/{_escape(key)}", "value": value})
+
+        return ops
+
+    if isinstance(old, list) and isinstance(new, list):
+        return _diff_lists(old, new, path)
+
+    if _equal(old, new):
+        return []
+
+    return [{"op": "replace", "path": path, "value": new}]
+
+
+def _diff_lists(old: List[Any], new: List[Any], path: str) -> List[Operation]:
+
+    start = 0
+    while start < len(old) and start < len(new) and _equal(old[start], new[start]):
+        start += 1
+
+    old_end, new_end = len(old), len(new)
+    while old_end > start and new_end > start and _equal(old[old_end - 1], new[new_end - 1]):
+        old_end -= 1
+        new_end -= 1
+
+    old_ids, new_ids = _ids(old[start:old_end]), _ids(new[start:new_end])
+
+    if old_ids is not None and new_ids is not None:
+        return _diff_by_id(old[start:old_end], new[start:new_end], old_ids, new_ids, start, path)
+
+    common = min(old_end, new_end) - start
+    ops: List[Operation] = []
+
+    for idx in range(start, start + common):
+        ops.extend(diff(old[idx], new[idx], f"{path}/{idx}"))
+
+    for idx in range(start + common, new_end):
+        ops.append({"op": "add", "path": f"{path}/{idx}", "value": new[idx]})
+
+    for _ in range(start + common, old_end):  # the following items move to the same index
+        ops.append({"op": "remove", "path": f"{path}/{start + common}"})
+
+    return ops
+
+
+def _ids(items: List[Any]) -> Optional[List[Any]]:
+
+    if not items or not all(isinstance(item, dict) and "id" in item for item in items):
+        return None
+
+    ids = [item["id"] for item in items]
+    return ids if len(set(ids)) == len(ids) else None
+
+
+def _diff_by_id(old: List[Dict[str, Any]], new: List[Dict[str, Any]], old_ids: List[Any], new_ids: List[Any],
+                offset: int, path: str) -> List[Operation]:
+
+    ops: List[Operation] = []
+    wanted = set(new_ids)
+    current = list(old_ids)  # ids of the list being patched (its part from offset)
+    items = dict(zip(old_ids, old))
+
+    for idx in reversed(range(len(current))):
+        if current[idx] not in wanted:
+            ops.append({"op": "remove", "path": f"{path}/{offset + idx}"})
+            del current[idx]
+
+    for idx, (item_id, item) in enumerate(zip(new_ids, new)):
+
+        if idx < len(current) and current[idx] == item_id:
+            ops.extend(diff(items[item_id], item, f"{path}/{offset + idx}"))
+            continue
+
+        if item_id in items:  # moved
+            ops.append({"op": "remove", "path": f"{path}/{offset + current.index(item_id)}"})
+            current.remove(item_id)
+
+        ops.append({"op": "add", "path": f"{path}/{offset + idx}", "value": item})
+        current.insert(idx, item_id)
+
+    return ops
+
+
+def apply(doc: Any, ops: List[Operation]) -> Any:
+    """
+    Applies operations to a copy of the document.
+    :param doc:
+    :param ops:
+    :return: The patched document.
+    """
+
+    doc = copy.deepcopy(doc)
+
+    for op in ops:
+
+        path = op["path"]
+
+        if not path:
+            if op["op"] != "replace":
+                raise JsonPatchException(f"Unsupported operation on the whole document: {op['op']}.")
+            doc = copy.deepcopy(op["value"])
+            continue
+
+        tokens = [_unescape(token) for token in path.split("/")[1:]]
+        parent = doc
+
+        try:
+            for token in tokens[:-1]:
+                parent = parent[int(token)] if isinstance(parent, list) else parent[token]
+
+            key: Any = tokens[-1]
+
+            if isinstance(parent, list):
+                key = len(parent) if key == "-" else int(key)
+
+            if op["op"] == "add":
+                if isinstance(parent, list):
+                    parent.insert(key, copy.deepcopy(op["value"]))
+                else:
+                    parent[key] = copy.deepcopy(op["value"])
+            elif op["op"] == "remove":
+                del parent[key]
+            elif op["op"] == "replace":
+                parent[key]  # the target has to exist
+                parent[key] = copy.deepcopy(op["value"])
+            else:
+                raise JsonPatchException(f"Unsupported operation: {op['op']}.")
+
+        except (KeyError, IndexError, ValueError, TypeError) as e:
+            raise JsonPatchException(f"Invalid path: {path}.") from e
+
+    return doc
@@ -0,0 +1,201 @@
+"""
+Validators of JSON schemas of data classes (arcor2.data) compiled once and shared by processes
+(ARServer, Execution, packages) through a cache file keyed by arcor2 version.
+
+Generating and compiling the code of a validator (fastjsonschema) is the slowest part of the first validation
+of each class. The cache contains marshalled code objects of validators (specific to the Python version),
+each entry is checked against a hash of the current schema of the class, so a stale validator is never used.
+The file is stored next to packages (which are executed anyway), so it is not less trusted than them.
+"""
+
+import functools
+import hashlib
+import importlib
+import inspect
+import json
+import marshal
+import os
+import pkgutil
+import sys
+import threading
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple, Type
+
+from dataclasses_jsonschema import DEFAULT_SCHEMA_TYPE, JsonSchemaMixin, SchemaOptions, ValidationError
+
+import arcor2
+
+try:
+    import fastjsonschema  # type: ignore
+except ImportError:  # dataclasses_jsonschema falls back to jsonschema, there is nothing to compile then
+    fastjsonschema = None
+
+FILE_PREFIX = ".json_schemas-"
+
+# options used by from_dict with default arguments
+_OPTIONS = SchemaOptions(DEFAULT_SCHEMA_TYPE, True)
+
+Entry = Tuple[str, Any, Dict[str, str]]  # hash of the schema, code object of the validator, custom formats
+
+
+def available() -> bool:
+    return fastjsonschema is not None
+
+
+def data_classes() -> Iterator[Type[JsonSchemaMixin]]:
+
+    from arcor2 import data
+
+    seen = set()
+
+    for _, module_name, _ in pkgutil.iter_modules(data.__path__):  # type: ignore
+
+        module = importlib.import_module(f"{data.__name__}.{module_name}")
+
+        for _, obj in inspect.getmembers(module, inspect.isclass):
+
+            if not issubclass(obj, JsonSchemaMixin) or obj is JsonSchemaMixin or obj in seen:
+                continue
+
+            seen.add(obj)
+            yield obj
+
+
+def cache_file(path: str) -> str:
+    """
+    :param path: Directory of the cache.
+    :return: Name of the file for the current arcor2, Python and fastjsonschema versions.
+    """
+
+    return os.path.join(path, f"{FILE_PREFIX}{arcor2.version()}-{sys.implementation.cache_tag}-"
+                              f"{fastjsonschema.VERSION}")
+
+
+def _key(cls: Type[JsonSchemaMixin]) -> str:
+    return f"{cls.__module__}.{cls.__qualname__}"
+
+
+def _schema(cls: Type[JsonSchemaMixin]) -> Tuple[str, Dict[str, Any], Dict[str, str]]:
+    """
+    :return: Hash, schema and custom formats - the same as dataclasses_jsonschema uses for validation.
+    """
+
+    schema = cls.json_schema()
+    formats: Dict[str, str] = {}
+
+    for encoder in cls._field_encoders.values():
+        encoder_schema = encoder.json_schema
+        if "pattern" in encoder_schema and "format" in encoder_schema:
+            formats[encoder_schema["format"]] = encoder_schema["pattern"]
+
+    schema_hash = hashlib.sha1(json.dumps([schema, formats], sort_keys=True, default=str).encode()).hexdigest()
+    return schema_hash, schema, formats
+
+
+def _compile(cls: Type[JsonSchemaMixin], schema: Dict[str, Any], formats: Dict[str, str]) -> Any:
+    return compile(fastjsonschema.compile_to_code(schema, formats=formats), f"<validator of {_key(cls)}>", "exec")
+
+
+def _install(cls: Type[JsonSchemaMixin], code: Any, formats: Dict[str, str]) -> bool:
+    """
+    Makes the validator used by cls.from_dict (instead of compiling it on the first use).
+    :return: False if dataclasses_jsonschema does not allow that.
+    """
+
+    compiled_schemas = getattr(cls, "_JsonSchemaMixin__compiled_schema", None)
+
+    if not isinstance(compiled_schemas, dict):
+        return False
+
+    state: Dict[str, Any] = {}
+    exec(code, state)
+    validator = state["validate"]
+
+    if formats:
+        validator = functools.partial(validator, custom_formats=formats)
+
+    compiled_schemas[_OPTIONS] = validator
+    return True
+
+
+def load(path: str) -> Dict[str, Entry]:
+
+    try:
+        with open(cache_file(path), "rb") as file:
+            entries = marshal.load(file)
+    except (OSError, EOFError, ValueError, TypeError):
+        return {}
+
+    return entries if isinstance(entries, dict) else {}
+
+
+def store(path: str, entries: Dict[str, Entry]) -> None:
+    """
+    Writes the cache (atomically) and removes files of other versions. Failures are ignored.
+    """
+
+    file_name = cache_file(path)
+    tmp_name = f"{file_name}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+    try:
+        with open(tmp_name, "wb") as file:
+            marshal.dump(entries, file)
+        os.replace(tmp_name, file_name)
+    except OSError:
+        try:
+            os.remove(tmp_name)
+        except OSError:
+            pass
+        return
+
+    try:
+        files = os.listdir(path)
+    except OSError:
+        return
+
+    for other in files:
+        if other.startswith(FILE_PREFIX) and other != os.path.basename(file_name) and not other.endswith(".tmp"):
+            try:
+                os.remove(os.path.join(path, other))
+            except OSError:
+                pass
+
+
+def prepare_validators(path: Optional[str] = None, classes: Optional[Iterable[Type[JsonSchemaMixin]]] = None,
+                       compile_missing: bool = True) -> int:
+    """
+    Installs validators of data classes, compiled ones are taken from the cache.
+    :param path: Directory of the cache, None to not use it.
+    :param classes: All data classes by default.
+    :param compile_missing: Compile (and store) validators not found in the cache. Otherwise, they are compiled
+    by dataclasses_jsonschema on the first use.
+    :return: Number of compiled validators.
+    """
+
+    entries = load(path) if path else {}
+    compiled = 0
+
+    for cls in data_classes() if classes is None else classes:
+
+        key = _key(cls)
+        schema_hash, schema, formats = _schema(cls)
+        entry = entries.get(key)
+
+        if entry is None or entry[0] != schema_hash:
+
+            if not compile_missing:
+                continue
+
+            entry = schema_hash, _compile(cls, schema, formats), formats
+            entries[key] = entry
+            compiled += 1
+
+        if not _install(cls, entry[1], entry[2]):
+            try:
+                cls.from_dict({})  # let dataclasses_jsonschema compile it
+            except ValidationError:
+                pass
+
+    if compiled and path:
+        store(path, entries)
+
+    return compiled
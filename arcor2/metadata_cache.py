@@ -0,0 +1,134 @@
+"""
+Content-addressed on-disk cache of metadata computed from sources of types (meta, actions, robot features...),
+so a restart with unchanged types does not have to parse them again.
+
+Entries are stored as JSON files <path>/<arcor2 version>/<type id>-<source hash>.<kind>.json.
+"""
+
+import os
+import shutil
+import threading
+from typing import Any, Iterable, Optional, Set, Tuple
+
+import arcor2
+from arcor2 import codec
+
+Key = Tuple[str, str]  # type id, source hash
+
+
+class MetadataCache:
+
+    def __init__(self, path: str, version: Optional[str] = None) -> None:
+        """
+        :param path: Root directory of the cache.
+        :param version: Entries of other versions are ignored (and removed by gc).
+        """
+
+        self.root = path
+        self.version = arcor2.version() if version is None else version
+        self.path = os.path.join(path, self.version)
+
+    def _file(self, kind: str, type_id: str, src_hash: str) -> str:
+        return os.path.join(self.path, f"{type_id}-{src_hash}.{kind}.json")
+
+    def get(self, kind: str, type_id: str, src_hash: str) -> Optional[Any]:
+        """
+        :param kind: e.g. "meta" or "actions".
+        :param type_id:
+        :param src_hash:
+        :return: Stored data or None if there is no (readable) entry.
+        """
+
+        try:
+            with open(self._file(kind, type_id, src_hash), "rb") as file:
+                return codec.loads(file.read())
+        except (OSError, ValueError):
+            return None
+
+    def put(self, kind: str, type_id: str, src_hash: str, data: Any) -> None:
+        """
+        Stores JSON-serializable data. Failures are ignored, the cache is just an optimization.
+        """
+
+        file_name = self._file(kind, type_id, src_hash)
+        tmp_name = f"{file_name}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+        try:
+            os.makedirs(self.path, exist_ok=True)
+            with open(tmp_name, "wb") as file:
+                file.write(codec.dumps_bytes(data))
+            os.replace(tmp_name, file_name)  # readers never see a partially written file
+        except OSError:
+            try:
+                os.remove(tmp_name)
+            except OSError:
+                pass
+
+    def discard(self, type_id: str) -> int:
+        """
+        Removes all entries of the type, e.g. when its base was changed (the source of the type is the same,
+        but its metadata might be different).
+        :param type_id:
+        :return: Number of removed files.
+        """
+
+        removed = 0
+
+        try:
+            files = os.listdir(self.path)
+        except OSError:
+            return 0
+
+        for file_name in files:
+
+            if file_name.rpartition("-")[0] != type_id:
+                continue
+
+            try:
+                os.remove(os.path.join(self.path, file_name))
+                removed += 1
+            except OSError:
+                pass
+
+        return removed
+
+    def gc(self, keep: Iterable[Key]) -> int:
+        """
+        Removes entries of other versions and of types not listed (stale sources, deleted types).
+        :param keep: (type id, source hash) of current types.
+        :return: Number of removed files/directories.
+        """
+
+        keep_set: Set[Key] = set(keep)
+        removed = 0
+
+        try:
+            versions = os.listdir(self.root)
+        except OSError:
+            return 0
+
+        for version in versions:
+            if version != self.version:
+                shutil.rmtree(os.path.join(self.root, version), ignore_errors=True)
+                removed += 1
+
+        try:
+            files = os.listdir(self.path)
+        except OSError:
+            return removed
+
+        for file_name in files:
+
+            type_id, _, rest = file_name.rpartition("-")
+            src_hash = rest.split(".", 1)[0]
+
+            if (type_id, src_hash) in keep_set and not file_name.endswith(".tmp"):
+                continue
+
+            try:
+                os.remove(os.path.join(self.path, file_name))
+                removed += 1
+            except OSError:
+                pass
+
+        return removed
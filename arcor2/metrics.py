@@ -0,0 +1,263 @@
+"""
+In-process metrics (counters, gauges, histograms) that could be dumped in the Prometheus text format
+or sent to UIs as data classes.
+
+Metrics are thread-safe as some of them are updated from executor threads (e.g. by the synchronous rest module).
+"""
+
+import threading
+from http import HTTPStatus
+from typing import Dict, Generic, Iterator, List, Optional, Sequence, Tuple, TypeVar
+
+from arcor2.data.metrics import Metric, MetricSample, MetricType
+from arcor2.exceptions import Arcor2Exception
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)  # seconds
+SIZE_BUCKETS = (100.0, 1e3, 1e4, 1e5, 1e6, 1e7)  # bytes
+
+C = TypeVar('C')
+LabelValues = Tuple[str, ...]
+
+
+class MetricsException(Arcor2Exception):
+    pass
+
+
+class _Family(Generic[C]):
+
+    TYPE: MetricType
+
+    def __init__(self, name: str, help: str = "", labels: Sequence[str] = ()) -> None:
+
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+
+        self._lock = threading.Lock()
+        self._children: Dict[LabelValues, C] = {}
+
+    def labels(self, *values: str) -> C:
+
+        if len(values) != len(self.label_names):
+            raise MetricsException(f"{self.name} has labels {self.label_names}, got {values}.")
+
+        try:
+            return self._children[values]
+        except KeyError:
+            with self._lock:
+                return self._children.setdefault(values, self._new_child())
+
+    def collect(self) -> Metric:
+
+        metric = Metric(self.name, self.TYPE, self.help)
+
+        with self._lock:
+            for values, child in self._children.items():
+                metric.samples.extend(self._samples(dict(zip(self.label_names, values)), child))
+
+        return metric
+
+    def _new_child(self) -> C:
+        raise NotImplementedError
+
+    def _samples(self, labels: Dict[str, str], child: C) -> Iterator[MetricSample]:
+        raise NotImplementedError
+
+
+class _Value:
+
+    def __init__(self, lock: threading.Lock) -> None:
+        self._lock = lock
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+
+class _GaugeValue(_Value):
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.inc(-amount)
+
+    def set(self, value: float) -> None:
+        with self._lock:
+            self.value = value
+
+
+class _HistogramValue:
+
+    def __init__(self, lock: threading.Lock, buckets: Sequence[float]) -> None:
+
+        self._lock = lock
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)  # not cumulative
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+
+        with self._lock:
+            self.count += 1
+            self.sum += value
+            for idx, bound in enumerate(self.buckets):
+                if value <= bound:
+                    self.counts[idx] += 1
+                    break
+
+
+class Counter(_Family[_Value]):
+
+    TYPE = MetricType.COUNTER
+
+    def _new_child(self) -> _Value:
+        return _Value(self._lock)
+
+    def _samples(self, labels: Dict[str, str], child: _Value) -> Iterator[MetricSample]:
+        yield MetricSample(self.name, child.value, labels)
+
+
+class Gauge(_Family[_GaugeValue]):
+
+    TYPE = MetricType.GAUGE
+
+    def _new_child(self) -> _GaugeValue:
+        return _GaugeValue(self._lock)
+
+    def _samples(self, labels: Dict[str, str], child: _GaugeValue) -> Iterator[MetricSample]:
+        yield MetricSample(self.name, child.value, labels)
+
+
+class Histogram(_Family[_HistogramValue]):
+
+    TYPE = MetricType.HISTOGRAM
+
+    def __init__(self, name: str, help: str = "", labels: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS) -> None:
+
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self) -> _HistogramValue:
+        return _HistogramValue(self._lock, self.buckets)
+
+    def _samples(self, labels: Dict[str, str], child: _HistogramValue) -> Iterator[MetricSample]:
+
+        cumulative = 0
+        for bound, count in zip(child.buckets, child.counts):
+            cumulative += count
+            yield MetricSample(f"{self.name}_bucket", cumulative, {**labels, "le": _format_value(bound)})
+
+        yield MetricSample(f"{self.name}_bucket", child.count, {**labels, "le": "+Inf"})
+        yield MetricSample(f"{self.name}_sum", child.sum, labels)
+        yield MetricSample(f"{self.name}_count", child.count, labels)
+
+
+F = TypeVar('F', Counter, Gauge, Histogram)
+
+
+class Registry:
+
+    def __init__(self) -> None:
+        self._families: Dict[str, _Family] = {}
+        self._lock = threading.Lock()
+
+    def register(self, family: F) -> F:
+        """
+        Registers a metric. If there is already one with the same name and type, that one is returned.
+        :param family:
+        :return:
+        """
+
+        with self._lock:
+
+            existing = self._families.get(family.name)
+
+            if existing is None:
+                self._families[family.name] = family
+                return family
+
+        if type(existing) is not type(family) or existing.label_names != family.label_names:
+            raise MetricsException(f"Metric {family.name} already registered with different type or labels.")
+
+        return existing  # type: ignore
+
+    def counter(self, name: str, help: str = "", labels: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, help, labels))
+
+    def gauge(self, name: str, help: str = "", labels: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, help, labels))
+
+    def histogram(self, name: str, help: str = "", labels: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help, labels, buckets))
+
+    def collect(self) -> List[Metric]:
+
+        with self._lock:
+            families = list(self._families.values())
+
+        return [family.collect() for family in families]
+
+    def prometheus_text(self) -> str:
+        return prometheus_text(self.collect())
+
+
+REGISTRY = Registry()
+
+
+def _format_value(value: float) -> str:
+
+    if value == float("inf"):
+        return "+Inf"
+    if value == float("-inf"):
+        return "-Inf"
+    if float(value).is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", r"\\").replace("\n", r"\n").replace('"', r'\"')
+
+
+def prometheus_text(metrics: List[Metric]) -> str:
+    """
+    Formats metrics according to the Prometheus text exposition format.
+    :param metrics:
+    :return:
+    """
+
+    lines: List[str] = []
+
+    for metric in metrics:
+
+        if metric.help:
+            lines.append(f"# HELP {metric.name} {_escape(metric.help)}")
+        lines.append(f"# TYPE {metric.name} {metric.type.value}")
+
+        for sample in metric.samples:
+            if sample.labels:
+                labels = ",".join(f'{key}="{_escape(val)}"' for key, val in sample.labels.items())
+                lines.append(f"{sample.name}{{{labels}}} {_format_value(sample.value)}")
+            else:
+                lines.append(f"{sample.name} {_format_value(sample.value)}")
+
+    lines.append("")
+    return "\n".join(lines)
+
+
+async def process_request(path: str, request_headers) -> Optional[Tuple[HTTPStatus, List[Tuple[str, str]], bytes]]:
+    """
+    Serves metrics on '/metrics' of a websocket server (to be used as process_request of websockets.serve).
+    :param path:
+    :param request_headers:
+    :return: None for other paths, so they are handled as websocket connections.
+    """
+
+    if path != "/metrics":
+        return None
+
+    return HTTPStatus.OK, [("Content-Type", CONTENT_TYPE)], REGISTRY.prometheus_text().encode()
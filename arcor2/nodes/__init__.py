@@ -0,0 +1,13 @@
+"""
+Ports of nodes (and other settings shared by them) are defined here, so a node does not have to import another one
+(with all its dependencies) just to connect to it.
+"""
+
+import os
+
+SERVER_PORT: int = int(os.getenv("ARCOR2_SERVER_PORT", 6789))
+EXECUTION_PORT: int = 6790
+BUILD_PORT: int = int(os.getenv("ARCOR2_BUILD_PORT", 5008))
+
+# size of package chunks (before base64 encoding), has to fit into websocket message size limit (1 MiB)
+UPLOAD_CHUNK_SIZE: int = int(os.getenv("ARCOR2_PACKAGE_CHUNK_SIZE", 512 * 1024))
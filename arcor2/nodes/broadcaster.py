@@ -1,9 +1,12 @@
+import argparse
 import asyncio
 import socket
 from typing import Text, Tuple, Union
 
+from arcor2 import profiling
 from arcor2.data.common import BroadcastInfo
-from arcor2.server.globals import PORT
+from arcor2.nodes import SERVER_PORT as PORT
+from arcor2.profiling import STARTUP
 
 BROADCAST_PORT: int = 6006
 
@@ -56,6 +59,13 @@ class BroadcastProtocol(asyncio.DatagramProtocol):
 
 def main():
 
+    parser = argparse.ArgumentParser()
+    profiling.add_argument(parser)
+    args = parser.parse_args()
+
+    if args.profile_startup:
+        STARTUP.module = "arcor2.nodes.broadcaster"
+
     loop = asyncio.get_event_loop()
 
     broadcast_coro = loop.create_datagram_endpoint(lambda: BroadcastProtocol((get_broadcast(), BROADCAST_PORT),
@@ -63,6 +73,7 @@ def main():
                                                    local_addr=('0.0.0.0', BROADCAST_PORT))
 
     loop.run_until_complete(broadcast_coro)
+    STARTUP.print_report()
     loop.run_forever()
     loop.close()
 
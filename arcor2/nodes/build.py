@@ -8,7 +8,6 @@ import os
 import shutil
 import tempfile
 from datetime import datetime, timezone
-from typing import Set
 
 from apispec import APISpec  # type: ignore
 
@@ -23,16 +22,18 @@ from flask_swagger_ui import get_swaggerui_blueprint  # type: ignore
 import horast
 
 import arcor2
-from arcor2 import persistent_storage as ps
+from arcor2 import metrics, persistent_storage as ps, profiling
 from arcor2.data.execution import PackageMeta
 from arcor2.data.object_type import ObjectModel
 from arcor2.helpers import camel_case_to_snake_case, logger_formatter
+from arcor2.nodes import BUILD_PORT
 from arcor2.object_types_utils import built_in_types_names
+from arcor2.profiling import STARTUP
 from arcor2.source import SourceException
 from arcor2.source.logic import program_src  # , get_logic_from_source
 from arcor2.source.utils import derived_resources_class, global_action_points_class, global_actions_class
 
-PORT = int(os.getenv("ARCOR2_BUILD_PORT", 5008))
+PORT = BUILD_PORT
 SERVICE_NAME = "ARCOR2 Build Service"
 
 logger = logging.getLogger("build")
@@ -83,27 +84,25 @@ def _publish(project_id: str, package_name: str):
             with open(os.path.join(data_path, "scene.json"), "w") as scene_file:
                 scene_file.write(scene.to_json())
 
-            obj_types_with_models: Set[str] = set()
+            # TODO handle inheritance
+            obj_types = ps.get_object_types(list(dict.fromkeys(scene_obj.type for scene_obj in scene.objects)))
+            obj_types_with_models = [obj_type for obj_type in obj_types if obj_type.model]
 
-            for scene_obj in scene.objects:  # TODO handle inheritance
+            for obj_type, model in zip(obj_types_with_models,
+                                       ps.get_models([obj_type.model for obj_type in obj_types_with_models])):
 
-                obj_type = ps.get_object_type(scene_obj.type)
+                assert obj_type.model
+                obj_model = ObjectModel(obj_type.model.type, **{model.type().value.lower(): model})
 
-                if obj_type.model and obj_type.id not in obj_types_with_models:
-                    obj_types_with_models.add(obj_type.id)
-
-                    model = ps.get_model(obj_type.model.id, obj_type.model.type)
-                    obj_model = ObjectModel(obj_type.model.type, **{model.type().value.lower(): model})
-
-                    with open(os.path.join(data_path, camel_case_to_snake_case(obj_type.id) + ".json"), "w")\
-                            as model_file:
-                        model_file.write(obj_model.to_json())
+                with open(os.path.join(data_path, camel_case_to_snake_case(obj_type.id) + ".json"), "w")\
+                        as model_file:
+                    model_file.write(obj_model.to_json())
 
+            for obj_type in obj_types:
                 with open(os.path.join(ot_path, camel_case_to_snake_case(obj_type.id)) + ".py", "w") as obj_file:
                     obj_file.write(obj_type.source)
 
-            for scene_srv in scene.services:
-                srv = ps.get_service_type(scene_srv.type)
+            for srv in ps.get_service_types(list(dict.fromkeys(scene_srv.type for scene_srv in scene.services))):
                 with open(os.path.join(srv_path, camel_case_to_snake_case(srv.id)) + ".py", "w") as srv_file:
                     srv_file.write(srv.source)
 
@@ -223,6 +222,11 @@ def project_script(project_id: str):
     pass
 
 
+@app.route("/metrics", methods=["GET"])
+def get_metrics():
+    return metrics.REGISTRY.prometheus_text(), 200, {"Content-Type": metrics.CONTENT_TYPE}
+
+
 @app.route("/swagger/api/swagger.json", methods=["GET"])
 def get_swagger():
     return json.dumps(spec.to_dict())
@@ -237,12 +241,16 @@ def main():
 
     parser = argparse.ArgumentParser(description=SERVICE_NAME)
     parser.add_argument('-s', '--swagger', action="store_true", default=False)
+    profiling.add_argument(parser)
     args = parser.parse_args()
 
     if args.swagger:
         print(spec.to_yaml())
         return
 
+    if args.profile_startup:
+        STARTUP.module = "arcor2.nodes.build"
+
     SWAGGER_URL = "/swagger"
 
     swaggerui_blueprint = get_swaggerui_blueprint(
@@ -253,6 +261,7 @@ def main():
     # Register blueprint at URL
     app.register_blueprint(swaggerui_blueprint, url_prefix=SWAGGER_URL)
 
+    STARTUP.print_report()
     app.run(host='0.0.0.0', port=PORT)
 
 
@@ -6,15 +6,15 @@ import argparse
 import asyncio
 import base64
 import functools
-import json
 import os
 import shutil
 import sys
 import tempfile
 import time
 import zipfile
+from dataclasses import dataclass, field
 from datetime import datetime, timezone
-from typing import Awaitable, List, Optional, Set, Union
+from typing import Awaitable, BinaryIO, Dict, List, Optional, Set, Union
 
 from aiologger import Logger  # type: ignore
 from aiologger.levels import LogLevel  # type: ignore
@@ -27,17 +27,24 @@ import websockets
 from websockets.server import WebSocketServerProtocol as WsClient
 
 import arcor2
+from arcor2 import codec, metrics, profiling, rpc_metrics, wire
 from arcor2.data import compile_json_schemas, rpc
 from arcor2.data.common import PackageState, PackageStateEnum, Project
 from arcor2.data.events import ActionStateEvent, CurrentActionEvent, Event, PackageInfoEvent, PackageStateEvent,\
     ProjectExceptionEvent, ProjectExceptionEventData
-from arcor2.data.helpers import EVENT_MAPPING
+from arcor2.data.helpers import EVENT_MAPPING, from_dict
 from arcor2.exceptions import Arcor2Exception
-from arcor2.helpers import RPC_DICT_TYPE, aiologger_formatter, read_package_meta, server, write_package_meta
-from arcor2.settings import CLEANUP_SERVICES_NAME, PROJECT_PATH
-from arcor2.source.utils import make_executable
+from arcor2.helpers import RPC_DICT_TYPE, aiologger_formatter, make_executable, read_only, read_package_meta, \
+    server, write_package_meta
+from arcor2.nodes import EXECUTION_PORT
+from arcor2.profiling import STARTUP
+from arcor2.settings import CLEANUP_SERVICES_NAME, JSON_SCHEMA_CACHE, JSON_SCHEMA_CACHE_PATH, PROJECT_PATH, \
+    TRUSTED_LINKS
 
-PORT = 6790
+PORT = EXECUTION_PORT
+
+# unfinished upload is aborted when no chunk comes for so long (seconds)
+UPLOAD_TIMEOUT = float(os.getenv("ARCOR2_PACKAGE_UPLOAD_TIMEOUT", 60.0))
 
 logger = Logger.with_default_handlers(name='manager', formatter=aiologger_formatter())
 
@@ -92,8 +99,8 @@ async def read_proc_stdout(package_id: str) -> None:
         stripped = decoded.strip()
 
         try:
-            data = json.loads(stripped)
-        except json.decoder.JSONDecodeError:
+            data = codec.loads(stripped)
+        except codec.DecodeError:
             printed_out.append(decoded)
             await logger.error(decoded.strip())
             continue
@@ -103,7 +110,7 @@ async def read_proc_stdout(package_id: str) -> None:
             continue
 
         try:
-            evt = EVENT_MAPPING[data["event"]].from_dict(data)
+            evt = from_dict(EVENT_MAPPING[data["event"]], data, not TRUSTED_LINKS)
         except ValidationError as e:
             await logger.error("Invalid event: {}, error: {}".format(data, e))
             continue
@@ -232,6 +239,7 @@ async def resume_package_cb(req: rpc.execution.ResumePackageRequest, ui: WsClien
     return None
 
 
+@read_only
 async def package_state_cb(req: rpc.execution.PackageStateRequest, ui: WsClient) ->\
         rpc.execution.PackageStateResponse:
 
@@ -244,22 +252,14 @@ async def package_state_cb(req: rpc.execution.PackageStateRequest, ui: WsClient)
     return resp
 
 
-async def _upload_package_cb(req: rpc.execution.UploadPackageRequest, ui: WsClient) -> None:
+async def _install_package(package_id: str, zip_path: str) -> None:
 
-    target_path = os.path.join(PROJECT_PATH, req.args.id)
+    target_path = os.path.join(PROJECT_PATH, package_id)
 
     # TODO do not allow if there are manual changes?
 
     with tempfile.TemporaryDirectory() as tmpdirname:
 
-        zip_path = os.path.join(tmpdirname, "publish.zip")
-
-        b64_bytes = req.args.data.encode()
-        zip_content = base64.b64decode(b64_bytes)
-
-        with open(zip_path, "wb") as zip_file:
-            zip_file.write(zip_content)
-
         try:
             with zipfile.ZipFile(zip_path, 'r') as zip_ref:
                 zip_ref.extractall(tmpdirname)
@@ -267,8 +267,6 @@ async def _upload_package_cb(req: rpc.execution.UploadPackageRequest, ui: WsClie
             await logger.error(e)
             raise Arcor2Exception("Invalid zip file.")
 
-        os.remove(zip_path)
-
         try:
             shutil.rmtree(target_path)
         except FileNotFoundError:
@@ -282,9 +280,102 @@ async def _upload_package_cb(req: rpc.execution.UploadPackageRequest, ui: WsClie
     except FileNotFoundError:
         raise Arcor2Exception("Package does not contain 'script.py' file.")
 
+
+async def _upload_package_cb(req: rpc.execution.UploadPackageRequest, ui: WsClient) -> None:
+
+    with tempfile.TemporaryDirectory() as tmpdirname:
+
+        zip_path = os.path.join(tmpdirname, "publish.zip")
+
+        with open(zip_path, "wb") as zip_file:
+            zip_file.write(base64.b64decode(req.args.data.encode()))
+
+        await _install_package(req.args.id, zip_path)
+
+    return None
+
+
+@dataclass
+class ChunkedUpload:
+
+    file: BinaryIO
+    path: str
+    owner: WsClient
+    seq: int = 0
+    updated: float = field(default_factory=time.monotonic)
+
+
+# package id -> upload in progress
+UPLOADS: Dict[str, ChunkedUpload] = {}
+
+
+def _abort_upload(package_id: str) -> None:
+
+    try:
+        upload = UPLOADS.pop(package_id)
+    except KeyError:
+        return
+
+    upload.file.close()
+    os.remove(upload.path)
+
+
+def _abort_stale_uploads() -> None:
+
+    deadline = time.monotonic() - UPLOAD_TIMEOUT
+
+    for package_id, upload in list(UPLOADS.items()):
+        if upload.updated < deadline:
+            _abort_upload(package_id)
+
+
+async def _upload_package_chunk_cb(req: rpc.execution.UploadPackageChunkRequest, ui: WsClient) -> None:
+    """
+    Chunks are written to a temporary file as they come, so only one chunk is held in memory.
+    Upload is aborted on any error, when its client disconnects or when it is not continued within UPLOAD_TIMEOUT.
+    """
+
+    args = req.args
+    _abort_stale_uploads()
+
+    if args.seq == 0:
+        _abort_upload(args.id)
+        fd, path = tempfile.mkstemp(suffix=".zip")
+        UPLOADS[args.id] = ChunkedUpload(os.fdopen(fd, "wb"), path, ui)
+
+    try:
+        upload = UPLOADS[args.id]
+    except KeyError:
+        raise Arcor2Exception("Upload not started.")
+
+    if args.seq != upload.seq:
+        _abort_upload(args.id)
+        raise Arcor2Exception(f"Expected chunk {upload.seq}, got {args.seq}.")
+
+    try:
+        upload.file.write(base64.b64decode(args.data.encode()))
+    except (ValueError, OSError) as e:  # binascii.Error is ValueError
+        _abort_upload(args.id)
+        raise Arcor2Exception(f"Failed to process chunk {args.seq}.") from e
+
+    upload.seq += 1
+    upload.updated = time.monotonic()
+
+    if not args.last:
+        return None
+
+    del UPLOADS[args.id]
+    upload.file.close()
+
+    try:
+        await _install_package(args.id, upload.path)
+    finally:
+        os.remove(upload.path)
+
     return None
 
 
+@read_only
 async def list_packages_cb(req: rpc.execution.ListPackagesRequest, ui: WsClient) ->\
         rpc.execution.ListPackagesResponse:
 
@@ -342,15 +433,22 @@ async def rename_package_cb(req: rpc.execution.RenamePackageRequest, ui: WsClien
         pkg_file.write(pm.to_json())
 
 
+@read_only
 async def _version_cb(req: rpc.common.VersionRequest, ui: WsClient) -> rpc.common.VersionResponse:
     return rpc.common.VersionResponse(data=rpc.common.VersionData(arcor2.api_version()))
 
 
+@read_only
+async def _server_stats_cb(req: rpc.common.GetServerStatsRequest, ui: WsClient) -> \
+        rpc.common.GetServerStatsResponse:
+    return rpc.common.GetServerStatsResponse(data=rpc_metrics.server_stats())
+
+
 async def send_to_clients(event: Event) -> None:
 
     if CLIENTS:
-        data = event.to_json()
-        await asyncio.wait([client.send(data) for client in CLIENTS])
+        message = wire.Message(event.to_dict())
+        await asyncio.wait([client.send(message.encode(wire.encoding(client))) for client in CLIENTS])
 
 
 async def register(websocket: WsClient) -> None:
@@ -358,10 +456,11 @@ async def register(websocket: WsClient) -> None:
     await logger.info("Registering new client")
     CLIENTS.add(websocket)
 
-    tasks: List[Awaitable] = [websocket.send(PROJECT_EVENT.to_json())]
+    enc = wire.encoding(websocket)
+    tasks: List[Awaitable] = [websocket.send(wire.encode(PROJECT_EVENT.to_dict(), enc))]
 
     if PACKAGE_INFO_EVENT:
-        tasks.append(websocket.send(PACKAGE_INFO_EVENT.to_json()))
+        tasks.append(websocket.send(wire.encode(PACKAGE_INFO_EVENT.to_dict(), enc)))
 
     await asyncio.gather(*tasks)
 
@@ -370,6 +469,10 @@ async def unregister(websocket: WsClient) -> None:
     await logger.info("Unregistering client")
     CLIENTS.remove(websocket)
 
+    for package_id, upload in list(UPLOADS.items()):
+        if upload.owner is websocket:
+            _abort_upload(package_id)
+
 RPC_DICT: RPC_DICT_TYPE = {
     rpc.execution.RunPackageRequest: run_package_cb,
     rpc.execution.StopPackageRequest: stop_package_cb,
@@ -377,18 +480,22 @@ RPC_DICT: RPC_DICT_TYPE = {
     rpc.execution.ResumePackageRequest: resume_package_cb,
     rpc.execution.PackageStateRequest: package_state_cb,
     rpc.execution.UploadPackageRequest: _upload_package_cb,
+    rpc.execution.UploadPackageChunkRequest: _upload_package_chunk_cb,
     rpc.execution.ListPackagesRequest: list_packages_cb,
     rpc.execution.DeletePackageRequest: delete_package_cb,
     rpc.execution.RenamePackageRequest: rename_package_cb,
-    rpc.common.VersionRequest: _version_cb
+    rpc.common.VersionRequest: _version_cb,
+    rpc.common.GetServerStatsRequest: _server_stats_cb
 }
 
 
 async def aio_main() -> None:
 
     await websockets.serve(
-        functools.partial(server, logger=logger, register=register, unregister=unregister, rpc_dict=RPC_DICT),
-        '0.0.0.0', PORT)
+        functools.partial(server, logger=logger, register=register, unregister=unregister, rpc_dict=RPC_DICT,
+                          validate=not TRUSTED_LINKS),
+        '0.0.0.0', PORT, subprotocols=wire.SUBPROTOCOLS, compression=wire.COMPRESSION,
+        process_request=metrics.process_request)
 
 
 def main() -> None:
@@ -405,14 +512,21 @@ def main() -> None:
                         help="Shows API version and exits.")
     parser.add_argument("-a", "--asyncio_debug", help="Turn on asyncio debug mode.",
                         action="store_const", const=True, default=False)
+    profiling.add_argument(parser)
 
     args = parser.parse_args()
     logger.level = args.verbose
 
+    if args.profile_startup:
+        STARTUP.module = "arcor2.nodes.execution"
+
     loop = asyncio.get_event_loop()
     loop.set_debug(enabled=args.asyncio_debug)
 
-    compile_json_schemas()
+    with STARTUP.phase("json schemas"):
+        compile_json_schemas(JSON_SCHEMA_CACHE_PATH if JSON_SCHEMA_CACHE else None)
+
+    STARTUP.print_report()
 
     run(aio_main(), loop=loop, stop_on_unhandled_errors=True)
 
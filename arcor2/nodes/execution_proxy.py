@@ -30,12 +30,12 @@ from flask_swagger_ui import get_swaggerui_blueprint  # type: ignore
 
 import websocket  # type: ignore
 
-from werkzeug.utils import secure_filename
-
 import arcor2
+from arcor2 import codec, metrics, profiling
 from arcor2.data import common, events, execution, rpc
 from arcor2.data.helpers import EVENT_MAPPING, RPC_MAPPING
-from arcor2.nodes.execution import PORT as MANAGER_PORT
+from arcor2.nodes import EXECUTION_PORT as MANAGER_PORT, UPLOAD_CHUNK_SIZE
+from arcor2.profiling import STARTUP
 from arcor2.settings import PROJECT_PATH
 
 PORT = int(os.getenv("ARCOR2_EXECUTION_PROXY_PORT", 5009))
@@ -107,7 +107,7 @@ def ws_thread():
 
     while True:
 
-        data = json.loads(ws.recv())
+        data = codec.loads(ws.recv())
 
         if "event" in data:
 
@@ -135,7 +135,7 @@ def call_rpc(req: rpc.common.Request) -> rpc.common.Response:
     assert ws
 
     rpc_responses[req.id] = RespQueue(maxsize=1)
-    ws.send(req.to_json())
+    ws.send(codec.to_json(req))
     resp = rpc_responses[req.id].get()
     del rpc_responses[req.id]
     return resp
@@ -192,19 +192,27 @@ def put_package(packageId: str):  # noqa
     """
 
     file = request.files['executionPackage']
-    file_name = secure_filename(file.filename)
 
-    with tempfile.TemporaryDirectory() as tmpdirname:
-        file_path = os.path.join(tmpdirname, file_name)
-        file.save(file_path)
+    def upload_chunk(seq: int, chunk: bytes, last: bool = False) -> rpc.common.Response:
+        return call_rpc(rpc.execution.UploadPackageChunkRequest(
+            id=get_id(),
+            args=rpc.execution.UploadPackageChunkArgs(packageId, seq, base64.b64encode(chunk).decode(), last)))
 
-        with open(file_path, "rb") as zip_file:
-            b64_bytes = base64.b64encode(zip_file.read())
-            b64_str = b64_bytes.decode()
+    seq = 0
+    while True:
 
-    resp = call_rpc(rpc.execution.UploadPackageRequest(
-            id=get_id(),
-            args=rpc.execution.UploadPackageArgs(packageId, b64_str)))
+        chunk = file.stream.read(UPLOAD_CHUNK_SIZE)
+
+        if not chunk:
+            resp = upload_chunk(seq, b"", last=True)
+            break
+
+        resp = upload_chunk(seq, chunk)
+
+        if not resp.result:
+            break
+
+        seq += 1
 
     if resp.result:
         return "ok", 200
@@ -484,6 +492,11 @@ def packages_executioninfo():
     return jsonify(ret.to_dict()), 200
 
 
+@app.route("/metrics", methods=["GET"])
+def get_metrics():
+    return metrics.REGISTRY.prometheus_text(), 200, {"Content-Type": metrics.CONTENT_TYPE}
+
+
 @app.route("/swagger/api/swagger.json", methods=["GET"])
 def get_swagger():
     return json.dumps(spec.to_dict())
@@ -509,12 +522,16 @@ def main():
 
     parser = argparse.ArgumentParser(description=SERVICE_NAME)
     parser.add_argument('-s', '--swagger', action="store_true", default=False)
+    profiling.add_argument(parser)
     args = parser.parse_args()
 
     if args.swagger:
         print(spec.to_yaml())
         return
 
+    if args.profile_startup:
+        STARTUP.module = "arcor2.nodes.execution_proxy"
+
     global ws
     ws = websocket.create_connection(f"ws://0.0.0.0:{MANAGER_PORT}", enable_multithread=True)
 
@@ -531,6 +548,7 @@ def main():
     # Register blueprint at URL
     app.register_blueprint(swaggerui_blueprint, url_prefix=SWAGGER_URL)
 
+    STARTUP.print_report()
     app.run(host='0.0.0.0', port=PORT)
 
 
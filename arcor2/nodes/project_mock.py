@@ -6,7 +6,7 @@ import json
 import os
 import uuid
 from datetime import datetime, timezone
-from typing import Dict
+from typing import Dict, List
 
 from apispec import APISpec  # type: ignore
 
@@ -21,9 +21,11 @@ from flask_cors import CORS  # type: ignore
 from flask_swagger_ui import get_swaggerui_blueprint  # type: ignore
 
 import arcor2
+from arcor2 import profiling
 from arcor2.data import common, object_type, services
 from arcor2.helpers import camel_case_to_snake_case
-from arcor2.rest import convert_keys
+from arcor2.profiling import STARTUP
+from arcor2.rest import WRITER_HEADER, convert_keys
 
 PORT = int(os.getenv("ARCOR2_PROJECT_SERVICE_MOCK_PORT", 5012))
 SERVICE_NAME = "ARCOR2 Project Service Mock"
@@ -54,6 +56,12 @@ BOXES: Dict[str, object_type.Box] = {}
 CYLINDERS: Dict[str, object_type.Cylinder] = {}
 SPHERES: Dict[str, object_type.Sphere] = {}
 
+CHANGES: List[common.StorageChange] = []
+
+
+def record_change(kind: common.StorageChange.KindEnum, id: str, deleted: bool = False) -> None:
+    CHANGES.append(common.StorageChange(len(CHANGES) + 1, kind, id, deleted, request.headers.get(WRITER_HEADER)))
+
 
 @app.route("/project", methods=['PUT'])
 def put_project():
@@ -73,9 +81,10 @@ def put_project():
                   description: Ok
     """
 
-    project = common.Project.from_dict(convert_keys(request.json, camel_case_to_snake_case))
+    project = common.Project.from_dict(convert_keys(request.json, camel_case_to_snake_case, common.Project))
     project.modified = datetime.now(tz=timezone.utc)
     PROJECTS[project.id] = project
+    record_change(common.StorageChange.KindEnum.PROJECT, project.id)
     return "ok", 200
 
 
@@ -134,6 +143,8 @@ def delete_project(id: str):
     except KeyError:
         return "Not found", 404
 
+    record_change(common.StorageChange.KindEnum.PROJECT, id, deleted=True)
+
     return "ok", 200
 
 
@@ -180,9 +191,10 @@ def put_scene():
                   description: Ok
     """
 
-    scene = common.Scene.from_dict(convert_keys(request.json, camel_case_to_snake_case))
+    scene = common.Scene.from_dict(convert_keys(request.json, camel_case_to_snake_case, common.Scene))
     scene.modified = datetime.now(tz=timezone.utc)
     SCENES[scene.id] = scene
+    record_change(common.StorageChange.KindEnum.SCENE, scene.id)
     return "ok", 200
 
 
@@ -241,6 +253,8 @@ def delete_scene(id: str):
     except KeyError:
         return "Not found", 404
 
+    record_change(common.StorageChange.KindEnum.SCENE, id, deleted=True)
+
     return "ok", 200
 
 
@@ -287,11 +301,44 @@ def put_object_type():
                   description: Ok
     """
 
-    obj_type = object_type.ObjectType.from_dict(convert_keys(request.json, camel_case_to_snake_case))
+    obj_type = object_type.ObjectType.from_dict(
+        convert_keys(request.json, camel_case_to_snake_case, object_type.ObjectType))
     OBJECT_TYPES[obj_type.id] = obj_type
+    record_change(common.StorageChange.KindEnum.OBJECT_TYPE, obj_type.id)
     return "ok", 200
 
 
+@app.route("/object_types/bulk", methods=['GET'])
+def get_object_types_bulk():
+    """Gets many object types at once.
+        ---
+        get:
+            tags:
+                - ObjectType
+            summary: Gets object types by their ids. Unknown ids are skipped.
+            parameters:
+                - name: Ids
+                  in: query
+                  description: unique IDs
+                  required: true
+                  schema:
+                    type: array
+                    items:
+                      type: string
+            responses:
+                200:
+                  description: Ok
+                  content:
+                    application/json:
+                        schema:
+                            type: array
+                            items:
+                              $ref: ObjectType
+    """
+
+    return jsonify([OBJECT_TYPES[id].to_dict() for id in request.args.getlist("Ids") if id in OBJECT_TYPES])
+
+
 @app.route("/object_types/<string:id>", methods=['GET'])
 def get_object_type(id: str):
     """Add or update object_type.
@@ -347,6 +394,8 @@ def delete_object_type(id: str):
     except KeyError:
         return "Not found", 404
 
+    record_change(common.StorageChange.KindEnum.OBJECT_TYPE, id, deleted=True)
+
     return "ok", 200
 
 
@@ -393,8 +442,10 @@ def put_service_type():
                   description: Ok
     """
 
-    srv_type = services.ServiceType.from_dict(convert_keys(request.json, camel_case_to_snake_case))
+    srv_type = services.ServiceType.from_dict(
+        convert_keys(request.json, camel_case_to_snake_case, services.ServiceType))
     SERVICE_TYPES[srv_type.id] = srv_type
+    record_change(common.StorageChange.KindEnum.SERVICE_TYPE, srv_type.id)
     return "ok", 200
 
 
@@ -428,6 +479,37 @@ def get_service_type(id: str):
         return "Not found", 404
 
 
+@app.route("/service_types/bulk", methods=['GET'])
+def get_service_types_bulk():
+    """Gets many service types at once.
+        ---
+        get:
+            tags:
+                - ServiceType
+            summary: Gets service types by their ids. Unknown ids are skipped.
+            parameters:
+                - name: Ids
+                  in: query
+                  description: unique IDs
+                  required: true
+                  schema:
+                    type: array
+                    items:
+                      type: string
+            responses:
+                200:
+                  description: Ok
+                  content:
+                    application/json:
+                        schema:
+                            type: array
+                            items:
+                              $ref: ServiceType
+    """
+
+    return jsonify([SERVICE_TYPES[id].to_dict() for id in request.args.getlist("Ids") if id in SERVICE_TYPES])
+
+
 @app.route("/service_type/<string:id>", methods=['DELETE'])
 def delete_service_type(id: str):
     """Deletes service type.
@@ -453,6 +535,8 @@ def delete_service_type(id: str):
     except KeyError:
         return "Not found", 404
 
+    record_change(common.StorageChange.KindEnum.SERVICE_TYPE, id, deleted=True)
+
     return "ok", 200
 
 
@@ -499,8 +583,9 @@ def put_box():
                   description: Ok
     """
 
-    box = object_type.Box.from_dict(convert_keys(request.json, camel_case_to_snake_case))
+    box = object_type.Box.from_dict(convert_keys(request.json, camel_case_to_snake_case, object_type.Box))
     BOXES[box.id] = box
+    record_change(common.StorageChange.KindEnum.MODEL, box.id)
     return "ok", 200
 
 
@@ -552,8 +637,10 @@ def put_cylinder():
                   description: Ok
     """
 
-    cylinder = object_type.Cylinder.from_dict(convert_keys(request.json, camel_case_to_snake_case))
+    cylinder = object_type.Cylinder.from_dict(
+        convert_keys(request.json, camel_case_to_snake_case, object_type.Cylinder))
     CYLINDERS[cylinder.id] = cylinder
+    record_change(common.StorageChange.KindEnum.MODEL, cylinder.id)
     return "ok", 200
 
 
@@ -605,8 +692,9 @@ def put_sphere():
                   description: Ok
     """
 
-    sphere = object_type.Sphere.from_dict(convert_keys(request.json, camel_case_to_snake_case))
+    sphere = object_type.Sphere.from_dict(convert_keys(request.json, camel_case_to_snake_case, object_type.Sphere))
     SPHERES[sphere.id] = sphere
+    record_change(common.StorageChange.KindEnum.MODEL, sphere.id)
     return "ok", 200
 
 
@@ -640,6 +728,45 @@ def get_sphere(id: str):
         return "Not found", 404
 
 
+@app.route("/models/bulk", methods=['GET'])
+def get_models_bulk():
+    """Gets many models at once.
+        ---
+        get:
+            tags:
+                - Models
+            summary: Gets models by their ids. Unknown ids are skipped.
+            parameters:
+                - name: Ids
+                  in: query
+                  description: unique IDs
+                  required: true
+                  schema:
+                    type: array
+                    items:
+                      type: string
+            responses:
+                200:
+                  description: Ok
+                  content:
+                    application/json:
+                        schema:
+                            type: array
+                            items:
+                              $ref: ObjectModel
+    """
+
+    ret = []
+
+    for id in request.args.getlist("Ids"):
+        for models in (BOXES, CYLINDERS, SPHERES):
+            if id in models:
+                model = models[id]
+                ret.append(object_type.ObjectModel(model.type(), **{model.type().value.lower(): model}).to_dict())
+
+    return jsonify(ret)
+
+
 @app.route("/models/<string:id>", methods=['DELETE'])
 def delete_model(id: str):
     """Deletes model.
@@ -671,9 +798,43 @@ def delete_model(id: str):
             except KeyError:
                 return "Not found", 404
 
+    record_change(common.StorageChange.KindEnum.MODEL, id, deleted=True)
     return "ok", 200
 
 
+@app.route("/changes", methods=['GET'])
+def get_changes():
+    """Gets changes made since the given one.
+        ---
+        get:
+            tags:
+                - Changes
+            summary: Gets changes of documents, made after the change with the given sequence number.
+            parameters:
+                - name: Since
+                  in: query
+                  description: Sequence number of the last known change. Only the current one is returned if omitted.
+                  required: false
+                  schema:
+                    type: integer
+            responses:
+                200:
+                  description: Ok
+                  content:
+                    application/json:
+                        schema:
+                            $ref: StorageChanges
+    """
+
+    ret = common.StorageChanges(len(CHANGES))
+    since = request.args.get("Since", type=int)
+
+    if since is not None:
+        ret.items = CHANGES[max(since, 0):]
+
+    return jsonify(ret.to_dict())
+
+
 @app.route("/swagger/api/swagger.json", methods=["GET"])
 def get_swagger():
     return json.dumps(spec.to_dict())
@@ -682,11 +843,13 @@ def get_swagger():
 spec.components.schema(common.Project.__name__, schema=common.Project)
 spec.components.schema(common.Scene.__name__, schema=common.Scene)
 spec.components.schema(common.IdDescList.__name__, schema=common.IdDescList)
+spec.components.schema(common.StorageChanges.__name__, schema=common.StorageChanges)
 spec.components.schema(object_type.ObjectType.__name__, schema=object_type.ObjectType)
 spec.components.schema(services.ServiceType.__name__, schema=services.ServiceType)
 spec.components.schema(object_type.Box.__name__, schema=object_type.Box)
 spec.components.schema(object_type.Cylinder.__name__, schema=object_type.Cylinder)
 spec.components.schema(object_type.Sphere.__name__, schema=object_type.Sphere)
+spec.components.schema(object_type.ObjectModel.__name__, schema=object_type.ObjectModel)
 
 
 with app.test_request_context():
@@ -703,11 +866,13 @@ with app.test_request_context():
 
     spec.path(view=put_object_type)
     spec.path(view=get_object_type)
+    spec.path(view=get_object_types_bulk)
     spec.path(view=delete_object_type)
     spec.path(view=get_object_types)
 
     spec.path(view=put_service_type)
     spec.path(view=get_service_type)
+    spec.path(view=get_service_types_bulk)
     spec.path(view=delete_service_type)
     spec.path(view=get_service_types)
 
@@ -717,19 +882,26 @@ with app.test_request_context():
     spec.path(view=get_cylinder)
     spec.path(view=put_sphere)
     spec.path(view=get_sphere)
+    spec.path(view=get_models_bulk)
     spec.path(view=delete_model)
 
+    spec.path(view=get_changes)
+
 
 def main():
 
     parser = argparse.ArgumentParser(description=SERVICE_NAME)
     parser.add_argument('-s', '--swagger', action="store_true", default=False)
+    profiling.add_argument(parser)
     args = parser.parse_args()
 
     if args.swagger:
         print(spec.to_yaml())
         return
 
+    if args.profile_startup:
+        STARTUP.module = "arcor2.nodes.project_mock"
+
     SWAGGER_URL = "/swagger"
 
     swaggerui_blueprint = get_swaggerui_blueprint(
@@ -740,6 +912,7 @@ def main():
     # Register blueprint at URL
     app.register_blueprint(swaggerui_blueprint, url_prefix=SWAGGER_URL)
 
+    STARTUP.print_report()
     app.run(host='0.0.0.0', port=PORT)
 
 
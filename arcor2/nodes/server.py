@@ -6,12 +6,11 @@ import argparse
 import asyncio
 import functools
 import inspect
-import json
 import os
 import shutil
 import sys
 import uuid
-from typing import get_type_hints
+from typing import Tuple, get_type_hints
 
 from aiologger.levels import LogLevel  # type: ignore
 
@@ -26,14 +25,21 @@ import arcor2
 import arcor2.helpers as hlp
 from arcor2 import action as action_mod
 from arcor2 import aio_persistent_storage as storage
+from arcor2 import aio_rest, metrics, profiling, rpc_metrics, wire
+from arcor2.change_feed import ChangeFeed
 from arcor2.data import common, compile_json_schemas, events
 from arcor2.data import rpc
-from arcor2.data.helpers import EVENT_MAPPING, RPC_MAPPING
+from arcor2.data.helpers import EVENT_MAPPING, RPC_MAPPING, from_dict
 from arcor2.exceptions import Arcor2Exception
+from arcor2.metadata_cache import MetadataCache
 from arcor2.nodes.execution import RPC_DICT as EXE_RPC_DICT
 from arcor2.parameter_plugins import PARAM_PLUGINS
-from arcor2.server import events as server_events, execution as exe, globals as glob, notifications as notif, \
-    objects_services_actions as osa, rpc as srpc, settings
+from arcor2.profiling import STARTUP
+from arcor2.rpc_channel import RpcChannelException
+from arcor2.server import documents, events as server_events, execution as exe, globals as glob, \
+    notifications as notif, objects_services_actions as osa, rpc as srpc, settings
+from arcor2.settings import JSON_SCHEMA_CACHE, JSON_SCHEMA_CACHE_PATH, TRUSTED_LINKS
+from arcor2.type_registry import TYPES
 
 # disables before/after messages, etc.
 action_mod.HANDLE_ACTIONS = False
@@ -43,17 +49,18 @@ async def handle_manager_incoming_messages(manager_client) -> None:
 
     try:
 
+        enc = wire.encoding(manager_client)
+
         async for message in manager_client:
 
-            msg = json.loads(message)
+            msg = wire.decode(message, enc)
 
             if "event" in msg:
 
-                if glob.INTERFACES:
-                    await asyncio.gather(*[hlp.send_json_to_client(intf, message) for intf in glob.INTERFACES])
+                notif.broadcast_message(wire.Message(msg, message, enc), msg["event"])
 
                 try:
-                    evt = EVENT_MAPPING[msg["event"]].from_dict(msg)
+                    evt = from_dict(EVENT_MAPPING[msg["event"]], msg, not TRUSTED_LINKS)
                 except ValidationError as e:
                     await glob.logger.error("Invalid event: {}, error: {}".format(msg, e))
                     continue
@@ -96,10 +103,17 @@ async def handle_manager_incoming_messages(manager_client) -> None:
 
             elif "response" in msg:
 
-                # TODO handle potential errors
-                _, resp_cls = RPC_MAPPING[msg["response"]]
-                resp = resp_cls.from_dict(msg)
-                exe.MANAGER_RPC_RESPONSES[resp.id].put_nowait(resp)
+                try:
+                    _, resp_cls = RPC_MAPPING[msg["response"]]
+                    resp = from_dict(resp_cls, msg, not TRUSTED_LINKS)
+                except (KeyError, ValidationError) as e:
+                    await glob.logger.error(f"Invalid response: {msg}, error: {e}")
+                    if isinstance(msg.get("id"), int):
+                        exe.MANAGER.reject(msg["id"], RpcChannelException("Invalid response."))
+                    continue
+
+                if not exe.MANAGER.resolve(resp):
+                    await glob.logger.warning(f"Late or unexpected response: {resp.response} ({resp.id}).")
 
     except websockets.exceptions.ConnectionClosed:
         await glob.logger.error("Connection to manager closed.")
@@ -107,7 +121,15 @@ async def handle_manager_incoming_messages(manager_client) -> None:
 
 async def _initialize_server() -> None:
 
-    exe_version = await exe.manager_request(rpc.common.VersionRequest(uuid.uuid4().int))
+    with STARTUP.phase("execution"):
+
+        while True:  # wait until Execution becomes available
+            try:
+                exe_version = await exe.manager_request(rpc.common.VersionRequest(uuid.uuid4().int))
+                break
+            except RpcChannelException as e:
+                await glob.logger.warning(f"Execution unit: {e.message}")
+
     assert isinstance(exe_version, rpc.common.VersionResponse)
 
     """
@@ -119,26 +141,35 @@ async def _initialize_server() -> None:
     except Arcor2Exception as e:
         raise Arcor2Exception("ARServer/Execution API_VERSION mismatch.") from e
 
-    while True:  # wait until Project service becomes available
-        try:
-            await storage.get_projects()
-            break
-        except storage.PersistentStorageException as e:
-            print(e.message)
-            await asyncio.sleep(1)
+    with STARTUP.phase("storage"):
 
-    # this has to be done sequentially as objects might depend on services so (all) services has to be known first
-    await osa.get_service_types()
-    await osa.get_object_types()
-    await osa.get_object_actions()
+        while True:  # wait until Project service becomes available
+            try:
+                await storage.get_projects()
+                break
+            except storage.PersistentStorageException as e:
+                print(e.message)
+                await asyncio.sleep(1)
+
+    await osa.load_types()
+
+    if CHANGE_FEED.interval > 0:
+        CHANGE_FEED.subscribe(osa.reload_types)
+        CHANGE_FEED.subscribe_reset(osa.reload_all_types)
+        asyncio.ensure_future(CHANGE_FEED.run())
 
     bound_handler = functools.partial(hlp.server, logger=glob.logger, register=register, unregister=unregister,
-                                      rpc_dict=RPC_DICT, event_dict=EVENT_DICT, verbose=glob.VERBOSE)
+                                      rpc_dict=RPC_DICT, event_dict=EVENT_DICT, verbose=glob.VERBOSE,
+                                      send_response=notif.send_response)
 
-    await glob.logger.info("Server initialized.")
-    await asyncio.wait([websockets.serve(bound_handler, '0.0.0.0', glob.PORT)])
+    await glob.logger.info(f"Server initialized, {STARTUP.report()}.")
+    await hlp.run_in_executor(STARTUP.print_report)
+    await asyncio.wait([websockets.serve(bound_handler, '0.0.0.0', glob.PORT,
+                                         process_request=metrics.process_request,
+                                         subprotocols=wire.SUBPROTOCOLS, compression=wire.COMPRESSION)])
 
 
+@hlp.read_only
 async def list_meshes_cb(req: rpc.storage.ListMeshesRequest, ui: WsClient) -> rpc.storage.ListMeshesResponse:
     return rpc.storage.ListMeshesResponse(data=await storage.get_meshes())
 
@@ -147,22 +178,21 @@ async def register(websocket: WsClient) -> None:
 
     await glob.logger.info("Registering new ui")
     glob.INTERFACES.add(websocket)
+    notif.add_client(websocket)
+    documents.add_client(websocket)
 
-    if glob.PROJECT:
-        assert glob.SCENE
-        await notif.event(websocket, events.OpenProject(data=events.OpenProjectData(glob.SCENE, glob.PROJECT)))
-    elif glob.SCENE:
-        await notif.event(websocket, events.OpenScene(data=events.OpenSceneData(glob.SCENE)))
+    if glob.SCENE:
+        await documents.send_open(websocket)
     elif glob.PACKAGE_INFO:
 
-        # this can't be done in parallel - ui expects this order of events
-        await websocket.send(events.PackageStateEvent(data=glob.PACKAGE_STATE).to_json())
-        await websocket.send(events.PackageInfoEvent(data=glob.PACKAGE_INFO).to_json())
+        # ui expects this order of events (the send queue keeps it)
+        await notif.event(websocket, events.PackageStateEvent(data=glob.PACKAGE_STATE))
+        await notif.event(websocket, events.PackageInfoEvent(data=glob.PACKAGE_INFO))
 
         if glob.ACTION_STATE:
-            await websocket.send(events.ActionStateEvent(data=glob.ACTION_STATE).to_json())
+            await notif.event(websocket, events.ActionStateEvent(data=glob.ACTION_STATE))
         if glob.CURRENT_ACTION:
-            await websocket.send(events.CurrentActionEvent(data=glob.CURRENT_ACTION).to_json())
+            await notif.event(websocket, events.CurrentActionEvent(data=glob.CURRENT_ACTION))
     else:
         await notif.event(websocket, events.ShowMainScreenEvent(data=glob.MAIN_SCREEN))
 
@@ -170,6 +200,8 @@ async def register(websocket: WsClient) -> None:
 async def unregister(websocket: WsClient) -> None:
     await glob.logger.info("Unregistering ui")  # TODO print out some identifier
     glob.INTERFACES.remove(websocket)
+    notif.remove_client(websocket)
+    documents.remove_client(websocket)
 
     for registered_uis in glob.ROBOT_JOINTS_REGISTERED_UIS.values():
         if websocket in registered_uis:
@@ -179,6 +211,7 @@ async def unregister(websocket: WsClient) -> None:
             registered_uis.remove(websocket)
 
 
+@hlp.read_only
 async def system_info_cb(req: rpc.common.SystemInfoRequest, ui: WsClient) -> rpc.common.SystemInfoResponse:
 
     resp = rpc.common.SystemInfoResponse()
@@ -189,8 +222,21 @@ async def system_info_cb(req: rpc.common.SystemInfoRequest, ui: WsClient) -> rpc
     return resp
 
 
+@hlp.read_only
+async def get_metrics_cb(req: rpc.common.GetMetricsRequest, ui: WsClient) -> rpc.common.GetMetricsResponse:
+    return rpc.common.GetMetricsResponse(data=metrics.REGISTRY.collect())
+
+
+@hlp.read_only
+async def get_server_stats_cb(req: rpc.common.GetServerStatsRequest, ui: WsClient) -> \
+        rpc.common.GetServerStatsResponse:
+    return rpc.common.GetServerStatsResponse(data=rpc_metrics.server_stats())
+
+
 RPC_DICT: hlp.RPC_DICT_TYPE = {
-    rpc.common.SystemInfoRequest: system_info_cb
+    rpc.common.SystemInfoRequest: system_info_cb,
+    rpc.common.GetMetricsRequest: get_metrics_cb,
+    rpc.common.GetServerStatsRequest: get_server_stats_cb
 }
 
 # discovery of RPC callbacks
@@ -207,6 +253,9 @@ for _, rpc_module in inspect.getmembers(srpc, inspect.ismodule):
         except KeyError:
             continue
 
+        if not hlp.is_read_only(rpc_cb):  # UIs registered for deltas get them after every change
+            rpc_cb = notif.batching(documents.publishing(rpc_cb))
+
         RPC_DICT[ttype] = rpc_cb
 
 # add Project Manager RPC API
@@ -222,14 +271,33 @@ for k, v in EXE_RPC_DICT.items():
 EVENT_DICT: hlp.EVENT_DICT_TYPE = {}
 
 
+async def log_write_error(key: Tuple[str, str], e: Exception) -> None:
+    await glob.logger.error(f"Failed to store {key[0]} {key[1]}: {e}")
+
+
+async def log_change_feed_error(e: Exception) -> None:
+    await glob.logger.debug(f"Failed to get changes from the storage: {e}")
+
+
+CHANGE_FEED = ChangeFeed(on_error=log_change_feed_error)
+
+
 async def aio_main() -> None:
 
+    storage.WRITE_BEHIND.on_error = log_write_error
+
     await asyncio.gather(
         exe.project_manager_client(handle_manager_incoming_messages),
         _initialize_server()
     )
 
 
+def shutdown(loop: asyncio.AbstractEventLoop) -> None:
+
+    loop.run_until_complete(storage.flush_writes())
+    loop.run_until_complete(aio_rest.close_session())
+
+
 def main():
 
     assert sys.version_info >= (3, 8)
@@ -246,21 +314,29 @@ def main():
                         help="Shows API version and exits.")
     parser.add_argument("-a", "--asyncio_debug", help="Turn on asyncio debug mode.",
                         action="store_const", const=True, default=False)
+    profiling.add_argument(parser)
 
     args = parser.parse_args()
     glob.logger.level = args.debug
+
+    if args.profile_startup:
+        STARTUP.module = "arcor2.nodes.server"
     glob.VERBOSE = args.verbose
 
     loop = asyncio.get_event_loop()
     loop.set_debug(enabled=args.asyncio_debug)
 
-    compile_json_schemas()
+    with STARTUP.phase("json schemas"):
+        compile_json_schemas(JSON_SCHEMA_CACHE_PATH if JSON_SCHEMA_CACHE else None)
 
     if os.path.exists(settings.URDF_PATH):
         shutil.rmtree(settings.URDF_PATH)
     os.makedirs(settings.URDF_PATH)
 
-    run(aio_main(), loop=loop, stop_on_unhandled_errors=True)
+    if settings.METADATA_CACHE:
+        TYPES.cache = MetadataCache(settings.METADATA_CACHE_PATH)
+
+    run(aio_main(), loop=loop, stop_on_unhandled_errors=True, shutdown_callback=shutdown)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,62 @@
+import asyncio
+import base64
+import os
+
+import pytest  # type: ignore
+
+from arcor2.data import rpc
+from arcor2.exceptions import Arcor2Exception
+from arcor2.nodes import execution
+
+
+def chunk(seq: int, data: str) -> rpc.execution.UploadPackageChunkRequest:
+    return rpc.execution.UploadPackageChunkRequest(id=seq, args=rpc.execution.UploadPackageChunkArgs("pkg", seq, data))
+
+
+def test_upload_aborted(monkeypatch):
+
+    async def info(msg: str) -> None:
+        pass
+
+    monkeypatch.setattr(execution.logger, "info", info)  # aiologger can't write to stdout captured by pytest
+
+    async def run() -> None:
+
+        ui = object()
+
+        await execution._upload_package_chunk_cb(chunk(0, base64.b64encode(b"zip").decode()), ui)  # type: ignore
+        path = execution.UPLOADS["pkg"].path
+        assert os.path.exists(path)
+
+        with pytest.raises(Arcor2Exception):
+            await execution._upload_package_chunk_cb(chunk(1, "not base64!"), ui)  # type: ignore
+
+        assert "pkg" not in execution.UPLOADS
+        assert not os.path.exists(path)
+
+        await execution._upload_package_chunk_cb(chunk(0, ""), ui)  # type: ignore
+        path = execution.UPLOADS["pkg"].path
+
+        execution.CLIENTS.add(ui)
+        await execution.unregister(ui)  # type: ignore
+
+        assert "pkg" not in execution.UPLOADS
+        assert not os.path.exists(path)
+
+    asyncio.run(run())
+
+
+def test_stale_upload_aborted(monkeypatch):
+
+    async def run() -> None:
+
+        await execution._upload_package_chunk_cb(chunk(0, ""), object())  # type: ignore
+        path = execution.UPLOADS["pkg"].path
+
+        monkeypatch.setattr(execution, "UPLOAD_TIMEOUT", -1.0)
+        execution._abort_stale_uploads()
+
+        assert "pkg" not in execution.UPLOADS
+        assert not os.path.exists(path)
+
+    asyncio.run(run())
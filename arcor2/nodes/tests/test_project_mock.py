@@ -4,6 +4,47 @@ from openapi_spec_validator import validate_spec  # type: ignore
 
 import yaml
 
+from arcor2.data.common import Project, StorageChange, StorageChanges
+from arcor2.data.object_type import Box, ObjectModel, ObjectType, Sphere
+from arcor2.data.services import ServiceType
+from arcor2.nodes.project_mock import app
+from arcor2.rest import WRITER_HEADER
+
 
 def test_project_mock_openapi():
     validate_spec(yaml.full_load(check_output(["arcor2_project_mock", "--swagger"])))
+
+
+def test_project_mock_changes():
+
+    client = app.test_client()
+    last = StorageChanges.from_dict(client.get("/changes").get_json()).last
+
+    assert client.put("/project", json=Project("p1", "name", "scene").to_dict(),
+                      headers={WRITER_HEADER: "writer"}).status_code == 200
+    assert client.delete("/project/p1").status_code == 200
+
+    changes = StorageChanges.from_dict(client.get("/changes", query_string={"Since": last}).get_json())
+    assert changes.last == last + 2
+    assert [(ch.kind, ch.id, ch.deleted, ch.writer) for ch in changes.items] == [
+        (StorageChange.KindEnum.PROJECT, "p1", False, "writer"), (StorageChange.KindEnum.PROJECT, "p1", True, None)]
+
+
+def test_project_mock_bulk():
+
+    client = app.test_client()
+
+    for url, data in (("/object_type", ObjectType("t1", "src")), ("/object_type", ObjectType("t2", "src")),
+                      ("/service_type", ServiceType("s1", "src")), ("/models/box", Box("b1", 1, 1, 1)),
+                      ("/models/sphere", Sphere("sp1", 1))):
+        assert client.put(url, json=data.to_dict()).status_code == 200
+
+    def bulk(url: str, *ids: str):
+        resp = client.get(url, query_string=[("Ids", id) for id in ids])
+        assert resp.status_code == 200
+        return resp.get_json()
+
+    # unknown ids are skipped
+    assert [ObjectType.from_dict(ot).id for ot in bulk("/object_types/bulk", "t2", "unknown", "t1")] == ["t2", "t1"]
+    assert [ServiceType.from_dict(st).id for st in bulk("/service_types/bulk", "s1", "t1")] == ["s1"]
+    assert [ObjectModel.from_dict(om).model().id for om in bulk("/models/bulk", "sp1", "b1", "t1")] == ["sp1", "b1"]
@@ -1,9 +1,12 @@
 import copy
 import inspect
-from typing import Dict, Iterator, Set, Tuple, Type, Union, get_type_hints
+from typing import Callable, Dict, Iterable, Iterator, List, MutableMapping, Optional, Set, Tuple, Type, Union, \
+    get_type_hints
 
 import horast
 
+from typed_ast.ast3 import Module
+
 import arcor2
 from arcor2.data.object_type import ActionMetadata, ActionParameterMeta, ObjectAction, ObjectActions,\
     ObjectActionsDict, ObjectTypeMeta, ObjectTypeMetaDict
@@ -137,10 +140,12 @@ class IgnoreActionException(Arcor2Exception):
 
 
 def object_actions(plugins: Dict[Type, Type[ParameterPlugin]], type_def: Union[Type[Generic], Type[Service]],
-                   source: str) -> ObjectActions:
+                   source: str, tree: Optional[Module] = None) -> ObjectActions:
 
     ret: ObjectActions = []
-    tree = horast.parse(source)
+
+    if tree is None:
+        tree = horast.parse(source)
 
     # ...inspect.ismethod does not work on un-initialized classes
     for method_name, method_def in inspect.getmembers(type_def, predicate=inspect.isfunction):
@@ -228,7 +233,7 @@ def object_actions(plugins: Dict[Type, Type[ParameterPlugin]], type_def: Union[T
 
 
 def add_ancestor_actions(obj_type_name: str,
-                         object_actions: ObjectActionsDict,
+                         object_actions: MutableMapping[str, ObjectActions],
                          object_types: ObjectTypeMetaDict) -> None:
 
     base_name = object_types[obj_type_name].base
@@ -239,9 +244,21 @@ def add_ancestor_actions(obj_type_name: str,
     if object_types[base_name].base:
         add_ancestor_actions(base_name, object_actions, object_types)
 
+    add_base_actions(object_actions[obj_type_name], base_name, object_actions[base_name])
+
+
+def add_base_actions(actions: ObjectActions, base_name: str, base_actions: ObjectActions) -> None:
+    """
+    Adds actions of the base type (already with actions of its ancestors) to actions of the type.
+    :param actions:
+    :param base_name:
+    :param base_actions:
+    :return:
+    """
+
     # do not add action from base if it is overridden in child
-    for base_action in object_actions[base_name]:
-        for obj_action in object_actions[obj_type_name]:
+    for base_action in base_actions:
+        for obj_action in actions:
             if base_action.name == obj_action.name:
 
                 # built-in object has no "origins" yet
@@ -252,4 +269,160 @@ def add_ancestor_actions(obj_type_name: str,
             action = copy.deepcopy(base_action)
             if not action.origins:
                 action.origins = base_name
-            object_actions[obj_type_name].append(action)
+            actions.append(action)
+
+
+class LazyActions(MutableMapping[str, ObjectActions]):
+    """
+    Actions of types computed (including actions of ancestors) on the first access and memoized.
+    """
+
+    def __init__(self, compute: Dict[str, Callable[[], ObjectActions]], object_types: ObjectTypeMetaDict,
+                 on_error: Optional[Callable[[str, Arcor2Exception], None]] = None) -> None:
+        """
+        :param compute: Type name -> function computing actions defined by the type.
+        :param object_types: To find base types (might be replaced when types are reloaded).
+        :param on_error: Called when actions of a type can't be computed, the type is treated as unknown then.
+        """
+
+        self._compute = dict(compute)
+        self._actions: ObjectActionsDict = {}
+        self.object_types = object_types
+        self._on_error = on_error
+
+    @property
+    def pending(self) -> List[str]:
+        """
+        :return: Types with actions not computed yet.
+        """
+
+        return list(self._compute)
+
+    def __getitem__(self, type_name: str) -> ObjectActions:
+
+        try:
+            return self._actions[type_name]
+        except KeyError:
+            pass
+
+        try:
+            compute = self._compute.pop(type_name)
+        except KeyError:
+            raise KeyError(type_name) from None
+
+        try:
+            actions = compute()
+        except Arcor2Exception as e:
+            if self._on_error:
+                self._on_error(type_name, e)
+            raise KeyError(type_name) from e
+
+        meta = self.object_types.get(type_name)
+
+        if meta and meta.base:
+            try:
+                add_base_actions(actions, meta.base, self[meta.base])
+            except KeyError:
+                pass
+
+        self._actions[type_name] = actions
+        return actions
+
+    def __setitem__(self, type_name: str, actions: ObjectActions) -> None:
+
+        self._compute.pop(type_name, None)
+        self._actions[type_name] = actions
+
+    def __delitem__(self, type_name: str) -> None:
+
+        if self._compute.pop(type_name, None) is None:
+            del self._actions[type_name]
+        else:
+            self._actions.pop(type_name, None)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter([*self._actions, *self._compute])
+
+    def __len__(self) -> int:
+        return len(self._actions) + len(self._compute)
+
+
+class TypeGraph:
+    """
+    Dependencies between object types (base -> derived types) and on services (service -> object types),
+    so only types affected by a change have to be processed again.
+    """
+
+    def __init__(self, object_types: ObjectTypeMetaDict) -> None:
+
+        self.object_types = object_types
+        self.children: Dict[str, Set[str]] = {}
+        self.dependents: Dict[str, Set[str]] = {}
+
+        for obj_type, meta in object_types.items():
+
+            if meta.base:
+                self.children.setdefault(meta.base, set()).add(obj_type)
+
+            for srv in meta.needs_services:
+                self.dependents.setdefault(srv, set()).add(obj_type)
+
+    def descendants(self, obj_types: Iterable[str]) -> Set[str]:
+        """
+        :param obj_types:
+        :return: Given types and all types derived from them.
+        """
+
+        ret: Set[str] = set()
+        to_visit = list(obj_types)
+
+        while to_visit:
+
+            obj_type = to_visit.pop()
+
+            if obj_type in ret:
+                continue
+
+            ret.add(obj_type)
+            to_visit.extend(self.children.get(obj_type, ()))
+
+        return ret
+
+    def affected(self, obj_types: Iterable[str], services: Iterable[str] = ()) -> Set[str]:
+        """
+        :param obj_types: Changed (added, updated or removed) object types.
+        :param services: Changed service types.
+        :return: Types which have to be processed again.
+        """
+
+        dependents: Set[str] = set(obj_types)
+
+        for srv in services:
+            dependents.update(self.dependents.get(srv, ()))
+
+        return self.descendants(dependents)
+
+    def depth(self, obj_type: str) -> int:
+        """
+        :param obj_type:
+        :return: Number of known ancestors of the type.
+        """
+
+        depth = 0
+        visited: Set[str] = {obj_type}
+        meta = self.object_types.get(obj_type)
+
+        while meta and meta.base and meta.base not in visited:
+            depth += 1
+            visited.add(meta.base)
+            meta = self.object_types.get(meta.base)
+
+        return depth
+
+    def ordered(self, obj_types: Iterable[str]) -> List[str]:
+        """
+        :param obj_types:
+        :return: Types sorted so that bases come before derived types.
+        """
+
+        return sorted(obj_types, key=lambda obj_type: (self.depth(obj_type), obj_type))
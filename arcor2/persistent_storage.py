@@ -1,14 +1,28 @@
 import os
+from typing import Callable, Dict, Hashable, List, Optional, Sequence, Set, Tuple, Type, TypeVar
+
+from dataclasses_jsonschema import JsonSchemaMixin
 
 from arcor2 import rest
-from arcor2.data.common import IdDescList, Project, ProjectSources, Scene
-from arcor2.data.object_type import MODEL_MAPPING, Mesh, MeshList, Model3dType, Models, ObjectType
+from arcor2.data.common import IdDescList, Project, ProjectSources, Scene, StorageChanges
+from arcor2.data.object_type import MODEL_MAPPING, Mesh, MeshList, MetaModel3d, Model3dType, ObjectModel, Models, \
+    ObjectType
 from arcor2.data.services import ServiceType
 from arcor2.exceptions import Arcor2Exception
 
 URL = os.getenv("ARCOR2_PERSISTENT_STORAGE_URL", "http://0.0.0.0:11000")
 
-# TODO thread to poll changes? how to "detect" changes?
+# bulk endpoint is not there (e.g. "/object_types/bulk" matches "/object_types/{id}")
+BULK_NOT_SUPPORTED_STATUSES = frozenset((404, 405, 501))
+
+# paths (e.g. "object_types") known not to support bulk requests
+NO_BULK: Set[str] = set()
+
+K = TypeVar('K', bound=Hashable)
+V = TypeVar('V')
+T = TypeVar('T', bound=JsonSchemaMixin)
+
+ModelKey = Tuple[str, Model3dType]
 
 
 class PersistentStorageException(Arcor2Exception):
@@ -55,6 +69,17 @@ def get_project(project_id: str) -> Project:
     return rest.get(f"{URL}/project/{project_id}", Project)
 
 
+@rest.handle_exceptions(PersistentStorageException)
+def get_changes(since: Optional[int] = None) -> StorageChanges:
+    """
+    Gets changes made by anyone since the given one.
+    :param since: Sequence number of the last known change. When None, there are no items, just the last number.
+    :return:
+    """
+
+    return rest.get(f"{URL}/changes", StorageChanges, params=None if since is None else {"since": since})
+
+
 @rest.handle_exceptions(PersistentStorageException)
 def get_project_sources(project_id: str) -> ProjectSources:
     return rest.get(f"{URL}/project/{project_id}/sources", ProjectSources)
@@ -134,3 +159,99 @@ def delete_scene(scene_id: str) -> None:
 @rest.handle_exceptions(PersistentStorageException)
 def delete_project(project_id: str) -> None:
     return rest.delete(f"{URL}/project/{project_id}")
+
+
+def sort_by_keys(keys: Sequence[K], items: Dict[K, V], what: str) -> List[V]:
+    """
+    Returns items in the order given by keys. Raises exception when any item is missing.
+    :param keys:
+    :param items:
+    :param what: Name of the items, used in the error message.
+    :return:
+    """
+
+    missing = [str(key) for key in keys if key not in items]
+
+    if missing:
+        raise rest.RestException(f"{what} not found: {', '.join(missing)}.")
+
+    return [items[key] for key in keys]
+
+
+def _bulk(path: str, ids: Sequence[str], data_cls: Type[T], fetch_one: Callable[[str], T]) -> List[T]:
+
+    if path not in NO_BULK:
+        try:
+            return rest.get_list(f"{URL}/{path}/bulk", data_cls, params={"ids": list(ids)})
+        except rest.RestHttpException as e:
+            if e.status not in BULK_NOT_SUPPORTED_STATUSES:
+                raise
+            NO_BULK.add(path)
+
+    # one by one, rest.SESSION must not be used from more threads
+    return [fetch_one(id) for id in ids]
+
+
+@rest.handle_exceptions(PersistentStorageException)
+def get_object_types(object_type_ids: Sequence[str]) -> List[ObjectType]:
+    """
+    Gets many object types at once. Falls back to one request per type if the storage can't do it in one.
+    :param object_type_ids:
+    :return: Object types in the same order as ids.
+    """
+
+    if not object_type_ids:
+        return []
+
+    obj_types = _bulk("object_types", object_type_ids, ObjectType, get_object_type)
+    return sort_by_keys(object_type_ids, {ot.id: ot for ot in obj_types}, "Object type(s)")
+
+
+@rest.handle_exceptions(PersistentStorageException)
+def get_service_types(service_type_ids: Sequence[str]) -> List[ServiceType]:
+    """
+    Gets many service types at once. Falls back to one request per type if the storage can't do it in one.
+    :param service_type_ids:
+    :return: Service types in the same order as ids.
+    """
+
+    if not service_type_ids:
+        return []
+
+    srv_types = _bulk("service_types", service_type_ids, ServiceType, get_service_type)
+    return sort_by_keys(service_type_ids, {st.id: st for st in srv_types}, "Service type(s)")
+
+
+def models_from_bulk(object_models: Sequence[ObjectModel]) -> Dict[ModelKey, Models]:
+
+    ret: Dict[ModelKey, Models] = {}
+    for om in object_models:
+        model = om.model()
+        ret[(model.id, model.type())] = model
+    return ret
+
+
+@rest.handle_exceptions(PersistentStorageException)
+def get_models(models: Sequence[MetaModel3d]) -> List[Models]:
+    """
+    Gets many models at once. Falls back to one request per model if the storage can't do it in one.
+    :param models:
+    :return: Models in the same order as requested.
+    """
+
+    if not models:
+        return []
+
+    keys: List[ModelKey] = [(mm.id, mm.type) for mm in models]
+
+    if "models" not in NO_BULK:
+        try:
+            found = models_from_bulk(rest.get_list(f"{URL}/models/bulk", ObjectModel,
+                                                   params={"ids": list({mm.id for mm in models})}))
+            return sort_by_keys(keys, found, "Model(s)")
+        except rest.RestHttpException as e:
+            if e.status not in BULK_NOT_SUPPORTED_STATUSES:
+                raise
+            NO_BULK.add("models")
+
+    return [get_model(*key) for key in keys]
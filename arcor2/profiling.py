@@ -0,0 +1,106 @@
+"""
+Durations of startup phases of nodes (logged and exported as metrics).
+
+With --profile-startup, a node also reports its slowest imports.
+"""
+
+import argparse
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, NamedTuple, Optional
+
+from arcor2 import metrics
+
+PHASE_SECONDS = metrics.REGISTRY.gauge("arcor2_startup_phase_seconds", "Duration of startup phases.", ("phase",))
+
+
+class Phases:
+    """
+    Phases might overlap (e.g. fetching of object types runs while service types are being compiled).
+    """
+
+    def __init__(self) -> None:
+
+        self.started = time.monotonic()
+        self.durations: Dict[str, float] = {}
+        self.module: Optional[str] = None  # set by --profile-startup
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+
+        start = time.monotonic()
+
+        try:
+            yield
+        finally:
+            self.durations[name] = self.durations.get(name, 0.0) + time.monotonic() - start
+            PHASE_SECONDS.labels(name).set(self.durations[name])
+
+    def report(self) -> str:
+        """
+        :return: e.g. "service types: 0.120s, object types: 0.513s (total 0.701s)"
+        """
+
+        phases = ", ".join(f"{name}: {duration:.3f}s" for name, duration in self.durations.items())
+        return f"{phases} (total {time.monotonic() - self.started:.3f}s)"
+
+    def print_report(self, limit: int = 20) -> None:
+        """
+        Prints durations of phases and the slowest imports, if profiling was enabled.
+        :param limit: Number of imports to show.
+        :return:
+        """
+
+        if self.module is None:
+            return
+
+        lines = [f"Startup of {self.module}: {self.report()}", "Slowest imports (cumulative, self):"]
+
+        for imp in sorted(import_times(self.module), key=lambda imp: imp.cumulative, reverse=True)[:limit]:
+            lines.append(f"  {imp.cumulative:.3f}s {imp.self:.3f}s {imp.name}")
+
+        print("\n".join(lines), file=sys.stderr)
+
+
+class ImportTime(NamedTuple):
+
+    name: str
+    self: float
+    cumulative: float
+
+
+def import_times(module: str) -> List[ImportTime]:
+    """
+    Measures imports of the module in a new interpreter (in the running one, everything is already imported).
+    :param module: e.g. "arcor2.nodes.server".
+    :return:
+    """
+
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, universal_newlines=True)
+
+    ret: List[ImportTime] = []
+
+    # import time: self [us] | cumulative | imported package
+    for line in proc.stderr.splitlines():
+
+        if not line.startswith("import time:"):
+            continue
+
+        try:
+            self_us, cumulative_us, name = line[len("import time:"):].split("|")
+            ret.append(ImportTime(name.strip(), int(self_us) / 1e6, int(cumulative_us) / 1e6))
+        except ValueError:  # header
+            continue
+
+    return ret
+
+
+def add_argument(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--profile-startup", help="Report durations of startup phases and of imports.",
+                        action="store_true", default=False)
+
+
+STARTUP = Phases()
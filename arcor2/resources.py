@@ -3,7 +3,6 @@
 
 
 import importlib
-import json
 import os
 from typing import Any, Dict, List, Optional, Type, TypeVar, Union
 
@@ -11,7 +10,7 @@ from dataclasses_jsonschema import JsonSchemaMixin, JsonSchemaValidationError
 
 import arcor2.object_types
 import arcor2.object_types_utils as otu
-from arcor2 import helpers as hlp, transformations as tr
+from arcor2 import codec, helpers as hlp, json_schema_cache, transformations as tr
 from arcor2 import settings
 from arcor2.action import print_event
 from arcor2.data.common import CurrentAction, Project, Scene
@@ -202,8 +201,8 @@ class ResourcesBase(IntResources):
 
             with open(os.path.join("data", file_name + ".json")) as scene_file:
 
-                data_dict = json.loads(scene_file.read())
-                data_dict = convert_keys(data_dict, hlp.camel_case_to_snake_case)
+                data_dict = codec.loads(scene_file.read())
+                data_dict = convert_keys(data_dict, hlp.camel_case_to_snake_case, cls)
 
                 return cls.from_dict(data_dict)
 
@@ -212,6 +211,10 @@ class ResourcesBase(IntResources):
 
     def __init__(self, project_id: str) -> None:
 
+        if settings.JSON_SCHEMA_CACHE and json_schema_cache.available():  # validators compiled by nodes
+            json_schema_cache.prepare_validators(settings.JSON_SCHEMA_CACHE_PATH, (Scene, Project, ObjectModel),
+                                                 compile_missing=False)
+
         scene = self.read_project_data(Scene.__name__.lower(), Scene)
         project = self.read_project_data(Project.__name__.lower(), Project)
 
@@ -1,7 +1,16 @@
+import asyncio
+import contextvars
+import dataclasses
 import functools
+import inspect
 import io
-import json
-from typing import Any, Callable, Dict, List, Optional, Sequence, Type, TypeVar, Union
+import os
+import re
+import time
+import typing
+import uuid
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Set, Tuple, Type, TypeVar, Union
+from urllib.parse import urlsplit
 
 from PIL import Image, UnidentifiedImageError  # type: ignore
 
@@ -9,6 +18,7 @@ from dataclasses_jsonschema import JsonSchemaMixin, ValidationError
 
 import requests
 
+from arcor2 import codec, metrics
 from arcor2.exceptions import Arcor2Exception
 from arcor2.helpers import camel_case_to_snake_case, snake_case_to_camel_case
 
@@ -17,9 +27,27 @@ class RestException(Arcor2Exception):
     pass
 
 
+class RestHttpException(RestException):
+    """
+    Service responded with an error status code.
+    """
+
+    def __init__(self, *args, status: int) -> None:
+        super().__init__(*args)
+        self.status = status
+
+
 TIMEOUT = (1.0, 20.0)  # connect, read
+CHUNK_SIZE = 64 * 1024  # for streamed responses
+
+# how many times a GET is repeated when the connection could not be established
+RETRIES = int(os.getenv("ARCOR2_REST_RETRIES", 1))
+
+# identifies requests of this process, the persistent storage reports it with changes (see arcor2.change_feed)
+WRITER_ID = uuid.uuid4().hex
+WRITER_HEADER = "X-Arcor2-Writer"
 
-HEADERS = {'accept': 'application/json', 'content-type': 'application/json'}
+HEADERS = {'accept': 'application/json', 'content-type': 'application/json', WRITER_HEADER: WRITER_ID}
 
 T = TypeVar('T', bound=JsonSchemaMixin)
 S = TypeVar('S', str, int, float, bool)
@@ -30,57 +58,285 @@ ParamsDict = Optional[Dict[str, Any]]
 SESSION = requests.session()
 
 
+class Instrumentation:
+    """
+    Receives measurements of REST calls. This one does nothing, assign an instance of a subclass
+    to INSTRUMENTATION in order to collect them.
+    """
+
+    def request(self, method: str, host: str, template: str, status: int, duration: float, sent: int,
+                received: int) -> None:
+        """
+        :param method:
+        :param host:
+        :param template: URL path with arguments replaced by their names, e.g. '/project/{project_id}'.
+        :param status: HTTP status code, 0 if there is no response.
+        :param duration: In seconds.
+        :param sent: Size of the request body in bytes.
+        :param received: Size of the response body in bytes.
+        :return:
+        """
+        pass
+
+    def retry(self, method: str, host: str, template: str) -> None:
+        pass
+
+    def validation(self, data_cls: str, duration: float, valid: bool) -> None:
+        pass
+
+
+class MetricsInstrumentation(Instrumentation):
+    """
+    Records measurements into arcor2.metrics registry.
+    """
+
+    def __init__(self, registry: metrics.Registry = metrics.REGISTRY) -> None:
+
+        endpoint = ("method", "host", "template")
+
+        self.requests = registry.counter("arcor2_rest_requests_total", "REST calls.", endpoint + ("status",))
+        self.latency = registry.histogram("arcor2_rest_request_seconds", "Duration of REST calls.", endpoint)
+        self.sent = registry.histogram("arcor2_rest_request_bytes", "Size of request bodies.", endpoint,
+                                       metrics.SIZE_BUCKETS)
+        self.received = registry.histogram("arcor2_rest_response_bytes", "Size of response bodies.", endpoint,
+                                           metrics.SIZE_BUCKETS)
+        self.retries = registry.counter("arcor2_rest_retries_total", "Repeated REST calls.", endpoint)
+        self.validation_time = registry.histogram("arcor2_rest_validation_seconds",
+                                                  "Time spent on validation of received data.", ("data_cls",))
+        self.validation_errors = registry.counter("arcor2_rest_validation_errors_total", "Invalid received data.",
+                                                  ("data_cls",))
+
+    def request(self, method: str, host: str, template: str, status: int, duration: float, sent: int,
+                received: int) -> None:
+
+        self.requests.labels(method, host, template, str(status)).inc()
+        self.latency.labels(method, host, template).observe(duration)
+        self.sent.labels(method, host, template).observe(sent)
+        self.received.labels(method, host, template).observe(received)
+
+    def retry(self, method: str, host: str, template: str) -> None:
+        self.retries.labels(method, host, template).inc()
+
+    def validation(self, data_cls: str, duration: float, valid: bool) -> None:
+
+        self.validation_time.labels(data_cls).observe(duration)
+        if not valid:
+            self.validation_errors.labels(data_cls).inc()
+
+
+INSTRUMENTATION: Instrumentation = MetricsInstrumentation()
+
+# values of arguments of the function wrapped by handle_exceptions -> argument names
+_URL_ARGS: contextvars.ContextVar[Dict[str, str]] = contextvars.ContextVar("_URL_ARGS", default={})
+
+_ID_SEGMENT = re.compile(r"^([0-9]+|[0-9a-fA-F]{32}|[0-9a-fA-F-]{36})$")
+
+
+def url_template(url: str) -> Tuple[str, str]:
+    """
+    Gets host and URL path template (to be used as a metric label).
+    :param url:
+    :return:
+    """
+
+    parts = urlsplit(url)
+    args = _URL_ARGS.get()
+
+    segments = []
+    for seg in parts.path.split("/"):
+        if seg in args:
+            seg = args[seg]
+        elif _ID_SEGMENT.match(seg):  # called without handle_exceptions, let's guess
+            seg = "{id}"
+        segments.append(seg)
+
+    return parts.netloc, "/".join(segments)
+
+
+def record_request(method: str, url: str, start: float, status: int, sent: int, received: int) -> None:
+
+    host, template = url_template(url)
+    INSTRUMENTATION.request(method, host, template, status, time.monotonic() - start, sent, received)
+
+
+def record_retry(method: str, url: str) -> None:
+    INSTRUMENTATION.retry(method, *url_template(url))
+
+
+def _url_args(sig: inspect.Signature, args: Sequence[Any], kwargs: Dict[str, Any]) -> Dict[str, str]:
+
+    try:
+        bound = sig.bind_partial(*args, **kwargs)
+    except TypeError:
+        return {}
+
+    return {str(value): f"{{{name}}}" for name, value in bound.arguments.items()
+            if isinstance(value, (str, int)) and not isinstance(value, bool)}
+
+
 def handle_exceptions(exception_type: Type[Arcor2Exception] = Arcor2Exception, message: Optional[str] = None):
+    """
+    Translates RestException into the given exception type. Works for both plain functions and coroutines.
+    Arguments of the function are used to get URL templates of its calls (see url_template).
+    """
+
+    def _translate(e: RestException) -> Arcor2Exception:
+
+        if message is not None:
+            return exception_type(message, str(e))
+        else:
+            return exception_type(e.message)
+
     def _handle_exceptions(func):
+
+        sig = inspect.signature(func)
+
+        if asyncio.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+
+                token = _URL_ARGS.set(_url_args(sig, args, kwargs))
+                try:
+                    return await func(*args, **kwargs)
+                except RestException as e:
+                    raise _translate(e) from e
+                finally:
+                    _URL_ARGS.reset(token)
+
+            return async_wrapper
+
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
 
+            token = _URL_ARGS.set(_url_args(sig, args, kwargs))
             try:
                 return func(*args, **kwargs)
             except RestException as e:
-                if message is not None:
-                    raise exception_type(message, str(e)) from e
-                else:
-                    raise exception_type(e.message) from e
+                raise _translate(e) from e
+            finally:
+                _URL_ARGS.reset(token)
 
         return wrapper
     return _handle_exceptions
 
 
-def convert_keys(d: Union[Dict, List], func: Callable[[str], str]) -> Union[Dict, List]:
+KEY_CACHE_SIZE = int(os.getenv("ARCOR2_REST_KEY_CACHE_SIZE", 4096))
+
+
+@functools.lru_cache(maxsize=None)
+def _memoized(func: Callable[[str], str]) -> Callable[[str], str]:
+    """
+    Bounded memo for keys not known in advance (e.g. keys of Dict fields).
+    """
+
+    return functools.lru_cache(maxsize=KEY_CACHE_SIZE)(func)
+
+
+def _nested_classes(type_: Any) -> Iterator[Type]:
+
+    if isinstance(type_, type) and dataclasses.is_dataclass(type_):
+        yield type_
+
+    for arg in typing.get_args(type_):
+        yield from _nested_classes(arg)
 
-    if isinstance(d, dict):
-        new_dict = {}
-        for k, v in d.items():
-            new_dict[func(k)] = convert_keys(v, func)
-        return new_dict
-    elif isinstance(d, list):
-        new_list: List[Any] = []
-        for dd in d:
-            new_list.append(convert_keys(dd, func))
-        return new_list
 
-    return d
+def _field_names(data_cls: Type, visited: Set[Type]) -> Iterator[str]:
+
+    if data_cls in visited:
+        return
+
+    visited.add(data_cls)
+
+    try:
+        hints = typing.get_type_hints(data_cls)
+    except (NameError, TypeError):  # unresolvable forward reference
+        hints = {}
+
+    for fld in dataclasses.fields(data_cls):
+        yield fld.name
+        for nested in _nested_classes(hints.get(fld.name, fld.type)):
+            yield from _field_names(nested, visited)
+
+
+@functools.lru_cache(maxsize=None)
+def key_mapping(data_cls: Type[JsonSchemaMixin], func: Callable[[str], str]) -> Dict[str, str]:
+    """
+    Precomputes conversion of all keys that might appear in the serialized data_cls (nested dataclasses included).
+    Both snake_case and camelCase variant of each field name is there, so the mapping works in any direction.
+    :param data_cls:
+    :param func:
+    :return:
+    """
+
+    mapping: Dict[str, str] = {}
+
+    for name in _field_names(data_cls, set()):
+        for key in (name, snake_case_to_camel_case(name)):
+            mapping[key] = func(key)
+
+    return mapping
+
+
+def convert_keys(d: Union[Dict, List], func: Callable[[str], str],
+                 data_cls: Optional[Type[JsonSchemaMixin]] = None) -> Union[Dict, List]:
+    """
+    Converts keys of (nested) dictionaries.
+    :param d:
+    :param func: Key conversion, e.g. camel_case_to_snake_case.
+    :param data_cls: Type of the data (if known), used to look up the keys instead of converting them one by one.
+    :return:
+    """
+
+    mapping = key_mapping(data_cls, func) if data_cls is not None else {}  # type: ignore
+    conv = _memoized(func)
+
+    def _convert(dd: Any) -> Any:
+
+        if isinstance(dd, dict):
+            return {(mapping[k] if k in mapping else conv(k)): _convert(v) for k, v in dd.items()}
+        elif isinstance(dd, list):
+            return [_convert(v) for v in dd]
+
+        return dd
+
+    return _convert(d)
+
+
+def response_exception(content: bytes, reason: str, status: int) -> RestHttpException:
+    """
+    Creates exception based on the body of an unsuccessful response.
+    :param content:
+    :param reason:
+    :param status: HTTP status code.
+    :return:
+    """
+
+    try:
+        resp_body = codec.loads(content)
+    except codec.DecodeError:
+        return RestHttpException(content.decode("utf-8"), reason, status=status)
+
+    try:
+        return RestHttpException(resp_body["message"], reason, status=status)
+    except (KeyError, TypeError):  # TypeError is for case when resp_body is just string
+        return RestHttpException(str(resp_body), reason, status=status)
 
 
 def handle_response(resp: requests.Response) -> None:
     try:
         resp.raise_for_status()
     except requests.exceptions.RequestException as e:
-
-        try:
-            resp_body = json.loads(resp.content)
-        except json.JSONDecodeError:
-            raise RestException(resp.content.decode("utf-8"), str(e)) from e
-
-        try:
-            raise RestException(resp_body["message"], str(e)) from e
-        except (KeyError, TypeError):  # TypeError is for case when resp_body is just string
-            raise RestException(str(resp_body), str(e)) from e
+        raise response_exception(resp.content, str(e), resp.status_code) from e
 
 
-def _send(url: str, op: Callable, data: OptionalData = None,
-          params: ParamsDict = None, get_response=False) -> Union[None, Dict, List]:
+def prepare_data(data: OptionalData = None) -> str:
+    """
+    Serializes request body (converts keys to camelCase).
+    :param data:
+    :return:
+    """
 
     if data:
         if isinstance(data, list):
@@ -89,119 +345,146 @@ def _send(url: str, op: Callable, data: OptionalData = None,
                 if isinstance(dd, str):
                     d.append(dd)  # type: ignore
                 else:
-                    d.append(convert_keys(dd.to_dict(), snake_case_to_camel_case))  # type: ignore
+                    d.append(convert_keys(dd.to_dict(), snake_case_to_camel_case, type(dd)))  # type: ignore
         else:
-            d = convert_keys(data.to_dict(), snake_case_to_camel_case)  # type: ignore
+            d = convert_keys(data.to_dict(), snake_case_to_camel_case, type(data))  # type: ignore
     else:
         d = {}  # type: ignore
 
+    return codec.dumps(d)
+
+
+def prepare_params(params: ParamsDict = None) -> Dict[str, Any]:
+
     if params:
-        params = convert_keys(params, snake_case_to_camel_case)  # type: ignore
-    else:
-        params = {}
+        return convert_keys(params, snake_case_to_camel_case)  # type: ignore
+    return {}
+
+
+def parse_json(text: str) -> Any:
 
     try:
-        resp = op(url, data=json.dumps(d), timeout=TIMEOUT, headers=HEADERS,
-                  params=params)
-    except requests.exceptions.RequestException as e:
-        raise RestException("Catastrophic system error.", str(e)) from e
+        return codec.loads(text)
+    except (codec.DecodeError, TypeError) as e:
+        raise RestException("Invalid JSON.", str(e)) from e
+
+
+def from_dict(data_cls: Type[T], data: Any) -> T:
+
+    start = time.monotonic()
 
+    try:
+        ret = data_cls.from_dict(data)
+    except ValidationError as e:
+        INSTRUMENTATION.validation(data_cls.__name__, time.monotonic() - start, False)
+        print(f'{data_cls.__name__}: validation error "{e}" while parsing "{data}".')
+        raise RestException("Invalid data.", str(e)) from e
+
+    INSTRUMENTATION.validation(data_cls.__name__, time.monotonic() - start, True)
+    return ret
+
+
+def _request(method: str, url: str, data: Any = None, **kwargs) -> requests.Response:
+    """
+    Sends the request (and records its measurements).
+    """
+
+    sent = len(data.encode()) if isinstance(data, str) else 0
+
+    for attempt in range(RETRIES + 1):
+
+        start = time.monotonic()
+
+        try:
+            resp = SESSION.request(method, url, data=data, timeout=TIMEOUT, headers=HEADERS, **kwargs)
+        except requests.exceptions.ConnectionError as e:
+            record_request(method, url, start, 0, sent, 0)
+            if method == "GET" and attempt < RETRIES:
+                record_retry(method, url)
+                continue
+            raise RestException("Catastrophic system error.", str(e)) from e
+        except requests.exceptions.RequestException as e:
+            record_request(method, url, start, 0, sent, 0)
+            raise RestException("Catastrophic system error.", str(e)) from e
+
+        received = int(resp.headers.get("content-length", 0)) if kwargs.get("stream") else len(resp.content)
+        record_request(method, url, start, resp.status_code, sent, received)
+        return resp
+
+    raise AssertionError("Unreachable.")
+
+
+def _send(url: str, method: str, data: OptionalData = None,
+          params: ParamsDict = None, get_response=False, data_cls: Optional[Type[T]] = None) -> Union[None, Dict, List]:
+
+    resp = _request(method, url, prepare_data(data), params=prepare_params(params))
     handle_response(resp)
 
     if not get_response:
         return None
 
-    try:
-        return convert_keys(json.loads(resp.text), camel_case_to_snake_case)
-    except (json.JSONDecodeError, TypeError) as e:
-        raise RestException("Invalid JSON.", str(e)) from e
+    return convert_keys(parse_json(resp.text), camel_case_to_snake_case, data_cls)
 
 
 def post(url: str, data: JsonSchemaMixin, params: ParamsDict = None):
-    _send(url, SESSION.post, data, params)
+    _send(url, "POST", data, params)
 
 
 def put_returning_primitive(url: str, desired_type: Type[S], data: OptionalData = None,
                             params: ParamsDict = None) -> S:
 
     try:
-        return desired_type(_send(url, SESSION.put, data, params, get_response=True))  # type: ignore
+        return desired_type(_send(url, "PUT", data, params, get_response=True))  # type: ignore
     except ValueError as e:
         raise RestException(e) from e
 
 
 def put(url: str, data: OptionalData = None, params: ParamsDict = None, data_cls: Type[T] = None) -> T:
-    ret = _send(url, SESSION.put, data, params, get_response=data_cls is not None)  # type: ignore
+    ret = _send(url, "PUT", data, params, get_response=data_cls is not None, data_cls=data_cls)  # type: ignore
 
     if not data_cls:
         return None  # type: ignore
 
-    try:
-        return data_cls.from_dict(ret)  # type: ignore
-    except ValidationError as e:
-        print(f'{data_cls.__name__}: validation error "{e}" while parsing "{data}".')
-        raise RestException("Invalid data.", str(e)) from e
+    return from_dict(data_cls, ret)
 
 
 def put_returning_list(url: str, data: OptionalData = None,
                        params: ParamsDict = None, data_cls: Type[T] = None) -> List[T]:
 
-    ret = _send(url, SESSION.put, data, params, get_response=data_cls is not None)  # type: ignore
+    ret = _send(url, "PUT", data, params, get_response=data_cls is not None, data_cls=data_cls)  # type: ignore
 
     if not data_cls:
         return []  # type: ignore
 
     assert isinstance(ret, list)
 
-    d = []
-    for dd in ret:
-        try:
-            d.append(data_cls.from_dict(dd))
-        except ValidationError as e:
-            print(f'{data_cls.__name__}: validation error "{e}" while parsing "{ret}".')
-            raise RestException("Invalid data.", str(e)) from e
-
-    return d
+    return [from_dict(data_cls, dd) for dd in ret]
 
 
 def delete(url: str):
+    handle_response(_request("DELETE", url))
 
-    try:
-        resp = SESSION.delete(url, timeout=TIMEOUT, headers=HEADERS)
-    except requests.exceptions.RequestException as e:
-        raise RestException("Catastrophic system error.", str(e)) from e
 
-    handle_response(resp)
-
-
-def get_data(url: str, body: Optional[JsonSchemaMixin] = None, params: ParamsDict = None) -> Union[Dict, List]:
+def get_data(url: str, body: Optional[JsonSchemaMixin] = None, params: ParamsDict = None,
+             data_cls: Optional[Type[T]] = None) -> Union[Dict, List]:
 
     data = _get(url, body, params)
 
     if not isinstance(data, (list, dict)):
         raise RestException("Invalid data, not list or dict.")
 
-    return convert_keys(data, camel_case_to_snake_case)
+    return convert_keys(data, camel_case_to_snake_case, data_cls)
 
 
-def _get_response(url: str, body: Optional[JsonSchemaMixin] = None, params: ParamsDict = None) -> requests.Response:
+def _get_response(url: str, body: Optional[JsonSchemaMixin] = None, params: ParamsDict = None,
+                  stream: bool = False) -> requests.Response:
 
     if body is None:
         body_dict = {}  # type: ignore
     else:
         body_dict = body.to_dict()
 
-    if params:
-        params = convert_keys(params, snake_case_to_camel_case)  # type: ignore
-    else:
-        params = {}
-
-    try:
-        resp = SESSION.get(url, timeout=TIMEOUT, data=body_dict, params=params, allow_redirects=True,
-                           headers=HEADERS)
-    except requests.exceptions.RequestException as e:
-        raise RestException("Catastrophic system error.", str(e)) from e
-
+    resp = _request("GET", url, data=body_dict, params=prepare_params(params), allow_redirects=True, stream=stream)
     handle_response(resp)
 
     return resp
@@ -209,12 +492,7 @@ def _get_response(url: str, body: Optional[JsonSchemaMixin] = None, params: Para
 
 def _get(url: str, body: Optional[JsonSchemaMixin] = None, params: ParamsDict = None) -> Any:
 
-    resp = _get_response(url, body, params)
-
-    try:
-        return json.loads(resp.text)
-    except (json.JSONDecodeError, TypeError) as e:
-        raise RestException("Invalid JSON.", str(e)) from e
+    return parse_json(_get_response(url, body, params).text)
 
 
 def get_image(url: str) -> Image.Image:
@@ -239,18 +517,9 @@ def get_primitive(url: str, desired_type: Type[S], body: Optional[JsonSchemaMixi
 
 def get_list(url: str, data_cls: Type[T], body: Optional[JsonSchemaMixin] = None, params: ParamsDict = None) -> List[T]:
 
-    data = get_data(url, body, params)
+    data = get_data(url, body, params, data_cls)
 
-    ret: List[T] = []
-
-    for val in data:
-        try:
-            ret.append(data_cls.from_dict(val))
-        except ValidationError as e:
-            print(f'{data_cls.__name__}: validation error "{e}" while parsing "{data}".')
-            raise RestException("Invalid data.", str(e)) from e
-
-    return ret
+    return [from_dict(data_cls, val) for val in data]
 
 
 def get_list_primitive(url: str, desired_type: Type[S], body: Optional[JsonSchemaMixin] = None,
@@ -268,19 +537,29 @@ def get_list_primitive(url: str, desired_type: Type[S], body: Optional[JsonSchem
 
 def get(url: str, data_cls: Type[T], body: Optional[JsonSchemaMixin] = None, params: ParamsDict = None) -> T:
 
-    data = get_data(url, body, params)
+    data = get_data(url, body, params, data_cls)
 
     assert isinstance(data, dict)
 
-    try:
-        return data_cls.from_dict(data)
-    except ValidationError as e:
-        raise RestException("Invalid data.", str(e)) from e
+    return from_dict(data_cls, data)
 
 
-def download(url: str, path: str, body: Optional[JsonSchemaMixin] = None, params: ParamsDict = None) -> None:
+def iter_content(url: str, body: Optional[JsonSchemaMixin] = None, params: ParamsDict = None,
+                 chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    Streams the response body, so it does not have to be held in memory at once.
+    """
+
     # TODO check content type
+    with _get_response(url, body, params, stream=True) as resp:
+        try:
+            yield from resp.iter_content(chunk_size)
+        except requests.exceptions.RequestException as e:
+            raise RestException("Catastrophic system error.", str(e)) from e
+
+
+def download(url: str, path: str, body: Optional[JsonSchemaMixin] = None, params: ParamsDict = None) -> None:
 
-    r = _get_response(url, body, params)
     with open(path, 'wb') as file:
-        file.write(r.content)
+        for chunk in iter_content(url, body, params):
+            file.write(chunk)
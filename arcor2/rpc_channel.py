@@ -0,0 +1,181 @@
+"""
+Multiplexed RPC client for communication between nodes (ARServer -> Execution).
+
+Each request is sent directly by its caller (under an id unique within the connection, as ids of requests
+of different UIs might collide) and the caller waits for a future resolved by the reader of incoming messages.
+Pending requests fail when they time out or when the connection is lost. The connection is re-established
+with an exponential backoff.
+"""
+
+import asyncio
+import itertools
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+import websockets
+
+from arcor2 import metrics, wire
+from arcor2.data.rpc.common import Request, Response
+from arcor2.exceptions import Arcor2Exception
+
+RTT = metrics.REGISTRY.histogram("arcor2_rpc_channel_seconds", "Round-trip time of RPCs sent to another node.",
+                                 ("request",))
+FAILURES = metrics.REGISTRY.counter("arcor2_rpc_channel_failures_total", "RPCs sent to another node without response.",
+                                    ("request", "reason"))
+PENDING = metrics.REGISTRY.gauge("arcor2_rpc_channel_pending", "RPCs sent to another node waiting for response.")
+
+
+class RpcChannelException(Arcor2Exception):
+    pass
+
+
+class Channel:
+
+    def __init__(self, timeout: float = 30.0, reconnect_delay: float = 0.5, reconnect_max_delay: float = 10.0) -> None:
+        """
+        :param timeout: Default deadline of a request (including waiting for the connection).
+        :param reconnect_delay: Delay after the first failed connection attempt, it is doubled with each next one.
+        :param reconnect_max_delay:
+        """
+
+        self.timeout = timeout
+        self.reconnect_delay = reconnect_delay
+        self.reconnect_max_delay = reconnect_max_delay
+
+        self._ids = itertools.count(1)
+        self._websocket: Optional[Any] = None
+        self._connected = asyncio.Event()
+        self._pending: Dict[int, Tuple[str, "asyncio.Future[Response]"]] = {}
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    async def request(self, req: Request, timeout: Optional[float] = None) -> Response:
+        """
+        Sends the request and waits for the response.
+        :param req:
+        :param timeout: Overrides the default deadline.
+        :return: Response with the id of the request.
+        """
+
+        loop = asyncio.get_event_loop()
+        deadline = loop.time() + (self.timeout if timeout is None else timeout)
+
+        if not self._connected.is_set():
+            try:
+                await asyncio.wait_for(self._connected.wait(), deadline - loop.time())
+            except asyncio.TimeoutError:
+                FAILURES.labels(req.request, "unavailable").inc()
+                raise RpcChannelException("Not connected.")
+
+        websocket = self._websocket
+        assert websocket is not None
+
+        channel_id = next(self._ids)
+        future: "asyncio.Future[Response]" = loop.create_future()
+        self._pending[channel_id] = req.request, future
+        PENDING.labels().inc()
+
+        data = req.to_dict()
+        data["id"] = channel_id
+        start = time.monotonic()
+
+        try:
+            await websocket.send(wire.encode(data, wire.encoding(websocket)))
+            resp = await asyncio.wait_for(future, deadline - loop.time())
+        except asyncio.TimeoutError:
+            FAILURES.labels(req.request, "timeout").inc()
+            raise RpcChannelException(f"No response to {req.request} in time.")
+        except websockets.exceptions.ConnectionClosed:
+            FAILURES.labels(req.request, "disconnect").inc()
+            raise RpcChannelException("Connection closed.")
+        except RpcChannelException:
+            FAILURES.labels(req.request, "disconnect").inc()
+            raise
+        finally:
+            del self._pending[channel_id]
+            PENDING.labels().dec()
+
+        RTT.labels(req.request).observe(time.monotonic() - start)
+
+        resp.id = req.id
+        return resp
+
+    def resolve(self, resp: Response) -> bool:
+        """
+        Passes the response to its caller.
+        :param resp: Response with the id used within the connection.
+        :return: False if nobody waits for the response (e.g. it came too late).
+        """
+
+        try:
+            _, future = self._pending[resp.id]
+        except KeyError:
+            return False
+
+        if future.done():
+            return False
+
+        future.set_result(resp)
+        return True
+
+    def reject(self, channel_id: int, e: Exception) -> bool:
+
+        try:
+            _, future = self._pending[channel_id]
+        except KeyError:
+            return False
+
+        if future.done():
+            return False
+
+        future.set_exception(e)
+        return True
+
+    def connected(self, websocket: Any) -> None:
+
+        self._websocket = websocket
+        self._connected.set()
+
+    def disconnected(self) -> None:
+
+        self._connected.clear()
+        self._websocket = None
+
+        for channel_id in list(self._pending):
+            self.reject(channel_id, RpcChannelException("Connection lost."))
+
+    async def run(self, url: str, handle_incoming_messages: Callable[[Any], Awaitable[None]], logger: Any) -> None:
+        """
+        Keeps the channel connected.
+        :param url:
+        :param handle_incoming_messages: Reads messages (and resolves responses) until the connection is closed.
+        :param logger:
+        :return:
+        """
+
+        delay = self.reconnect_delay
+
+        while True:
+
+            await logger.info(f"Attempting connection to {url}...")
+
+            try:
+                async with websockets.connect(url, subprotocols=wire.SUBPROTOCOLS,
+                                              compression=wire.COMPRESSION) as websocket:
+
+                    await logger.info(f"Connected to {url}.")
+                    delay = self.reconnect_delay
+                    self.connected(websocket)
+
+                    try:
+                        await handle_incoming_messages(websocket)
+                    finally:
+                        self.disconnected()
+
+            except (OSError, websockets.exceptions.InvalidHandshake) as e:
+                await logger.error(e)
+
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.reconnect_max_delay)
@@ -0,0 +1,81 @@
+"""
+Metrics of RPCs processed by helpers.server (used by both ARServer and Execution).
+"""
+
+import time
+from collections import defaultdict
+from typing import DefaultDict, Dict, Tuple
+
+from arcor2 import metrics
+from arcor2.data.metrics import RpcStats, ServerStats
+
+STARTED = time.monotonic()
+
+# phases of RPC processing
+DECODE = "decode"  # parsing and construction of the request
+HANDLER = "handler"
+ENCODE = "encode"  # construction and encoding of the response
+SEND = "send"
+
+PHASES = (DECODE, HANDLER, ENCODE, SEND)
+
+REQUESTS = metrics.REGISTRY.counter("arcor2_rpc_requests_total", "Processed RPCs.", ("request",))
+ERRORS = metrics.REGISTRY.counter("arcor2_rpc_errors_total", "RPCs with negative result.", ("request",))
+IN_FLIGHT = metrics.REGISTRY.gauge("arcor2_rpc_in_flight", "RPCs being processed.", ("request",))
+SECONDS = metrics.REGISTRY.histogram("arcor2_rpc_seconds", "Duration of RPC processing phases.", ("request", "phase"))
+INVALID = metrics.REGISTRY.counter("arcor2_rpc_invalid_messages_total", "Messages that can't be processed.")
+CLIENTS = metrics.REGISTRY.gauge("arcor2_ws_clients", "Connected websocket clients.")
+
+
+def record(request: str, result: bool, decode: float, handler: float, encode: float, send: float) -> None:
+
+    REQUESTS.labels(request).inc()
+
+    if not result:
+        ERRORS.labels(request).inc()
+
+    for phase, duration in zip(PHASES, (decode, handler, encode, send)):
+        SECONDS.labels(request, phase).observe(duration)
+
+
+def server_stats() -> ServerStats:
+    """
+    Summary of RPC metrics (with mean durations of phases).
+    :return:
+    """
+
+    stats: Dict[str, RpcStats] = {}
+
+    def get(request: str) -> RpcStats:
+        try:
+            return stats[request]
+        except KeyError:
+            return stats.setdefault(request, RpcStats(request))
+
+    for sample in REQUESTS.collect().samples:
+        get(sample.labels["request"]).count = int(sample.value)
+
+    for sample in ERRORS.collect().samples:
+        get(sample.labels["request"]).errors = int(sample.value)
+
+    for sample in IN_FLIGHT.collect().samples:
+        get(sample.labels["request"]).in_flight = int(sample.value)
+
+    sums: DefaultDict[Tuple[str, str], float] = defaultdict(float)
+    counts: DefaultDict[Tuple[str, str], float] = defaultdict(float)
+
+    for sample in SECONDS.collect().samples:
+        key = sample.labels["request"], sample.labels["phase"]
+        if sample.name.endswith("_sum"):
+            sums[key] = sample.value
+        elif sample.name.endswith("_count"):
+            counts[key] = sample.value
+
+    for (request, phase), count in counts.items():
+        if count:
+            setattr(get(request), phase, sums[(request, phase)] / count)
+
+    clients = CLIENTS.collect().samples
+
+    return ServerStats(time.monotonic() - STARTED, int(clients[0].value) if clients else 0,
+                       sorted(stats.values(), key=lambda st: st.request))
@@ -0,0 +1,128 @@
+"""
+Bounded outbound queue per websocket client, so a slow client does not hold back the others.
+"""
+
+import asyncio
+import os
+from collections import deque
+from dataclasses import dataclass
+from enum import Enum
+from typing import Any, Deque, Hashable, Optional
+
+from websockets.exceptions import ConnectionClosed
+
+from arcor2 import metrics
+
+MAX_SIZE = int(os.getenv("ARCOR2_SEND_QUEUE_SIZE", 64))
+
+QUEUE_DEPTH = metrics.REGISTRY.gauge("arcor2_ws_send_queue_depth", "Messages waiting to be sent (all clients).")
+DROPPED = metrics.REGISTRY.counter("arcor2_ws_send_dropped_total", "Messages not sent to a slow client.", ("policy",))
+DISCONNECTED = metrics.REGISTRY.counter("arcor2_ws_slow_client_disconnects_total",
+                                        "Clients disconnected because of a full send queue.")
+
+
+class SendPolicy(Enum):
+    """
+    What to do with a message when the client falls behind.
+    """
+
+    # streams: when the queue is full, the oldest queued message with the same key is dropped
+    # (a message of other policy may evict the oldest stream message of any key, instead of disconnecting)
+    DROP_OLDEST = "drop_oldest"
+    COALESCE = "coalesce"  # state: a queued message with the same key is replaced by the newer one
+    DISCONNECT = "disconnect"  # everything else: the client is disconnected when the queue is full
+
+
+@dataclass
+class _Item:
+
+    message: Any  # already encoded
+    policy: SendPolicy
+    key: Optional[Hashable]
+
+
+class SendQueue:
+    """
+    Messages are sent in the order they were put, by a task of the queue.
+    Coalesced message is moved to the end of the queue, so it does not overtake messages put before it.
+    """
+
+    def __init__(self, client: Any, max_size: int = MAX_SIZE) -> None:
+
+        self.client = client
+        self.max_size = max_size
+        self.closed = False
+
+        self._items: Deque[_Item] = deque()
+        self._ready = asyncio.Event()
+        self._task = asyncio.ensure_future(self._send_loop())
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def put(self, message: Any, policy: SendPolicy = SendPolicy.DISCONNECT, key: Optional[Hashable] = None) -> None:
+
+        if self.closed:
+            return
+
+        if policy == SendPolicy.COALESCE and key is not None:
+            for item in self._items:
+                if item.key == key:
+                    self._remove(item)
+                    DROPPED.labels(SendPolicy.COALESCE.value).inc()
+                    break
+
+        if len(self._items) >= self.max_size:
+
+            oldest = next((item for item in self._items if item.policy == SendPolicy.DROP_OLDEST and
+                           (policy != SendPolicy.DROP_OLDEST or item.key == key)), None)
+
+            if oldest is not None:
+                self._remove(oldest)
+                DROPPED.labels(SendPolicy.DROP_OLDEST.value).inc()
+            elif policy == SendPolicy.DROP_OLDEST:  # the new message is the oldest one of its key
+                DROPPED.labels(SendPolicy.DROP_OLDEST.value).inc()
+                return
+            else:
+                DISCONNECTED.labels().inc()
+                self.close()
+                asyncio.ensure_future(self.client.close(code=1008, reason="Client too slow."))
+                return
+
+        self._items.append(_Item(message, policy, key))
+        QUEUE_DEPTH.labels().inc()
+        self._ready.set()
+
+    def close(self) -> None:
+
+        if self.closed:
+            return
+
+        self.closed = True
+        QUEUE_DEPTH.labels().dec(len(self._items))
+        self._items.clear()
+
+        if self._task is not asyncio.current_task():
+            self._task.cancel()
+
+    def _remove(self, item: _Item) -> None:
+
+        self._items.remove(item)
+        QUEUE_DEPTH.labels().dec()
+
+    async def _send_loop(self) -> None:
+
+        while not self.closed:
+
+            if not self._items:
+                self._ready.clear()
+                await self._ready.wait()
+                continue
+
+            item = self._items.popleft()
+            QUEUE_DEPTH.labels().dec()
+
+            try:
+                await self.client.send(item.message)
+            except ConnectionClosed:
+                self.close()
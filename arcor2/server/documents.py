@@ -0,0 +1,290 @@
+"""
+Revisions of the opened scene and project, so UIs caching them could get deltas instead of complete documents.
+
+A UI opts in by connecting with the 'deltas' query parameter and might list revisions it has cached,
+e.g. ws://server:6789/?deltas&revision=<scene revision>&revision=<project revision>.
+Such UI then gets OpenScene/OpenProject without documents it already has (preceded by SceneDelta/ProjectDelta
+when its revision is older) and deltas after every change. When a delta can't be applied, the UI should
+call GetSnapshot.
+"""
+
+import functools
+import hashlib
+import os
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Set, Tuple, Type, TypeVar, Union
+
+from websockets.server import WebSocketServerProtocol as WsClient
+
+from arcor2 import codec, json_patch, wire
+from arcor2.data import events
+from arcor2.data.common import Project, Scene
+from arcor2.data.rpc.project import SnapshotData
+from arcor2.server import globals as glob, notifications as notif
+from arcor2.server.helpers import connection_options
+
+HISTORY = int(os.getenv("ARCOR2_DOCUMENT_HISTORY", 8))  # revisions kept for computing deltas
+
+# clients receiving deltas -> revisions they have
+CLIENTS: Dict[WsClient, Set[str]] = {}
+
+F = TypeVar('F')
+
+
+def revision(data: Dict[str, Any]) -> str:
+    return hashlib.sha1(codec.dumps_bytes(data)).hexdigest()
+
+
+class Document:
+    """
+    Recent revisions of one document (scene or project).
+    """
+
+    def __init__(self, history: int = HISTORY) -> None:
+
+        self.id: Optional[str] = None
+        self.history = history
+        self._snapshots: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+    @property
+    def revision(self) -> Optional[str]:
+        return next(reversed(self._snapshots), None)
+
+    def update(self, doc: Union[None, Scene, Project]) -> Optional[events.DocumentDelta]:
+        """
+        Takes a snapshot of the document.
+        :param doc:
+        :return: Delta from the previous revision if the document has changed.
+        """
+
+        if doc is None or doc.id != self.id:
+            self._snapshots.clear()
+            self.id = None if doc is None else doc.id
+
+        if doc is None:
+            return None
+
+        data = doc.to_dict()
+        rev = revision(data)
+        base = self.revision
+
+        if rev == base:
+            return None
+
+        self._snapshots.pop(rev, None)  # the document might return to some previous state
+        self._snapshots[rev] = data
+
+        while len(self._snapshots) > self.history:
+            self._snapshots.popitem(last=False)
+
+        if base is None:
+            return None
+
+        return self.delta(base)
+
+    def delta(self, base: str) -> Optional[events.DocumentDelta]:
+        """
+        :param base:
+        :return: Delta from the base revision to the current one, None if the base revision is not known.
+        """
+
+        assert self.id
+
+        current = self.revision
+
+        if current is None or base not in self._snapshots:
+            return None
+
+        patch = [events.PatchOperation(events.PatchOperation.OpEnum(op["op"]), op["path"], op.get("value"))
+                 for op in json_patch.diff(self._snapshots[base], self._snapshots[current])]
+
+        return events.DocumentDelta(self.id, base, current, patch)
+
+    def latest(self, revisions: Set[str]) -> Optional[str]:
+        """
+        :param revisions:
+        :return: The most recent of given revisions that is known.
+        """
+
+        return next((rev for rev in reversed(self._snapshots) if rev in revisions), None)
+
+
+SCENE = Document()
+PROJECT = Document()
+
+
+def add_client(interface: WsClient) -> None:
+    """
+    Registers the client for deltas if it asked for them (when connecting).
+    :param interface:
+    :return:
+    """
+
+    query = connection_options(interface)
+
+    if "deltas" in query:
+        CLIENTS[interface] = set(query.get("revision", []))
+
+
+def remove_client(interface: WsClient) -> None:
+    CLIENTS.pop(interface, None)
+
+
+def _update() -> Tuple[Optional[events.DocumentDelta], Optional[events.DocumentDelta]]:
+    return SCENE.update(glob.SCENE), PROJECT.update(glob.PROJECT)
+
+
+def _broadcast(scene_delta: Optional[events.DocumentDelta], project_delta: Optional[events.DocumentDelta]) -> None:
+
+    for delta, event_cls in ((scene_delta, events.SceneDelta), (project_delta, events.ProjectDelta)):
+
+        if delta is None or not CLIENTS:
+            continue
+
+        # clients without the base revision (e.g. just registering) could not apply the delta
+        recipients = [intf for intf, revisions in CLIENTS.items() if delta.base_revision in revisions]
+
+        if not recipients:
+            continue
+
+        evt = event_cls(data=delta)
+        notif.broadcast_message(wire.Message(evt.to_dict()), evt.event, recipients)
+
+        for intf in recipients:
+            CLIENTS[intf].discard(delta.base_revision)
+            CLIENTS[intf].add(delta.revision)
+
+
+def publish() -> None:
+    """
+    Sends deltas of the scene/project (changed since the last call) to the registered clients.
+    :return:
+    """
+
+    if CLIENTS:
+        _broadcast(*_update())
+
+
+def publishing(coro: F) -> F:
+    """
+    Publishes deltas after the (RPC) callback.
+    :param coro:
+    :return:
+    """
+
+    @functools.wraps(coro)  # type: ignore
+    async def wrapper(*args, **kwargs):
+
+        try:
+            return await coro(*args, **kwargs)  # type: ignore
+        finally:
+            publish()
+
+    return wrapper  # type: ignore
+
+
+def _for_client(doc: Document, revisions: Set[str], evts: List[events.Event],
+                delta_cls: Type[events.Event]) -> bool:
+    """
+    Finds out whether the client has to get the complete document. If not, it might get a delta.
+    """
+
+    current = doc.revision
+    assert current
+
+    base = doc.latest(revisions)
+    revisions.add(current)
+
+    if base is None:
+        return True
+
+    if base != current:
+        evts.append(delta_cls(data=doc.delta(base)))  # type: ignore
+        revisions.discard(base)
+
+    return False
+
+
+def open_events(interface: WsClient) -> List[events.Event]:
+    """
+    Events telling the client which scene/project is opened.
+    :param interface:
+    :return:
+    """
+
+    if interface not in CLIENTS:
+
+        if glob.PROJECT:
+            assert glob.SCENE
+            return [events.OpenProject(data=events.OpenProjectData(glob.SCENE, glob.PROJECT))]
+        if glob.SCENE:
+            return [events.OpenScene(data=events.OpenSceneData(glob.SCENE))]
+        return []
+
+    _broadcast(*_update())
+
+    revisions = CLIENTS[interface]
+    evts: List[events.Event] = []
+
+    if glob.SCENE:
+        send_scene = _for_client(SCENE, revisions, evts, events.SceneDelta)
+
+    if glob.PROJECT:
+
+        assert glob.SCENE
+        send_project = _for_client(PROJECT, revisions, evts, events.ProjectDelta)
+
+        evts.append(events.OpenProject(data=events.OpenProjectData(
+            glob.SCENE if send_scene else None, glob.PROJECT if send_project else None,
+            SCENE.revision, PROJECT.revision)))
+
+    elif glob.SCENE:
+        evts.append(events.OpenScene(data=events.OpenSceneData(glob.SCENE if send_scene else None, SCENE.revision)))
+
+    return evts
+
+
+async def send_open(interface: WsClient) -> None:
+
+    for evt in open_events(interface):
+        await notif.event(interface, evt)
+
+
+async def broadcast_open() -> None:
+    """
+    Sends OpenProject/OpenScene to all clients, the complete one is encoded just once.
+    :return:
+    """
+
+    full: Optional[wire.Message] = None
+
+    for intf in glob.INTERFACES:
+
+        if intf in CLIENTS:
+            await send_open(intf)
+            continue
+
+        evts = open_events(intf)
+
+        if not evts:
+            continue
+
+        if full is None:
+            full = wire.Message(evts[0].to_dict())
+
+        notif.send(intf, full, evts[0].event)
+
+
+def snapshot(interface: WsClient) -> SnapshotData:
+    """
+    Complete scene/project with their revisions.
+    :param interface:
+    :return:
+    """
+
+    _broadcast(*_update())
+
+    if interface in CLIENTS:
+        CLIENTS[interface].update(rev for rev in (SCENE.revision, PROJECT.revision) if rev)
+
+    return SnapshotData(glob.SCENE, glob.PROJECT, SCENE.revision, PROJECT.revision)
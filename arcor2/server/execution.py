@@ -1,27 +1,23 @@
 import asyncio
 import base64
 import os
-import tempfile
 import uuid
-from typing import Dict, Optional, TYPE_CHECKING
+from typing import Any, Awaitable, Callable, Optional
 
-import websockets
 from websockets.server import WebSocketServerProtocol as WsClient
 
-from arcor2 import helpers as hlp, rest
-from arcor2.data import common, events, rpc
+from arcor2 import aio_rest
+from arcor2.data import common, rpc
 from arcor2.exceptions import Arcor2Exception
-from arcor2.server import events as server_events, globals as glob, notifications as notif, project
+from arcor2.nodes import UPLOAD_CHUNK_SIZE
+from arcor2.rpc_channel import Channel
+from arcor2.server import documents, events as server_events, globals as glob, project
 
-if TYPE_CHECKING:
-    ReqQueue = asyncio.Queue[rpc.common.Request]
-    RespQueue = asyncio.Queue[rpc.common.Response]
-else:
-    ReqQueue = asyncio.Queue
-    RespQueue = asyncio.Queue
+RPC_TIMEOUT = float(os.getenv("ARCOR2_EXECUTION_RPC_TIMEOUT", 30.0))  # seconds (including waiting for connection)
+RECONNECT_DELAY = float(os.getenv("ARCOR2_EXECUTION_RECONNECT_DELAY", 0.5))  # the first one, then doubled
+RECONNECT_MAX_DELAY = float(os.getenv("ARCOR2_EXECUTION_RECONNECT_MAX_DELAY", 10.0))
 
-MANAGER_RPC_REQUEST_QUEUE: ReqQueue = ReqQueue()
-MANAGER_RPC_RESPONSES: Dict[int, RespQueue] = {}
+MANAGER = Channel(RPC_TIMEOUT, RECONNECT_DELAY, RECONNECT_MAX_DELAY)
 
 
 async def run_temp_package(package_id: str) -> None:
@@ -52,8 +48,7 @@ async def run_temp_package(package_id: str) -> None:
     assert glob.SCENE
     assert glob.PROJECT
 
-    asyncio.ensure_future(notif.broadcast_event(events.OpenProject(data=events.OpenProjectData(glob.SCENE,
-                                                                                               glob.PROJECT))))
+    asyncio.ensure_future(documents.broadcast_open())
 
 
 async def build_and_upload_package(project_id: str, package_name: str) -> str:
@@ -66,72 +61,33 @@ async def build_and_upload_package(project_id: str, package_name: str) -> str:
 
     package_id = common.uid()
 
-    # call build service
-    # TODO store data in memory
-    with tempfile.TemporaryDirectory() as tmpdirname:
-        path = os.path.join(tmpdirname, "publish.zip")
+    async def upload_chunk(seq: int, chunk: bytes, last: bool = False) -> None:
 
-        await hlp.run_in_executor(rest.download, f"{glob.BUILDER_URL}/project/{project_id}/publish", path,
-                                  None, {"package_name": package_name})
+        exe_req = rpc.execution.UploadPackageChunkRequest(
+            uuid.uuid4().int,
+            args=rpc.execution.UploadPackageChunkArgs(package_id, seq, base64.b64encode(chunk).decode(), last))
+        exe_resp = await manager_request(exe_req)
 
-        with open(path, "rb") as zip_file:
-            b64_bytes = base64.b64encode(zip_file.read())
-            b64_str = b64_bytes.decode()
+        if not exe_resp.result:
+            if not exe_resp.messages:
+                raise Arcor2Exception("Upload to the Execution unit failed.")
+            raise Arcor2Exception("\n".join(exe_resp.messages))
 
-    # send data to execution service
-    exe_req = rpc.execution.UploadPackageRequest(uuid.uuid4().int,
-                                                 args=rpc.execution.UploadPackageArgs(package_id, b64_str))
-    exe_resp = await manager_request(exe_req)
+    # package is passed from the build service to the execution service as it goes, chunk by chunk
+    seq = 0
+    async for chunk in aio_rest.stream(f"{glob.BUILDER_URL}/project/{project_id}/publish",
+                                       {"package_name": package_name}, UPLOAD_CHUNK_SIZE):
+        await upload_chunk(seq, chunk)
+        seq += 1
 
-    if not exe_resp.result:
-        if not exe_resp.messages:
-            raise Arcor2Exception("Upload to the Execution unit failed.")
-        raise Arcor2Exception("\n".join(exe_resp.messages))
+    await upload_chunk(seq, b"", last=True)
 
     return package_id
 
 
 async def manager_request(req: rpc.common.Request, ui: Optional[WsClient] = None) -> rpc.common.Response:
+    return await MANAGER.request(req)
 
-    assert req.id not in MANAGER_RPC_RESPONSES
-
-    MANAGER_RPC_RESPONSES[req.id] = RespQueue(maxsize=1)
-    await MANAGER_RPC_REQUEST_QUEUE.put(req)
-
-    resp = await MANAGER_RPC_RESPONSES[req.id].get()
-    del MANAGER_RPC_RESPONSES[req.id]
-    return resp
-
-
-async def project_manager_client(handle_manager_incoming_messages) -> None:
-
-    while True:
-
-        await glob.logger.info("Attempting connection to manager...")
-
-        try:
-
-            async with websockets.connect(glob.MANAGER_URL) as manager_client:
-
-                await glob.logger.info("Connected to manager.")
-
-                future = asyncio.ensure_future(handle_manager_incoming_messages(manager_client))
-
-                while True:
-
-                    if future.done():
-                        break
-
-                    try:
-                        msg = await asyncio.wait_for(MANAGER_RPC_REQUEST_QUEUE.get(), 1.0)
-                    except asyncio.TimeoutError:
-                        continue
 
-                    try:
-                        await manager_client.send(msg.to_json())
-                    except websockets.exceptions.ConnectionClosed:
-                        await MANAGER_RPC_REQUEST_QUEUE.put(msg)
-                        break
-        except ConnectionRefusedError as e:
-            await glob.logger.error(e)
-            await asyncio.sleep(delay=1.0)
+async def project_manager_client(handle_manager_incoming_messages: Callable[[Any], Awaitable[None]]) -> None:
+    await MANAGER.run(glob.MANAGER_URL, handle_manager_incoming_messages, glob.logger)
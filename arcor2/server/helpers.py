@@ -1,4 +1,5 @@
-from typing import Set
+from typing import Any, Dict, List, Set
+from urllib.parse import parse_qs, urlparse
 
 from arcor2.exceptions import Arcor2Exception
 
@@ -10,3 +11,13 @@ def unique_name(name: str, existing_names: Set[str]) -> None:
 
     if name in existing_names:
         raise Arcor2Exception("Name already exists.")
+
+
+def connection_options(interface: Any) -> Dict[str, List[str]]:
+    """
+    Options a UI asked for when connecting, e.g. ws://server:6789/?deltas&batch.
+    :param interface:
+    :return: Query parameters of the connection path.
+    """
+
+    return parse_qs(urlparse(getattr(interface, "path", "") or "").query, keep_blank_values=True)
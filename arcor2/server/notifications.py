@@ -1,20 +1,251 @@
 import asyncio
-from typing import Optional
+import functools
+import os
+import time
+from contextvars import ContextVar
+from typing import Any, Coroutine, Dict, Hashable, Iterable, List, Optional, Set, Tuple, TypeVar, Union
 
 from websockets.server import WebSocketServerProtocol
 
-from arcor2 import helpers as hlp
+from arcor2 import helpers as hlp, wire
 from arcor2.data import events
+from arcor2.send_queue import SendPolicy, SendQueue
 from arcor2.server import globals as glob
+from arcor2.server.helpers import connection_options
+
+QUEUES: Dict[WebSocketServerProtocol, SendQueue] = {}
+
+# clients that connected with the 'batch' query parameter get events emitted during an RPC as one message
+# (see events.EventBatch)
+BATCH_CLIENTS: Set[WebSocketServerProtocol] = set()
+
+# how long to wait for tasks created by the callback, events emitted by them afterwards are sent separately
+BATCH_TIMEOUT = float(os.getenv("ARCOR2_EVENT_BATCH_TIMEOUT", 1.0))
+
+F = TypeVar('F')
+
+# how to handle events when a client falls behind (the default is to disconnect it)
+POLICIES: Dict[str, SendPolicy] = {
+    events.RobotJointsEvent.event: SendPolicy.DROP_OLDEST,
+    events.RobotEefEvent.event: SendPolicy.DROP_OLDEST,
+    events.PackageStateEvent.event: SendPolicy.COALESCE,
+    events.PackageInfoEvent.event: SendPolicy.COALESCE,
+    events.ActionStateEvent.event: SendPolicy.COALESCE,
+    events.CurrentActionEvent.event: SendPolicy.COALESCE
+}
+
+
+class _Batch:
+
+    def __init__(self) -> None:
+
+        self.closed = False
+        self.items: Dict[WebSocketServerProtocol, List[Tuple[wire.Message, str, Optional[Hashable]]]] = {}
+        self.tasks: Set[asyncio.Future] = set()  # created within the batch (see _task_factory)
+
+    async def wait_for_tasks(self, timeout: float) -> None:
+        """
+        Waits for tasks created within the batch, including the ones created by those tasks.
+        """
+
+        deadline = time.monotonic() + timeout
+
+        while True:
+
+            pending = {task for task in self.tasks if not task.done()}
+            remaining = deadline - time.monotonic()
+
+            if not pending or remaining <= 0:
+                return
+
+            await asyncio.wait(pending, timeout=remaining)
+
+    def flush(self) -> None:
+
+        self.closed = True
+        envelopes: Dict[Tuple[int, ...], wire.Message] = {}  # clients usually get the same events
+
+        for interface, items in self.items.items():
+
+            if len(items) == 1:
+                _send(interface, *items[0])
+                continue
+
+            key = tuple(id(message) for message, _, _ in items)
+
+            try:
+                envelope = envelopes[key]
+            except KeyError:
+                # events are already serialized, so the envelope is assembled directly (not by EventBatch.to_dict)
+                envelope = envelopes[key] = wire.Message({"event": events.EventBatch.event,
+                                                          "data": [message.data for message, _, _ in items]})
+
+            _send(interface, envelope, events.EventBatch.event)
+
+
+_BATCH: ContextVar[Optional[_Batch]] = ContextVar("_BATCH", default=None)
+
+
+def _task_factory(loop: asyncio.AbstractEventLoop, coro: Coroutine, **kwargs: Any) -> asyncio.Future:
+    """
+    Tasks created within a batch are tracked, so the batch can wait for events they emit.
+    """
+
+    task = asyncio.Task(coro, loop=loop, **kwargs)
+    batch = _BATCH.get()
+
+    if batch is not None and not batch.closed:
+        batch.tasks.add(task)
+
+    return task
+
+
+def background(coro: Coroutine[Any, Any, Any]) -> asyncio.Task:
+    """
+    Runs a long-running coroutine (e.g. robot movement) as a task that is not part of the current batch,
+    so the callback's events do not wait for it. Its events are sent separately.
+    :param coro:
+    :return:
+    """
+
+    token = _BATCH.set(None)
+
+    try:
+        return asyncio.create_task(coro)
+    finally:
+        _BATCH.reset(token)
+
+
+def batching(coro: F) -> F:
+    """
+    Events emitted by the (RPC) callback are sent as one message to clients that asked for it.
+    That includes events emitted by tasks created by the callback (and their tasks), if they finish within
+    BATCH_TIMEOUT. Long-running tasks should be created using background().
+    :param coro:
+    :return:
+    """
+
+    @functools.wraps(coro)  # type: ignore
+    async def wrapper(*args, **kwargs):
+
+        if not BATCH_CLIENTS:
+            return await coro(*args, **kwargs)  # type: ignore
+
+        loop = asyncio.get_event_loop()
+
+        if loop.get_task_factory() is None:
+            loop.set_task_factory(_task_factory)  # type: ignore
+
+        batch = _Batch()
+        token = _BATCH.set(batch)
+
+        try:
+            return await coro(*args, **kwargs)  # type: ignore
+        finally:
+            _BATCH.reset(token)
+            await batch.wait_for_tasks(BATCH_TIMEOUT)  # events are often broadcast from tasks created by the callback
+            batch.flush()
+
+    return wrapper  # type: ignore
+
+
+def add_client(interface: WebSocketServerProtocol) -> None:
+
+    QUEUES[interface] = SendQueue(interface)
+
+    if "batch" in connection_options(interface):
+        BATCH_CLIENTS.add(interface)
+
+
+def remove_client(interface: WebSocketServerProtocol) -> None:
+
+    BATCH_CLIENTS.discard(interface)
+    queue = QUEUES.pop(interface, None)
+    if queue is not None:
+        queue.close()
+
+
+def send(interface: WebSocketServerProtocol, message: Union[str, wire.Message], event_name: str,
+         key: Optional[Hashable] = None) -> None:
+    """
+    Puts event into the client's send queue, encoded as negotiated for the client.
+    :param interface:
+    :param message: Message or already encoded JSON.
+    :param event_name: Determines the policy applied when the client falls behind.
+    :param key: Messages with the same key replace each other (see SendPolicy), event_name by default.
+    :return:
+    """
+
+    if isinstance(message, str):
+        message = wire.Message(encoded=message)
+
+    batch = _BATCH.get()
+
+    if batch is not None and not batch.closed and interface in BATCH_CLIENTS:
+        batch.items.setdefault(interface, []).append((message, event_name, key))
+        return
+
+    _send(interface, message, event_name, key)
+
+
+def _send(interface: WebSocketServerProtocol, message: wire.Message, event_name: str,
+          key: Optional[Hashable] = None) -> None:
+
+    encoded = message.encode(wire.encoding(interface))
+
+    try:
+        queue = QUEUES[interface]
+    except KeyError:  # not registered client
+        asyncio.ensure_future(hlp.send_json_to_client(interface, encoded))
+        return
+
+    queue.put(encoded, POLICIES.get(event_name, SendPolicy.DISCONNECT), event_name if key is None else key)
+
+
+async def send_response(interface: WebSocketServerProtocol, encoded: wire.Encoded) -> None:
+    """
+    RPC response goes through the client's queue (it is never dropped), so it does not overtake events
+    emitted by the callback before it returned.
+    :param interface:
+    :param encoded:
+    :return:
+    """
+
+    try:
+        queue = QUEUES[interface]
+    except KeyError:  # not registered client
+        await hlp.send_json_to_client(interface, encoded)
+        return
+
+    queue.put(encoded)
+
+
+def broadcast_message(message: Union[str, wire.Message], event_name: str,
+                      interfaces: Optional[Iterable[WebSocketServerProtocol]] = None,
+                      exclude_ui: Optional[WebSocketServerProtocol] = None, key: Optional[Hashable] = None) -> None:
+    """
+    Sends event to many clients, it is encoded once per encoding.
+    :param message: Message or already encoded JSON.
+    :param event_name:
+    :param interfaces: All connected clients by default.
+    :param exclude_ui:
+    :param key: See send().
+    :return:
+    """
+
+    if isinstance(message, str):
+        message = wire.Message(encoded=message)
+
+    for intf in (glob.INTERFACES if interfaces is None else interfaces):
+        if intf != exclude_ui:
+            send(intf, message, event_name, key)
 
 
 async def broadcast_event(event: events.Event, exclude_ui: Optional[WebSocketServerProtocol] = None) -> None:
 
     if (exclude_ui is None and glob.INTERFACES) or (exclude_ui and len(glob.INTERFACES) > 1):
-        message = event.to_json()
-        await asyncio.gather(*[hlp.send_json_to_client(intf, message)
-                               for intf in glob.INTERFACES if intf != exclude_ui])
+        broadcast_message(wire.Message(event.to_dict()), event.event, exclude_ui=exclude_ui)
 
 
 async def event(interface: WebSocketServerProtocol, event: events.Event) -> None:
-    await hlp.send_json_to_client(interface, event.to_json())
+    send(interface, wire.Message(event.to_dict()), event.event)
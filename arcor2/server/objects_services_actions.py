@@ -2,24 +2,32 @@
 # -*- coding: utf-8 -*-
 
 import asyncio
+import functools
 import shutil
-from typing import Any, Callable, Dict, Optional, Type, Union
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set, Tuple, Type, TypeVar, Union
 
 import arcor2.helpers as hlp
 from arcor2 import aio_persistent_storage as storage
 from arcor2 import object_types_utils as otu, service_types_utils as stu
 from arcor2.data import events
-from arcor2.data.object_type import ObjectActionsDict, ObjectModel, ObjectTypeMeta, ObjectTypeMetaDict
-from arcor2.data.services import ServiceTypeMeta, ServiceTypeMetaDict
+from arcor2.data.common import StorageChange
+from arcor2.data.object_type import MetaModel3d, ObjectActions, ObjectActionsDict, ObjectModel, ObjectType, \
+    ObjectTypeMeta, ObjectTypeMetaDict
+from arcor2.data.services import ServiceType, ServiceTypeMeta, ServiceTypeMetaDict
 from arcor2.exceptions import Arcor2Exception
 from arcor2.object_types import Generic
 from arcor2.object_types import Robot
 from arcor2.parameter_plugins import TYPE_TO_PLUGIN
+from arcor2.parameter_plugins.base import TypesDict
+from arcor2.profiling import STARTUP
 from arcor2.server import globals as glob, settings
 from arcor2.server import notifications as notif
 from arcor2.server.robot import get_robot_meta
 from arcor2.services.robot_service import RobotService
 from arcor2.services.service import Service
+from arcor2.type_registry import TYPES
+
+WARM_UP_INTERVAL = 0.01  # seconds between types processed by the background computation of actions
 
 
 def find_robot_service() -> Optional[RobotService]:
@@ -57,40 +65,90 @@ def valid_service_types() -> ServiceTypeMetaDict:
     return {srv_type: srv for srv_type, srv in glob.SERVICE_TYPES.items() if not srv.disabled}
 
 
+S = TypeVar('S')
+R = TypeVar('R')
+
+
+async def _compile(compile_type: Callable[[S], R], types: Sequence[S]) -> List[Union[R, BaseException]]:
+    """
+    Processes sources of types (exec, meta data, actions...) concurrently in the executor,
+    so the event loop is not blocked meanwhile.
+    :param compile_type:
+    :param types:
+    :return: Results in the same order as types, exceptions are returned instead of being raised.
+    """
+
+    return await asyncio.gather(*[hlp.run_in_executor(compile_type, type_) for type_ in types],
+                                return_exceptions=True)
+
+
+def _service_type(srv_type: ServiceType) -> Tuple[Type[Service], ServiceTypeMeta]:
+
+    type_def = TYPES.type_def(srv_type.id, srv_type.source, Service)
+    return type_def, stu.meta_from_def(type_def)
+
+
+def _object_type(obj: ObjectType) -> Tuple[Type[Generic], ObjectTypeMeta]:
+
+    compiled = TYPES.get(obj.id, obj.source, Generic)
+    return compiled.type_def, compiled.meta()
+
+
+CompiledObjectTypes = List[Tuple[ObjectType, Union[Tuple[Type[Generic], ObjectTypeMeta], BaseException]]]
+
+
+async def compile_object_types() -> CompiledObjectTypes:
+    """
+    Fetches and compiles all object types (does not depend on services).
+    :return:
+    """
+
+    obj_ids = await storage.get_object_type_ids()
+    obj_types = await storage.get_object_types([obj_id.id for obj_id in obj_ids.items])
+    return list(zip(obj_types, await _compile(_object_type, obj_types)))
+
+
 async def get_service_types() -> None:
 
     service_types: ServiceTypeMetaDict = {}
 
     srv_ids = await storage.get_service_type_ids()
+    await _resolve_service_types(await storage.get_service_types([srv_id.id for srv_id in srv_ids.items]),
+                                 service_types, glob.TYPE_DEF_DICT)
 
-    # TODO do it in parallel
-    for srv_id in srv_ids.items:
+    glob.SERVICE_TYPES = service_types
 
-        srv_type = await storage.get_service_type(srv_id.id)
 
-        try:
-            type_def = hlp.type_def_from_source(srv_type.source, srv_type.id, Service)
-            meta = stu.meta_from_def(type_def)
-            service_types[srv_id.id] = meta
-        except Arcor2Exception as e:
+async def _resolve_service_types(srv_types: List[ServiceType], service_types: ServiceTypeMetaDict,
+                                 type_defs: TypesDict) -> None:
+    """
+    Adds compiled service types to service_types and their definitions to type_defs.
+    """
+
+    for srv_type, res in zip(srv_types, await _compile(_service_type, srv_types)):
+
+        if isinstance(res, Arcor2Exception):
             await glob.logger.warning(f"Disabling service type {srv_type.id}.")
-            await glob.logger.debug(e, exc_info=True)
-            service_types[srv_id.id] = ServiceTypeMeta(srv_id.id, "Service not available.", disabled=True,
-                                                       problem=e.message)
+            await glob.logger.debug(res, exc_info=res)
+            service_types[srv_type.id] = ServiceTypeMeta(srv_type.id, "Service not available.", disabled=True,
+                                                         problem=res.message)
             continue
+        elif isinstance(res, BaseException):
+            raise res
+
+        type_def, meta = res
+        service_types[srv_type.id] = meta
 
         if not meta.configuration_ids:
             meta.disabled = True
             meta.problem = "No configuration available."
             continue
 
-        glob.TYPE_DEF_DICT[srv_id.id] = type_def
+        type_defs[srv_type.id] = type_def
 
         if issubclass(type_def, RobotService):
             asyncio.ensure_future(get_robot_meta(type_def, srv_type.source))
 
-    glob.SERVICE_TYPES = service_types
-
 
 def handle_robot_urdf(robot: Type[Robot]) -> None:
 
@@ -100,29 +158,47 @@ def handle_robot_urdf(robot: Type[Robot]) -> None:
     shutil.copy(robot.urdf_package_path, settings.URDF_PATH)
 
 
-async def get_object_types() -> None:
+async def get_object_types(compiled: Optional[CompiledObjectTypes] = None) -> None:
+    """
+    Resolves object types, service types have to be known already (objects might depend on them).
+    :param compiled: Result of compile_object_types() if already available.
+    :return:
+    """
 
     object_types: ObjectTypeMetaDict = otu.built_in_types_meta()
 
-    obj_ids = await storage.get_object_type_ids()
+    if compiled is None:
+        compiled = await compile_object_types()
 
-    # TODO do it in parallel
-    for obj_id in obj_ids.items:
-        obj = await storage.get_object_type(obj_id.id)
-        try:
-            type_def = hlp.type_def_from_source(obj.source, obj.id, Generic)
-            meta = otu.meta_from_def(type_def)
-            object_types[obj.id] = meta
-        except (otu.ObjectTypeException, hlp.TypeDefException) as e:
+    await _resolve_object_types(compiled, object_types, glob.TYPE_DEF_DICT, glob.SERVICE_TYPES)
+    glob.OBJECT_TYPES = object_types
+
+
+async def _resolve_object_types(compiled: CompiledObjectTypes, object_types: ObjectTypeMetaDict,
+                                type_defs: TypesDict, service_types: ServiceTypeMetaDict) -> None:
+    """
+    Adds compiled object types to object_types (which has to contain their bases) and their definitions to type_defs.
+    """
+
+    with_model: Dict[str, MetaModel3d] = {}
+
+    for obj, res in compiled:
+
+        if isinstance(res, (otu.ObjectTypeException, hlp.TypeDefException)):
             await glob.logger.warning(f"Disabling object type {obj.id}.")
-            await glob.logger.debug(e, exc_info=True)
-            object_types[obj.id] = ObjectTypeMeta(obj_id.id, "Object type disabled.", disabled=True,
-                                                  problem=e.message)
+            await glob.logger.debug(res, exc_info=res)
+            object_types[obj.id] = ObjectTypeMeta(obj.id, "Object type disabled.", disabled=True,
+                                                  problem=res.message)
             continue
+        elif isinstance(res, BaseException):
+            raise res
+
+        type_def, meta = res
+        object_types[obj.id] = meta
 
         for srv in meta.needs_services:
             try:
-                if glob.SERVICE_TYPES[srv].disabled:
+                if service_types[srv].disabled:
                     meta.disabled = True
                     meta.problem = f"Depends on disabled service '{srv}'."
                     break
@@ -131,17 +207,19 @@ async def get_object_types() -> None:
                 meta.problem = f"Depends on unknown service '{srv}'."
                 break
 
-        glob.TYPE_DEF_DICT[obj.id] = type_def
+        type_defs[obj.id] = type_def
 
         if obj.model:
-            model = await storage.get_model(obj.model.id, obj.model.type)
-            kwargs = {model.type().value.lower(): model}
-            object_types[obj.id].object_model = ObjectModel(model.type(), **kwargs)  # type: ignore
+            with_model[obj.id] = obj.model
 
         if issubclass(type_def, Robot):
             asyncio.ensure_future(get_robot_meta(type_def, obj.source))
             asyncio.ensure_future(hlp.run_in_executor(handle_robot_urdf, type_def))
 
+    for obj_type_id, model in zip(with_model, await storage.get_models(list(with_model.values()))):
+        kwargs = {model.type().value.lower(): model}
+        object_types[obj_type_id].object_model = ObjectModel(model.type(), **kwargs)  # type: ignore
+
     # if description is missing, try to get it from ancestor(s)
     for obj_type, obj_meta in object_types.items():
         if obj_meta.description:
@@ -152,50 +230,328 @@ async def get_object_types() -> None:
         except otu.DataError as e:
             await glob.logger.error(f"Failed to get info from base for {obj_type}, error: '{e}'.")
 
-    glob.OBJECT_TYPES = object_types
 
+def _actions(type_: Union[ObjectType, ServiceType]) -> ObjectActions:
+    return TYPES.get(type_.id, type_.source, Service if isinstance(type_, ServiceType) else Generic).actions()
+
+
+async def _stored_types() -> Tuple[List[ObjectType], List[ServiceType]]:
+    """
+    :return: Valid db-stored (user-created) object types and services.
+    """
+
+    return await asyncio.gather(
+        storage.get_object_types([obj_type for obj_type, obj in valid_object_types().items() if not obj.built_in]),
+        storage.get_service_types([service_type for service_type, service_meta in valid_service_types().items()
+                                   if not service_meta.built_in]))
+
+
+def _built_in_actions(type_def: Type) -> ObjectActions:
+    return TYPES.built_in(type_def).actions()
+
+
+def _log_actions_error(type_name: str, e: Arcor2Exception) -> None:
+    asyncio.ensure_future(glob.logger.error(f"Failed to get actions of {type_name}: {e.message}"))
+
+
+async def _warm_up_actions(actions: otu.LazyActions) -> None:
+    """
+    Computes actions of the remaining types one by one, giving way to other tasks.
+    :param actions:
+    :return:
+    """
+
+    for type_name in actions.pending:
+
+        await asyncio.sleep(WARM_UP_INTERVAL)
 
-async def get_object_actions() -> None:  # TODO do it in parallel
+        if glob.ACTIONS is not actions:  # types were reloaded meanwhile
+            return
 
-    global ACTIONS
+        actions.get(type_name)
 
-    object_actions_dict: ObjectActionsDict = otu.built_in_types_actions(TYPE_TO_PLUGIN)
+
+async def get_object_actions() -> None:
+
+    if settings.LAZY_ACTIONS:
+
+        obj_types, srv_types = await _stored_types()
+
+        compute: Dict[str, Callable[[], ObjectActions]] = {}
+
+        for type_name, type_def in (*otu.built_in_types(), *stu.built_in_services()):
+            compute[type_name] = functools.partial(_built_in_actions, type_def)
+
+        stored_types: List[Union[ObjectType, ServiceType]] = [*obj_types, *srv_types]
+
+        for stored_type in stored_types:
+            compute[stored_type.id] = functools.partial(_actions, stored_type)
+
+        lazy_actions = otu.LazyActions(compute, glob.OBJECT_TYPES, _log_actions_error)
+        glob.ACTIONS = lazy_actions
+        asyncio.ensure_future(_warm_up_actions(lazy_actions))
+        return
+
+    # built-in object types / services
+    object_actions_dict: ObjectActionsDict = {}
+
+    for type_name, type_def in (*otu.built_in_types(), *stu.built_in_services()):
+        object_actions_dict[type_name] = _built_in_actions(type_def)
 
     valid_types = valid_object_types()
 
-    for obj_type, obj in valid_types.items():
+    # db-stored (user-created) object types and services, built-in types are already there
+    obj_types, srv_types = await _stored_types()
 
-        if obj.built_in:  # built-in types are already there
+    for obj_db, res in zip(obj_types, await _compile(_actions, obj_types)):
+
+        if isinstance(res, hlp.TypeDefException):
+            await glob.logger.error(res)
             continue
+        elif isinstance(res, BaseException):
+            raise res
 
-        # db-stored (user-created) object types
-        obj_db = await storage.get_object_type(obj_type)
-        try:
-            type_def = hlp.type_def_from_source(obj_db.source, obj_db.id, Generic)
-            object_actions_dict[obj_type] = otu.object_actions(TYPE_TO_PLUGIN, type_def, obj_db.source)
-        except hlp.TypeDefException as e:
-            await glob.logger.error(e)
+        object_actions_dict[obj_db.id] = res
 
     # add actions from ancestors
     for obj_type in valid_types.keys():
         otu.add_ancestor_actions(obj_type, object_actions_dict, glob.OBJECT_TYPES)
 
     # get services' actions
-    for service_type, service_meta in valid_service_types().items():
+    for srv_type, res in zip(srv_types, await _compile(_actions, srv_types)):
 
-        if service_meta.built_in:
+        if isinstance(res, Arcor2Exception):
+            await glob.logger.exception(f"Error while processing service type {srv_type.id}", exc_info=res)
             continue
+        elif isinstance(res, BaseException):
+            raise res
 
-        srv_type = await storage.get_service_type(service_type)
-        try:
-            srv_type_def = hlp.type_def_from_source(srv_type.source, service_type, Service)
-            object_actions_dict[service_type] = otu.object_actions(TYPE_TO_PLUGIN, srv_type_def, srv_type.source)
-        except Arcor2Exception:
-            await glob.logger.exception(f"Error while processing service type {service_type}")
+        object_actions_dict[srv_type.id] = res
 
     glob.ACTIONS = object_actions_dict
 
 
+async def load_types() -> None:
+    """
+    Loads all types at startup. Object types are fetched and compiled while service types are being loaded,
+    but they are resolved afterwards as objects might depend on services.
+    :return:
+    """
+
+    async def timed_compile_object_types() -> CompiledObjectTypes:
+        with STARTUP.phase("object types (fetch, compile)"):
+            return await compile_object_types()
+
+    compiled_objects = asyncio.ensure_future(timed_compile_object_types())
+
+    try:
+        with STARTUP.phase("service types"):
+            await get_service_types()
+    except BaseException:
+        compiled_objects.cancel()
+        raise
+
+    with STARTUP.phase("object types (resolve)"):
+        await get_object_types(await compiled_objects)
+
+    with STARTUP.phase("actions"):
+        await get_object_actions()
+
+    await gc_metadata_cache()
+
+
+async def gc_metadata_cache() -> None:
+
+    removed = await hlp.run_in_executor(TYPES.gc)
+
+    if removed:
+        await glob.logger.debug(f"Removed {removed} stale entries of the metadata cache.")
+
+
+RELOAD_LOCK = asyncio.Lock()
+
+
+def _forget_actions(type_name: str) -> None:
+
+    try:
+        del glob.ACTIONS[type_name]  # pop() would compute lazy actions first
+    except KeyError:
+        pass
+
+
+async def _reload_service_types(changed_services: Set[str], type_defs: TypesDict,
+                                actions: ObjectActionsDict) -> ServiceTypeMetaDict:
+    """
+    Processes again just the changed service types (removed ones are left out).
+    Globals are not modified, new definitions and actions are added to type_defs and actions.
+    :param changed_services:
+    :param type_defs:
+    :param actions:
+    :return: Updated copy of glob.SERVICE_TYPES.
+    """
+
+    service_types = {srv_type: meta for srv_type, meta in glob.SERVICE_TYPES.items()
+                     if srv_type not in changed_services}
+
+    for srv_type in changed_services:
+        TYPES.forget(srv_type)
+
+    srv_ids = await storage.get_service_type_ids()
+    srv_types = await storage.get_service_types([srv_id.id for srv_id in srv_ids.items
+                                                 if srv_id.id in changed_services])
+
+    await _resolve_service_types(srv_types, service_types, type_defs)
+
+    valid_srv_types = [srv_type for srv_type in srv_types if not service_types[srv_type.id].disabled]
+
+    for srv_type, res in zip(valid_srv_types, await _compile(_actions, valid_srv_types)):
+
+        if isinstance(res, Arcor2Exception):
+            await glob.logger.exception(f"Error while processing service type {srv_type.id}", exc_info=res)
+            continue
+        elif isinstance(res, BaseException):
+            raise res
+
+        actions[srv_type.id] = res
+
+    return service_types
+
+
+async def _reload_object_types(affected: Set[str], derived: Set[str], service_types: ServiceTypeMetaDict,
+                               type_defs: TypesDict, actions: ObjectActionsDict) -> ObjectTypeMetaDict:
+    """
+    Processes again just the affected object types (removed ones are left out).
+    Globals are not modified, new definitions and actions are added to type_defs and actions.
+    :param affected: Changed object types, their descendants and types depending on changed services.
+    :param derived: Types with unchanged source but changed ancestor(s), their cached metadata are invalid.
+    :param service_types: Service types the object types will be used with.
+    :param type_defs:
+    :param actions:
+    :return: Updated copy of glob.OBJECT_TYPES.
+    """
+
+    object_types = {obj_type: meta for obj_type, meta in glob.OBJECT_TYPES.items() if obj_type not in affected}
+
+    for obj_type in affected:
+        TYPES.forget(obj_type, cached=obj_type in derived)
+
+    obj_ids = await storage.get_object_type_ids()
+    obj_types = await storage.get_object_types([obj_id.id for obj_id in obj_ids.items if obj_id.id in affected])
+
+    await _resolve_object_types(list(zip(obj_types, await _compile(_object_type, obj_types))), object_types,
+                                type_defs, service_types)
+
+    valid_obj_types = {obj.id: obj for obj in obj_types if not object_types[obj.id].disabled}
+    graph = otu.TypeGraph(object_types)
+    ordered = [valid_obj_types[obj_type] for obj_type in graph.ordered(valid_obj_types)]
+
+    # bases are processed first, so their actions already contain actions of their ancestors
+    for obj, res in zip(ordered, await _compile(_actions, ordered)):
+
+        if isinstance(res, hlp.TypeDefException):
+            await glob.logger.error(res)
+            continue
+        elif isinstance(res, BaseException):
+            raise res
+
+        base = object_types[obj.id].base
+
+        if base:
+            try:
+                # actions of an affected base in glob.ACTIONS are outdated
+                otu.add_base_actions(res, base, actions[base] if base in affected else glob.ACTIONS[base])
+            except KeyError:
+                pass
+
+        actions[obj.id] = res
+
+    return object_types
+
+
+def _replace_types(outdated: Set[str], service_types: ServiceTypeMetaDict, object_types: ObjectTypeMetaDict,
+                   type_defs: TypesDict, actions: ObjectActionsDict) -> None:
+    """
+    Replaces reloaded types in globals at once (there must not be any await), so handlers never see a partial state.
+    :param outdated: Types that were processed again (their new definitions and actions might be missing).
+    :return:
+    """
+
+    for type_id in outdated:
+        glob.TYPE_DEF_DICT.pop(type_id, None)
+        _forget_actions(type_id)
+
+    glob.TYPE_DEF_DICT.update(type_defs)
+    glob.ACTIONS.update(actions)
+    glob.SERVICE_TYPES = service_types
+    glob.OBJECT_TYPES = object_types
+
+    if isinstance(glob.ACTIONS, otu.LazyActions):
+        glob.ACTIONS.object_types = object_types
+
+
+async def reload_types(changes: List[StorageChange]) -> None:
+    """
+    Reloads types when some of them were changed in the storage by someone else and notifies UIs.
+    Only changed types, types derived from them and types depending on changed services are processed again.
+    :param changes:
+    :return:
+    """
+
+    changed_objects = {change.id for change in changes if change.kind == StorageChange.KindEnum.OBJECT_TYPE}
+    changed_services = {change.id for change in changes if change.kind == StorageChange.KindEnum.SERVICE_TYPE}
+
+    if not changed_objects and not changed_services:
+        return
+
+    async with RELOAD_LOCK:
+
+        old_types = glob.OBJECT_TYPES
+        graph = otu.TypeGraph(old_types)
+        affected = graph.affected(changed_objects, changed_services) - otu.built_in_types_names()
+        derived = graph.descendants(changed_objects) - changed_objects
+
+        type_defs: TypesDict = {}
+        actions: ObjectActionsDict = {}
+        service_types = glob.SERVICE_TYPES
+        new_types = old_types
+
+        if changed_services:
+            service_types = await _reload_service_types(changed_services, type_defs, actions)
+
+        if affected:
+            new_types = await _reload_object_types(affected, derived, service_types, type_defs, actions)
+
+        _replace_types(changed_services | affected, service_types, new_types, type_defs, actions)
+
+        await gc_metadata_cache()
+
+    added = [new_types[obj_type] for obj_type in affected if obj_type in new_types and obj_type not in old_types]
+    removed = [old_types[obj_type] for obj_type in affected if obj_type in old_types and obj_type not in new_types]
+    updated = [new_types[obj_type] for obj_type in affected if obj_type in old_types and obj_type in new_types]
+
+    for evt_type, data in ((events.EventType.ADD, added), (events.EventType.REMOVE, removed),
+                           (events.EventType.UPDATE, updated)):
+        if data:
+            asyncio.ensure_future(notif.broadcast_event(events.ChangedObjectTypesEvent(evt_type, data=data)))
+
+
+async def reload_all_types() -> None:
+    """
+    Reloads all types (known to us or to the storage), e.g. when the storage lost track of changes.
+    :return:
+    """
+
+    obj_ids, srv_ids = await asyncio.gather(storage.get_object_type_ids(), storage.get_service_type_ids())
+    kinds = StorageChange.KindEnum
+
+    changes = [StorageChange(0, kinds.OBJECT_TYPE, obj_type)
+               for obj_type in set(glob.OBJECT_TYPES) | {obj_id.id for obj_id in obj_ids.items}]
+    changes.extend(StorageChange(0, kinds.SERVICE_TYPE, srv_type)
+                   for srv_type in set(glob.SERVICE_TYPES) | {srv_id.id for srv_id in srv_ids.items})
+
+    await reload_types(changes)
+
+
 async def get_robot_instance(robot_id: str, end_effector_id: Optional[str] = None) -> Union[Robot, RobotService]:
 
     if robot_id in glob.SCENE_OBJECT_INSTANCES:
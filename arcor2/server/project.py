@@ -44,7 +44,7 @@ async def scene_object_pose_updated(scene_id: str, obj_id: str) -> None:
             await glob.logger.debug(f"Invalidating joints for {project.name}/{ap.name}.")
             ap.invalidate_joints()
 
-        await storage.update_project(project)
+        storage.update_project_later(project)
 
 
 async def remove_object_references_from_projects(obj_id: str) -> None:
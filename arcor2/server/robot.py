@@ -2,17 +2,17 @@ import inspect
 import os
 from typing import List, Optional, Set, Type, Union
 
-from horast import parse
-
 from typed_ast.ast3 import AST
 
 import arcor2.helpers as hlp
 from arcor2.data import common, events, robot
+from arcor2.data.helpers import from_dict
 from arcor2.exceptions import Arcor2Exception
 from arcor2.object_types import Generic, Robot
 from arcor2.server import globals as glob, notifications as notif, objects_services_actions as osa
 from arcor2.services.robot_service import RobotService
 from arcor2.source.utils import function_implemented
+from arcor2.type_registry import TYPES
 
 
 class RobotPoseException(Arcor2Exception):
@@ -135,15 +135,11 @@ def feature(tree: AST, robot_type: Union[Type[Robot], Type[RobotService]], func_
         raise Arcor2Exception("Unknown robot type.")
 
 
-async def get_robot_meta(robot_type: Union[Type[Robot], Type[RobotService]], source: str) -> None:
-
-    # TODO use inspect.getsource(robot_type) instead of source parameters
-    #  once we will get rid of type_def_from_source / temp. module
+def _robot_meta(robot_type: Union[Type[Robot], Type[RobotService]], tree: AST) -> robot.RobotMeta:
 
     meta = robot.RobotMeta(robot_type.__name__)
     meta.features.focus = hasattr(robot_type, "focus")  # TODO more sophisticated test? (attr(s) and return value?)
 
-    tree = parse(source)
     meta.features.move_to_pose = feature(tree, robot_type, Robot.move_to_pose.__name__)
     meta.features.move_to_joints = feature(tree, robot_type, Robot.move_to_joints.__name__)
     meta.features.stop = feature(tree, robot_type, Robot.stop.__name__)
@@ -151,7 +147,19 @@ async def get_robot_meta(robot_type: Union[Type[Robot], Type[RobotService]], sou
     if issubclass(robot_type, Robot) and robot_type.urdf_package_path:
         meta.urdf_package_filename = os.path.split(robot_type.urdf_package_path)[1]
 
-    glob.ROBOT_META[robot_type.__name__] = meta
+    return meta
+
+
+async def get_robot_meta(robot_type: Union[Type[Robot], Type[RobotService]], source: str) -> None:
+
+    # TODO use inspect.getsource(robot_type) instead of source parameters
+    #  once we will get rid of type_def_from_source / temp. module
+
+    compiled = TYPES.get(robot_type.__name__, source, RobotService if issubclass(robot_type, RobotService) else Robot)
+
+    glob.ROBOT_META[robot_type.__name__] = await hlp.run_in_executor(
+        compiled.cached, "robot", lambda: _robot_meta(robot_type, compiled.tree), lambda meta: meta.to_dict(),
+        lambda data: from_dict(robot.RobotMeta, data, validate=False))
 
 
 async def stop(robot_id: str) -> None:
@@ -1,10 +1,8 @@
-import asyncio
-
 from websockets.server import WebSocketServerProtocol as WsClient
 
 from arcor2.data import rpc
 from arcor2.exceptions import Arcor2Exception
-from arcor2.server import decorators, globals as glob
+from arcor2.server import decorators, globals as glob, notifications as notif
 from arcor2.server.execution import build_and_upload_package, run_temp_package
 
 
@@ -35,5 +33,5 @@ async def temporary_package_cb(req: rpc.execution.TemporaryPackageRequest, ui: W
     package_id = await build_and_upload_package(glob.PROJECT.id,
                                                 f"Temporary package for project '{glob.PROJECT.name}'.")
 
-    asyncio.ensure_future(run_temp_package(package_id))
+    notif.background(run_temp_package(package_id))
     return None
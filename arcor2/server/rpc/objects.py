@@ -14,13 +14,13 @@ from arcor2.data.common import Pose, Position, Scene
 from arcor2.data.object_type import MeshFocusAction, Model3dType
 from arcor2.exceptions import Arcor2Exception
 from arcor2.object_types import Generic
-from arcor2.parameter_plugins import TYPE_TO_PLUGIN
 from arcor2.server import globals as glob, notifications as notif, objects_services_actions as osa
 from arcor2.server.decorators import no_project, scene_needed
 from arcor2.server.project import scene_object_pose_updated
 from arcor2.server.robot import get_end_effector_pose
 from arcor2.server.scene import scenes
 from arcor2.source.object_types import new_object_type_source
+from arcor2.type_registry import TYPES
 
 FOCUS_OBJECT: Dict[str, Dict[int, Pose]] = {}  # object_id / idx, pose
 FOCUS_OBJECT_ROBOT: Dict[str, rpc.common.RobotArg] = {}  # key: object_id
@@ -199,14 +199,14 @@ async def new_object_type_cb(req: rpc.objects.NewObjectTypeRequest, ui: WsClient
     await storage.update_object_type(obj)
 
     glob.OBJECT_TYPES[meta.type] = meta
-    glob.ACTIONS[meta.type] = otu.object_actions(TYPE_TO_PLUGIN,
-                                                 hlp.type_def_from_source(obj.source, obj.id, Generic), obj.source)
+    glob.ACTIONS[meta.type] = TYPES.get(obj.id, obj.source, Generic).actions()
     otu.add_ancestor_actions(meta.type, glob.ACTIONS, glob.OBJECT_TYPES)
 
     asyncio.ensure_future(notif.broadcast_event(events.ChangedObjectTypesEvent(events.EventType.ADD, data=[meta])))
     return None
 
 
+@hlp.read_only
 async def get_object_actions_cb(req: rpc.objects.GetActionsRequest, ui: WsClient) -> rpc.objects.GetActionsResponse:
 
     try:
@@ -215,6 +215,7 @@ async def get_object_actions_cb(req: rpc.objects.GetActionsRequest, ui: WsClient
         raise Arcor2Exception(f"Unknown object type: '{req.args.type}'.")
 
 
+@hlp.read_only
 async def get_object_types_cb(req: rpc.objects.GetObjectTypesRequest, ui: WsClient) ->\
         rpc.objects.GetObjectTypesResponse:
     return rpc.objects.GetObjectTypesResponse(data=list(glob.OBJECT_TYPES.values()))
@@ -260,5 +261,6 @@ async def delete_object_type_cb(req: rpc.objects.DeleteObjectTypeRequest, ui: Ws
             asyncio.ensure_future(glob.logger.error(e.message))
 
     del glob.OBJECT_TYPES[req.args.id]
+    TYPES.forget(req.args.id)
     asyncio.ensure_future(notif.broadcast_event(
         events.ChangedObjectTypesEvent(events.EventType.REMOVE, data=[obj_type])))
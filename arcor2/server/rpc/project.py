@@ -16,7 +16,8 @@ from arcor2.data import common, events, object_type, rpc
 from arcor2.exceptions import Arcor2Exception
 from arcor2.parameter_plugins import PARAM_PLUGINS
 from arcor2.parameter_plugins.base import ParameterPluginException
-from arcor2.server import globals as glob, notifications as notif, objects_services_actions as osa, robot
+from arcor2.server import documents, globals as glob, notifications as notif, objects_services_actions as osa, \
+    robot
 from arcor2.server.decorators import no_project, project_needed, scene_needed
 from arcor2.server.helpers import unique_name
 from arcor2.server.project import open_project, project_names, project_problems
@@ -65,7 +66,7 @@ async def managed_project(project_id: str, make_copy: bool = False):
         yield project
     finally:
         if save_back:
-            asyncio.ensure_future(storage.update_project(project))
+            storage.update_project_later(project)
 
 
 @scene_needed
@@ -151,12 +152,11 @@ async def execute_action_cb(req: rpc.project.ExecuteActionRequest, ui: WsClient)
     await glob.logger.debug(f"Running action {action.name} ({type(obj)}/{action_name}), params: {params}.")
 
     # schedule execution and return success
-    asyncio.ensure_future(osa.execute_action(getattr(obj, action_name), params))
+    notif.background(osa.execute_action(getattr(obj, action_name), params))
     return None
 
 
-async def project_info(project_id: str, scenes_lock: asyncio.Lock, scenes: Dict[str, common.Scene]) -> \
-        rpc.project.ListProjectsResponseData:
+async def project_info(project_id: str) -> rpc.project.ListProjectsResponseData:
 
     project = await storage.get_project(project_id)
     assert project.modified is not None
@@ -165,14 +165,13 @@ async def project_info(project_id: str, scenes_lock: asyncio.Lock, scenes: Dict[
                                               scene_id=project.scene_id, modified=project.modified)
 
     try:
-        async with scenes_lock:
-            if project.scene_id not in scenes:
-                scenes[project.scene_id] = await storage.get_scene(project.scene_id)
+        # concurrent requests for the same scene are coalesced by the storage client
+        scene = await storage.get_scene(project.scene_id)
     except storage.PersistentStorageException:
         pd.problems.append("Scene does not exist.")
         return pd
 
-    pd.problems = project_problems(scenes[project.scene_id], project)
+    pd.problems = project_problems(scene, project)
     pd.valid = not pd.problems
 
     if not pd.valid:
@@ -180,7 +179,7 @@ async def project_info(project_id: str, scenes_lock: asyncio.Lock, scenes: Dict[
 
     # TODO for projects without logic, check if there is script uploaded in the project service /or call Build/publish
     try:
-        program_src(project, scenes[project.scene_id], otu.built_in_types_names())
+        program_src(project, scene, otu.built_in_types_names())
         pd.executable = True
     except SourceException as e:
         pd.problems.append(e.message)
@@ -188,16 +187,13 @@ async def project_info(project_id: str, scenes_lock: asyncio.Lock, scenes: Dict[
     return pd
 
 
+@hlp.read_only
 async def list_projects_cb(req: rpc.project.ListProjectsRequest, ui: WsClient) -> rpc.project.ListProjectsResponse:
 
     projects = await storage.get_projects()
 
-    scenes_lock = asyncio.Lock()
-    scenes: Dict[str, common.Scene] = {}
-
     resp = rpc.project.ListProjectsResponse()
-    tasks = [project_info(project_iddesc.id, scenes_lock, scenes) for project_iddesc in projects.items]
-    resp.data = await asyncio.gather(*tasks)
+    resp.data = await asyncio.gather(*[project_info(project_iddesc.id) for project_iddesc in projects.items])
     return resp
 
 
@@ -528,8 +524,7 @@ async def open_project_cb(req: rpc.project.OpenProjectRequest, ui: WsClient) ->
     assert glob.SCENE
     assert glob.PROJECT
 
-    asyncio.ensure_future(notif.broadcast_event(events.OpenProject(data=events.OpenProjectData(glob.SCENE,
-                                                                                               glob.PROJECT))))
+    asyncio.ensure_future(documents.broadcast_open())
 
     return None
 
@@ -576,8 +571,7 @@ async def new_project_cb(req: rpc.project.NewProjectRequest, ui: WsClient) -> No
 
     assert glob.SCENE
 
-    asyncio.ensure_future(notif.broadcast_event(events.OpenProject(data=events.OpenProjectData(glob.SCENE,
-                                                                                               glob.PROJECT))))
+    asyncio.ensure_future(documents.broadcast_open())
     return None
 
 
@@ -960,3 +954,8 @@ async def rename_action_cb(req: rpc.project.RenameActionRequest, ui: WsClient) -
     asyncio.ensure_future(notif.broadcast_event(events.ActionChanged(events.EventType.UPDATE_BASE, data=act)))
 
     return None
+
+
+@hlp.read_only
+async def get_snapshot_cb(req: rpc.project.GetSnapshotRequest, ui: WsClient) -> rpc.project.GetSnapshotResponse:
+    return rpc.project.GetSnapshotResponse(data=documents.snapshot(ui))
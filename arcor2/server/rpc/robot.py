@@ -1,14 +1,14 @@
 import asyncio
 import time
-from typing import Awaitable, Callable, Dict
+from typing import Any, Callable, Coroutine, Dict
 
 from websockets.server import WebSocketServerProtocol as WsClient
 
-from arcor2 import helpers as hlp
+from arcor2 import helpers as hlp, wire
 from arcor2.data import common, events, rpc
 from arcor2.exceptions import Arcor2Exception
 from arcor2.object_types import Robot
-from arcor2.server import globals as glob, objects_services_actions as osa, robot
+from arcor2.server import globals as glob, notifications as notif, objects_services_actions as osa, robot
 from arcor2.server.decorators import project_needed, scene_needed
 
 TaskDict = Dict[str, asyncio.Task]
@@ -36,9 +36,8 @@ async def robot_joints_event(robot_id: str) -> None:
             glob.logger.error(f"Failed to get joints for {robot_id}. {e.message}")
             break
 
-        evt_json = evt.to_json()
-        await asyncio.gather(*[hlp.send_json_to_client(ui, evt_json)
-                               for ui in glob.ROBOT_JOINTS_REGISTERED_UIS[robot_id]])
+        notif.broadcast_message(wire.Message(evt.to_dict()), evt.event, glob.ROBOT_JOINTS_REGISTERED_UIS[robot_id],
+                                key=(evt.event, robot_id))
 
         end = time.monotonic()
         await asyncio.sleep(EVENT_PERIOD-(end-start))
@@ -76,8 +75,8 @@ async def robot_eef_pose_event(robot_id: str) -> None:
             glob.logger.error(f"Failed to get eef pose for {robot_id}. {e.message}")
             break
 
-        evt_json = evt.to_json()
-        await asyncio.gather(*[hlp.send_json_to_client(ui, evt_json) for ui in glob.ROBOT_EEF_REGISTERED_UIS[robot_id]])
+        notif.broadcast_message(wire.Message(evt.to_dict()), evt.event, glob.ROBOT_EEF_REGISTERED_UIS[robot_id],
+                                key=(evt.event, robot_id))
 
         end = time.monotonic()
         await asyncio.sleep(EVENT_PERIOD-(end-start))
@@ -90,12 +89,14 @@ async def robot_eef_pose_event(robot_id: str) -> None:
     await glob.logger.info(f"Sending '{events.RobotEefEvent.__name__}' for robot '{robot_id}' stopped.")
 
 
+@hlp.read_only
 async def get_robot_meta_cb(req: rpc.robot.GetRobotMetaRequest, ui: WsClient) ->\
         rpc.robot.GetRobotMetaResponse:
 
     return rpc.robot.GetRobotMetaResponse(data=list(glob.ROBOT_META.values()))
 
 
+@hlp.read_only
 @scene_needed
 async def get_robot_joints_cb(req: rpc.robot.GetRobotJointsRequest, ui: WsClient) -> \
         rpc.robot.GetRobotJointsResponse:
@@ -103,6 +104,7 @@ async def get_robot_joints_cb(req: rpc.robot.GetRobotJointsRequest, ui: WsClient
     return rpc.robot.GetRobotJointsResponse(data=await robot.get_robot_joints(req.args.robot_id))
 
 
+@hlp.read_only
 @scene_needed
 async def get_end_effector_pose_cb(req: rpc.robot.GetEndEffectorPoseRequest, ui: WsClient) -> \
         rpc.robot.GetEndEffectorPoseResponse:
@@ -111,6 +113,7 @@ async def get_end_effector_pose_cb(req: rpc.robot.GetEndEffectorPoseRequest, ui:
         data=await robot.get_end_effector_pose(req.args.robot_id, req.args.end_effector_id))
 
 
+@hlp.read_only
 @scene_needed
 async def get_end_effectors_cb(req: rpc.robot.GetEndEffectorsRequest, ui: WsClient) -> \
         rpc.robot.GetEndEffectorsResponse:
@@ -118,6 +121,7 @@ async def get_end_effectors_cb(req: rpc.robot.GetEndEffectorsRequest, ui: WsClie
     return rpc.robot.GetEndEffectorsResponse(data=await robot.get_end_effectors(req.args.robot_id))
 
 
+@hlp.read_only
 @scene_needed
 async def get_grippers_cb(req: rpc.robot.GetGrippersRequest, ui: WsClient) -> \
         rpc.robot.GetGrippersResponse:
@@ -125,6 +129,7 @@ async def get_grippers_cb(req: rpc.robot.GetGrippersRequest, ui: WsClient) -> \
     return rpc.robot.GetGrippersResponse(data=await robot.get_grippers(req.args.robot_id))
 
 
+@hlp.read_only
 @scene_needed
 async def get_suctions_cb(req: rpc.robot.GetSuctionsRequest, ui: WsClient) -> \
         rpc.robot.GetSuctionsResponse:
@@ -133,7 +138,7 @@ async def get_suctions_cb(req: rpc.robot.GetSuctionsRequest, ui: WsClient) -> \
 
 
 async def register(req: rpc.robot.RegisterForRobotEventRequest, ui: WsClient, tasks: TaskDict,
-                   reg_uis: glob.RegisteredUiDict, coro: Callable[[str], Awaitable[None]]) -> None:
+                   reg_uis: glob.RegisteredUiDict, coro: Callable[[str], Coroutine[Any, Any, None]]) -> None:
 
     if req.args.send:
 
@@ -141,7 +146,7 @@ async def register(req: rpc.robot.RegisterForRobotEventRequest, ui: WsClient, ta
 
         if req.args.robot_id not in tasks:
             # start task
-            tasks[req.args.robot_id] = asyncio.create_task(coro(req.args.robot_id))
+            tasks[req.args.robot_id] = notif.background(coro(req.args.robot_id))
 
     else:
         try:
@@ -208,7 +213,7 @@ async def move_to_pose_cb(req: rpc.robot.MoveToPoseRequest, ui: WsClient) -> Non
         raise Arcor2Exception("Position or orientation should be given.")
 
     # TODO check if the target pose is reachable (dry_run)
-    asyncio.ensure_future(robot.move_to_pose(req.args.robot_id, req.args.end_effector_id, target_pose, req.args.speed))
+    notif.background(robot.move_to_pose(req.args.robot_id, req.args.end_effector_id, target_pose, req.args.speed))
 
 
 @scene_needed
@@ -216,7 +221,7 @@ async def move_to_joints_cb(req: rpc.robot.MoveToJointsRequest, ui: WsClient) ->
 
     await check_feature(req.args.robot_id, Robot.move_to_joints.__name__)
     await robot.check_robot_before_move(req.args.robot_id)
-    asyncio.ensure_future(robot.move_to_joints(req.args.robot_id, req.args.joints, req.args.speed))
+    notif.background(robot.move_to_joints(req.args.robot_id, req.args.joints, req.args.speed))
 
 
 @scene_needed
@@ -250,7 +255,7 @@ async def move_to_action_point_cb(req: rpc.robot.MoveToActionPointRequest, ui: W
         pose = ap.pose(req.args.orientation_id)
 
         # TODO check if the target pose is reachable (dry_run)
-        asyncio.ensure_future(robot.move_to_ap_orientation(
+        notif.background(robot.move_to_ap_orientation(
             req.args.robot_id, req.args.end_effector_id, pose, req.args.speed, req.args.orientation_id))
 
     elif req.args.joints_id:
@@ -260,5 +265,5 @@ async def move_to_action_point_cb(req: rpc.robot.MoveToActionPointRequest, ui: W
         joints = glob.PROJECT.joints(req.args.joints_id)
 
         # TODO check if the joints are within limits and reachable (dry_run)
-        asyncio.ensure_future(robot.move_to_ap_joints(
+        notif.background(robot.move_to_ap_joints(
             req.args.robot_id, joints.joints, req.args.speed, req.args.joints_id))
@@ -7,15 +7,13 @@ import functools
 from contextlib import asynccontextmanager
 from typing import Optional, Set
 
-import quaternion  # type: ignore
-
 from websockets.server import WebSocketServerProtocol as WsClient
 
 from arcor2 import aio_persistent_storage as storage, helpers as hlp
 from arcor2.data import common, object_type
 from arcor2.data import events, rpc
 from arcor2.exceptions import Arcor2Exception
-from arcor2.server import globals as glob, notifications as notif
+from arcor2.server import documents, globals as glob, notifications as notif
 from arcor2.server.decorators import no_project, no_scene, scene_needed
 from arcor2.server.helpers import unique_name
 from arcor2.server.project import associated_projects, projects_using_object, remove_object_references_from_projects, \
@@ -50,7 +48,7 @@ async def managed_scene(scene_id: str, make_copy: bool = False):
         yield scene
     finally:
         if save_back:
-            asyncio.ensure_future(storage.update_scene(scene))
+            storage.update_scene_later(scene)
 
 
 @no_scene
@@ -74,7 +72,7 @@ async def new_scene_cb(req: rpc.scene.NewSceneRequest, ui: WsClient) -> None:
         return None
 
     glob.SCENE = common.Scene(common.uid(), req.args.name, desc=req.args.desc)
-    asyncio.ensure_future(notif.broadcast_event(events.OpenScene(data=events.OpenSceneData(glob.SCENE))))
+    asyncio.ensure_future(documents.broadcast_open())
     return None
 
 
@@ -132,10 +130,11 @@ async def open_scene_cb(req: rpc.scene.OpenSceneRequest, ui: WsClient) -> None:
 
     await open_scene(req.args.id)
     assert glob.SCENE
-    asyncio.ensure_future(notif.broadcast_event(events.OpenScene(data=events.OpenSceneData(glob.SCENE))))
+    asyncio.ensure_future(documents.broadcast_open())
     return None
 
 
+@hlp.read_only
 async def list_scenes_cb(req: rpc.scene.ListScenesRequest, ui: WsClient) -> rpc.scene.ListScenesResponse:
 
     resp = rpc.scene.ListScenesResponse()
@@ -221,6 +220,7 @@ async def scene_object_usage_request_cb(req: rpc.scene.SceneObjectUsageRequest,
 
 
 # TODO move to objects
+@hlp.read_only
 @scene_needed
 async def action_param_values_cb(req: rpc.objects.ActionParamValuesRequest, ui: WsClient) -> \
         rpc.objects.ActionParamValuesResponse:
@@ -355,6 +355,8 @@ async def update_object_pose_using_robot_cb(req: rpc.objects.UpdateObjectPoseUsi
     scene_object.pose.position.y = new_pose.position.y - position_delta.y
     scene_object.pose.position.z = new_pose.position.z - position_delta.z
 
+    import quaternion  # type: ignore  # slow to import, rarely needed
+
     scene_object.pose.orientation.set_from_quaternion(
         new_pose.orientation.as_quaternion()*quaternion.quaternion(0, 1, 0, 0))
     obj_inst.pose = scene_object.pose
@@ -447,6 +449,7 @@ async def delete_scene_cb(req: rpc.scene.DeleteSceneRequest, ui: WsClient) -> \
     return None
 
 
+@hlp.read_only
 async def projects_with_scene_cb(req: rpc.scene.ProjectsWithSceneRequest, ui: WsClient) -> \
         rpc.scene.ProjectsWithSceneResponse:
 
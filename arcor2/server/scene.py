@@ -11,6 +11,7 @@ from arcor2.server import globals as glob, notifications as notif, objects_servi
 from arcor2.server.robot import collision
 from arcor2.services.robot_service import RobotService
 from arcor2.services.service import Service
+from arcor2.type_registry import TYPES
 
 
 def instances_names() -> Set[str]:
@@ -42,7 +43,7 @@ async def add_service_to_scene(srv: SceneService, dry_run: bool = False) -> None
         return None
 
     srv_type = await storage.get_service_type(srv.type)
-    cls_def = hlp.type_def_from_source(srv_type.source, srv_type.id, Service)
+    cls_def = TYPES.type_def(srv_type.id, srv_type.source, Service)
 
     if issubclass(cls_def, RobotService) and osa.find_robot_service():
         raise Arcor2Exception("Scene might contain only one robot service.")
@@ -109,7 +110,7 @@ async def add_object_to_scene(obj: SceneObject, add_to_scene=True, srv_obj_ok=Fa
         cls = otu.get_built_in_type(obj.type)
     else:
         obj_type = await storage.get_object_type(obj.type)
-        cls = hlp.type_def_from_source(obj_type.source, obj_type.id, Generic)
+        cls = TYPES.type_def(obj_type.id, obj_type.source, Generic)
 
     coll_model: Optional[Models] = None
     if obj_meta.object_model:
@@ -176,7 +177,7 @@ async def auto_add_object_to_scene(obj_type_name: str, dry_run: bool = False) ->
         return None
 
     obj_type = await storage.get_object_type(obj_type_name)
-    cls = hlp.type_def_from_source(obj_type.source, obj_type.id, Generic)
+    cls = TYPES.type_def(obj_type.id, obj_type.source, Generic)
 
     args: List[Service] = [glob.SERVICES_INSTANCES[srv_name] for srv_name in obj_meta.needs_services]
 
@@ -230,20 +231,32 @@ async def clear_scene(do_cleanup: bool = True) -> None:
 
     glob.SCENE = None
 
+    await storage.flush_writes()
+
 
 async def open_scene(scene_id: str) -> None:
 
     glob.SCENE = await storage.get_scene(scene_id)
 
+    # types are needed one by one below, this gets them at once and concurrently with adding services
+    obj_types = asyncio.ensure_future(storage.get_object_types(list(
+        {obj.type for obj in glob.SCENE.objects if obj.type not in otu.built_in_types_names()})))
+
     try:
 
         for srv in glob.SCENE.services:
             await add_service_to_scene(srv)
 
+        try:
+            await obj_types
+        except storage.PersistentStorageException:
+            pass  # will be reported for a particular object
+
         for obj in glob.SCENE.objects:
             await add_object_to_scene(obj, add_to_scene=False, srv_obj_ok=True)
 
     except Arcor2Exception as e:
+        obj_types.cancel()
         await clear_scene()
         raise Arcor2Exception(f"Failed to open scene. {e.message}") from e
 
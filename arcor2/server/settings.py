@@ -7,3 +7,10 @@ except KeyError:
     sys.exit("'ARCOR2_DATA_PATH' env. variable not set.")
 
 URDF_PATH = os.path.join(DATA_PATH, "urdf")
+
+# metadata of types (see arcor2.metadata_cache), could be turned off by ARCOR2_METADATA_CACHE=False
+METADATA_CACHE_PATH = os.path.join(DATA_PATH, "metadata")
+METADATA_CACHE = os.getenv("ARCOR2_METADATA_CACHE", "True") == "True"
+
+# actions of types are computed on the first use (and by a background task) instead of at startup
+LAZY_ACTIONS = os.getenv("ARCOR2_LAZY_ACTIONS", "False") == "True"
@@ -10,3 +10,11 @@ except KeyError:
     sys.exit(f"'{PROJECT_PATH_NAME}' env. variable not set.")
 
 CLEANUP_SERVICES: bool = os.getenv(CLEANUP_SERVICES_NAME, "True") == "True"
+
+# messages on internal links (ARServer <-> Execution, script -> Execution) are not validated against JSON schema
+TRUSTED_LINKS_NAME = "ARCOR2_TRUSTED_LINKS"
+TRUSTED_LINKS: bool = os.getenv(TRUSTED_LINKS_NAME, "False") == "True"
+
+# compiled validators of JSON schemas shared by nodes and packages (see arcor2.json_schema_cache)
+JSON_SCHEMA_CACHE: bool = os.getenv("ARCOR2_JSON_SCHEMA_CACHE", "True") == "True"
+JSON_SCHEMA_CACHE_PATH = os.getenv("ARCOR2_JSON_SCHEMA_CACHE_PATH", PROJECT_PATH)
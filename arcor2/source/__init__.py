@@ -1,11 +1,24 @@
-import static_typing as st
-
-import typed_ast.ast3
+from typing import Any
 
 from arcor2.exceptions import Arcor2Exception
 
 SCRIPT_HEADER = "#!/usr/bin/env python3\n""# -*- coding: utf-8 -*-\n\n"
-validator = st.ast_manipulation.AstValidator[typed_ast.ast3](mode="strict")
+
+
+def __getattr__(name: str) -> Any:
+    """
+    The validator is created on the first access, as importing static_typing is quite slow.
+    """
+
+    if name != "validator":
+        raise AttributeError(f"module {__name__} has no attribute {name}")
+
+    import static_typing as st
+    import typed_ast.ast3
+
+    validator = st.ast_manipulation.AstValidator[typed_ast.ast3](mode="strict")
+    globals()["validator"] = validator
+    return validator
 
 
 class SourceException(Arcor2Exception):
@@ -10,10 +10,10 @@ import arcor2.object_types
 from arcor2.data.object_type import ObjectTypeMeta
 from arcor2.helpers import camel_case_to_snake_case
 from arcor2.object_types import Generic
-from arcor2.object_types_utils import built_in_types_names, meta_from_def, object_actions
-from arcor2.parameter_plugins import TYPE_TO_PLUGIN
+from arcor2.object_types_utils import built_in_types_names
 from arcor2.source import SourceException
 from arcor2.source.utils import find_function, get_name, get_name_attr, tree_to_str
+from arcor2.type_registry import TYPES
 
 
 def check_object_type(object_type_source: str, type_name: str) -> None:
@@ -23,12 +23,12 @@ def check_object_type(object_type_source: str, type_name: str) -> None:
     :return:
     """
     try:
-        type_def = hlp.type_def_from_source(object_type_source, type_name, Generic)
+        compiled = TYPES.get(type_name, object_type_source, Generic)
     except hlp.TypeDefException as e:
         raise SourceException(e)
 
-    meta_from_def(type_def, False)
-    object_actions(TYPE_TO_PLUGIN, type_def, object_type_source)
+    compiled.meta()
+    compiled.actions()
 
 
 def fix_object_name(object_id: str) -> str:
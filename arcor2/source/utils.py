@@ -1,7 +1,5 @@
 import importlib
-import os
 import re
-import stat
 from typing import Any, Dict, List, Optional, Type, Union
 
 import autopep8  # type: ignore
@@ -13,10 +11,9 @@ from typed_ast.ast3 import AST, Assert, Assign, Attribute, Call, ClassDef, Compa
     Return, Store, Str, Subscript, Try, While, With, alias, arg, arguments, fix_missing_locations, keyword, stmt, \
     withitem
 
-import typed_astunparse
-
 import arcor2.data.common
 from arcor2.data.common import ActionPoint, Project
+from arcor2.helpers import make_executable
 from arcor2.source import SCRIPT_HEADER, SourceException
 
 
@@ -369,11 +366,6 @@ def tree_to_str(tree: Module) -> str:
     return generated_code
 
 
-def make_executable(path_to_file: str) -> None:
-    st = os.stat(path_to_file)
-    os.chmod(path_to_file, st.st_mode | stat.S_IEXEC)
-
-
 def tree_to_script(tree: Module, out_file: str, executable: bool) -> None:
     generated_code = tree_to_str(tree)
 
@@ -658,6 +650,9 @@ def derived_resources_class(project: Project) -> str:
 
 
 def dump(tree: Module) -> str:
+
+    import typed_astunparse  # only for debugging, slow to import
+
     return typed_astunparse.dump(tree)
 
 
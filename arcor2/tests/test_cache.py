@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from arcor2.cache import Cache, SingleFlight
+from arcor2.data.common import Project
+from arcor2.exceptions import Arcor2Exception
+
+
+def test_cache_lru():
+
+    async def run() -> None:
+
+        cache: Cache[str, Project] = Cache(max_size=2, max_age=60)
+        fetched = []
+
+        def fetch(project_id: str):
+            async def _fetch() -> Project:
+                fetched.append(project_id)
+                return Project(project_id, "name", "scene")
+            return _fetch
+
+        for project_id in ("p1", "p2", "p1", "p3", "p1", "p2"):
+            proj = await cache.get(project_id, fetch(project_id))
+            assert proj.id == project_id
+            proj.name = "modified"  # caller's copy must not affect the cache
+
+        assert fetched == ["p1", "p2", "p3", "p2"]
+        assert (await cache.get("p1", fetch("p1"))).name == "name"
+
+        cache.invalidate("p1")
+        await cache.get("p1", fetch("p1"))
+        assert fetched[-1] == "p1"
+
+    asyncio.run(run())
+
+
+def test_cache_revalidation():
+
+    async def run() -> None:
+
+        cache: Cache[str, Project] = Cache(max_size=10, max_age=0, stale_while_revalidate=60)
+        now = datetime.now(tz=timezone.utc)
+        versions = [Project("p1", "new", "scene", modified=now),
+                    Project("p1", "old", "scene", modified=now - timedelta(seconds=1))]
+
+        async def fetch() -> Project:
+            return versions.pop(0)
+
+        assert (await cache.get("p1", fetch)).name == "new"
+        assert (await cache.get("p1", fetch)).name == "new"  # stale value, revalidated in the background
+        await asyncio.sleep(0.01)
+        assert not versions
+        assert (await cache.get("p1", fetch)).name == "new"  # older document does not replace the newer one
+
+    asyncio.run(run())
+
+
+def test_single_flight():
+
+    async def run() -> None:
+
+        flights: SingleFlight[str, Project] = SingleFlight()
+        calls = 0
+
+        async def fetch() -> Project:
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return Project("p1", "name", "scene")
+
+        async def fail() -> Project:
+            raise Arcor2Exception("Not found")
+
+        results = await asyncio.gather(*[flights.do("p1", fetch) for _ in range(10)])
+        assert calls == 1
+        assert all(res is results[0] for res in results)
+        assert not flights
+
+        failures = await asyncio.gather(*[flights.do("p2", fail) for _ in range(3)], return_exceptions=True)
+        assert all(isinstance(res, Arcor2Exception) for res in failures)
+
+    asyncio.run(run())
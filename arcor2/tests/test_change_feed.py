@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+
+import asyncio
+from typing import List, Optional
+
+from arcor2 import aio_persistent_storage as storage, aio_rest, rest
+from arcor2.change_feed import ChangeFeed
+from arcor2.data.common import StorageChange, StorageChanges
+from arcor2.data.object_type import ObjectType
+
+Kind = StorageChange.KindEnum
+
+
+def test_own_writes_skipped(monkeypatch):
+
+    feed: List[StorageChange] = []
+
+    async def get_changes(since: Optional[int] = None) -> StorageChanges:
+        return StorageChanges(len(feed), feed[since:] if since is not None else [])
+
+    async def put(url: str, data) -> None:
+        # the storage records who made the change (header sent with each request)
+        feed.append(StorageChange(len(feed) + 1, Kind.OBJECT_TYPE, data.id, writer=rest.HEADERS[rest.WRITER_HEADER]))
+
+    monkeypatch.setattr(storage, "get_changes", get_changes)
+    monkeypatch.setattr(aio_rest, "put", put)
+
+    received: List[List[StorageChange]] = []
+
+    async def subscriber(changes: List[StorageChange]) -> None:
+        received.append(changes)
+
+    async def run() -> None:
+
+        cf = ChangeFeed()
+        cf.subscribe(subscriber)
+        await cf.poll()
+
+        await storage.update_object_type(ObjectType("Ours", "source"))
+        assert not await cf.poll()
+
+        # someone else changed the same type at the same time, another storage does not tell who made a change
+        await storage.update_object_type(ObjectType("Ours", "source"))
+        feed.append(StorageChange(len(feed) + 1, Kind.OBJECT_TYPE, "Ours", deleted=True, writer="other"))
+        feed.append(StorageChange(len(feed) + 1, Kind.OBJECT_TYPE, "Theirs"))
+
+        changes = await cf.poll()
+        assert [(change.id, change.deleted) for change in changes] == [("Ours", True), ("Theirs", False)]
+        assert cf.stats.own == 2
+
+    asyncio.run(run())
+
+    assert len(received) == 1
+
+
+def test_reset(monkeypatch):
+
+    last = 10
+
+    async def get_changes(since: Optional[int] = None) -> StorageChanges:
+        return StorageChanges(last, [StorageChange(last, Kind.OBJECT_TYPE, "Type")] if since is not None else [])
+
+    monkeypatch.setattr(storage, "get_changes", get_changes)
+
+    calls: List[str] = []
+
+    async def subscriber(changes: List[StorageChange]) -> None:
+        calls.append("changes")
+
+    async def reset_subscriber() -> None:
+        calls.append("reset")
+
+    async def run() -> None:
+
+        nonlocal last
+
+        cf = ChangeFeed()
+        cf.subscribe(subscriber)
+        cf.subscribe_reset(reset_subscriber)
+
+        await cf.poll()
+        last = 2  # storage restarted, changes made meanwhile are unknown
+        assert not await cf.poll()
+        assert cf.stats.resets == 1
+
+    asyncio.run(run())
+
+    assert calls == ["reset"]
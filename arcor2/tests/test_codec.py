@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+
+import json
+from datetime import datetime, timezone
+
+import pytest  # type: ignore
+
+from arcor2 import codec
+from arcor2.data.common import Project, ProjectActionPoint, Position
+from arcor2.data.object_type import Model3dType, ObjectModel, ObjectTypeMeta, Sphere
+
+
+def test_codec_round_trip():
+
+    proj = Project("pid", "Projekt žluťoučký", "sid", [ProjectActionPoint("apid", "ap", Position(1.5, 0, -1))],
+                   modified=datetime.now(tz=timezone.utc))
+
+    encoded = codec.to_json(proj)
+    assert Project.from_dict(codec.loads(encoded)) == proj
+    assert Project.from_dict(codec.loads(encoded.encode())) == proj
+    assert json.loads(encoded) == json.loads(proj.to_json())
+
+
+def test_codec_same_as_stdlib():
+
+    for obj in (ObjectTypeMeta("type", needs_services={"srv"}), ObjectModel(Model3dType.SPHERE, sphere=Sphere("s", 1))):
+        assert codec.to_json(obj) == json.dumps(obj.to_dict(), separators=(",", ":"), ensure_ascii=False)
+
+
+@pytest.mark.skipif(codec.MSGPACK, reason="msgpack installed")
+def test_codec_without_msgpack():
+
+    with pytest.raises(codec.CodecException):
+        codec.packb({})
+
+    with pytest.raises(codec.CodecException):
+        codec.unpackb(b"")
@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+
+import asyncio
+from typing import List
+
+from arcor2 import codec
+from arcor2.data import events
+from arcor2.data.common import Scene
+from arcor2.server import documents, globals as glob, notifications as notif
+
+
+class Client:
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.sent: List[str] = []
+
+    async def send(self, message: str) -> None:
+        self.sent.append(message)
+
+    @property
+    def events(self) -> List[str]:
+        return [codec.loads(msg)["event"] for msg in self.sent]
+
+
+def connect(client: Client) -> None:
+
+    notif.add_client(client)  # type: ignore
+    documents.add_client(client)  # type: ignore
+    glob.INTERFACES.add(client)  # type: ignore
+
+
+def disconnect(client: Client) -> None:
+
+    notif.remove_client(client)  # type: ignore
+    documents.remove_client(client)  # type: ignore
+    glob.INTERFACES.discard(client)  # type: ignore
+
+
+def rename(name: str) -> None:
+
+    assert glob.SCENE
+    glob.SCENE.name = name
+    documents.publish()
+
+
+def run_with_scene(test) -> None:
+
+    async def run() -> None:
+
+        glob.SCENE = Scene("s1", "scene")
+        documents.SCENE.update(None)
+
+        try:
+            await test()
+            await asyncio.sleep(0.05)  # let the send queues to send everything
+        finally:
+            glob.SCENE = None
+            documents.SCENE.update(None)
+            for client in list(glob.INTERFACES):
+                disconnect(client)
+
+    asyncio.run(run())
+
+
+def test_register() -> None:
+
+    async def test() -> None:
+
+        plain, deltas = Client("/"), Client("/?deltas&revision=abc")
+        connect(plain)
+        connect(deltas)
+
+        assert plain not in documents.CLIENTS  # type: ignore
+        assert documents.CLIENTS[deltas] == {"abc"}  # type: ignore
+
+        # unknown revision -> the complete scene
+        open_scene, = documents.open_events(deltas)  # type: ignore
+        assert isinstance(open_scene, events.OpenScene) and open_scene.data
+        assert open_scene.data.scene == glob.SCENE
+        assert documents.CLIENTS[deltas] == {"abc", documents.SCENE.revision}  # type: ignore
+
+        rename("renamed")
+        await asyncio.sleep(0.05)
+
+        assert deltas.events == ["SceneDelta"]
+        assert not plain.events
+
+        # values are plain JSON, not JSON encoded once more
+        patch = codec.loads(deltas.sent[0])["data"]["patch"]
+        assert patch == [{"op": "replace", "path": "/name", "value": "renamed"}]
+
+    run_with_scene(test)
+
+
+def test_stale_revision() -> None:
+
+    async def test() -> None:
+
+        first = Client("/?deltas")
+        connect(first)
+        documents.open_events(first)  # type: ignore
+        old_revision = documents.SCENE.revision
+        disconnect(first)
+
+        rename("renamed")
+
+        # the client without any revision must not get a delta it can't apply
+        new = Client("/?deltas")
+        connect(new)
+        rename("renamed again")
+        open_scene, = documents.open_events(new)  # type: ignore
+        assert isinstance(open_scene, events.OpenScene) and open_scene.data
+        assert open_scene.data.scene == glob.SCENE
+
+        # a client with an older revision gets the delta from it
+        stale = Client(f"/?deltas&revision={old_revision}")
+        connect(stale)
+        delta, open_scene = documents.open_events(stale)  # type: ignore
+        assert isinstance(delta, events.SceneDelta) and delta.data
+        assert isinstance(open_scene, events.OpenScene) and open_scene.data
+        assert delta.data.base_revision == old_revision
+        assert delta.data.revision == documents.SCENE.revision
+        assert open_scene.data.scene is None
+
+        await asyncio.sleep(0.05)
+        assert "SceneDelta" not in new.events
+
+    run_with_scene(test)
+
+
+def test_snapshot() -> None:
+
+    async def test() -> None:
+
+        client = Client("/?deltas")
+        connect(client)
+
+        snapshot = documents.snapshot(client)  # type: ignore
+        assert snapshot.scene == glob.SCENE
+        assert snapshot.scene_revision == documents.SCENE.revision
+        assert snapshot.scene_revision in documents.CLIENTS[client]  # type: ignore
+
+        # the client now gets deltas
+        rename("renamed")
+        await asyncio.sleep(0.05)
+        assert client.events == ["SceneDelta"]
+
+    run_with_scene(test)
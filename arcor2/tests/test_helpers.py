@@ -1,10 +1,19 @@
 # -*- coding: utf-8 -*-
 
+import asyncio
 import datetime
+import json
+from typing import List
 
 import pytest  # type: ignore
 
-from arcor2 import helpers as hlp
+from dataclasses_jsonschema import ValidationError
+
+from arcor2 import helpers as hlp, metrics, rpc_metrics
+from arcor2.data.helpers import from_dict
+from arcor2.data.metrics import RpcStats
+from arcor2.data.rpc.common import SystemInfoRequest, VersionRequest
+from arcor2.exceptions import Arcor2Exception
 
 
 def test_import_cls_valid():
@@ -74,3 +83,102 @@ def test_is_valid_identifier(val):
 ])
 def test_is_valid_type(val):
     assert hlp.is_valid_type(val)
+
+
+class Logger:
+
+    level = None
+
+    async def error(self, *args, **kwargs) -> None:
+        raise AssertionError(args)
+
+    async def debug(self, *args, **kwargs) -> None:
+        pass
+
+
+class Client:
+
+    def __init__(self, messages: List[str]) -> None:
+        self.messages = messages
+        self.sent: List[int] = []
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> str:
+        if not self.messages:
+            await asyncio.sleep(0.1)  # let responses to be sent
+            raise StopAsyncIteration
+        return self.messages.pop(0)
+
+    async def send(self, message: str) -> None:
+        self.sent.append(json.loads(message)["id"])
+
+
+def test_server_concurrent_rpcs():
+
+    started: List[int] = []
+
+    @hlp.read_only
+    async def system_info_cb(req: SystemInfoRequest, ui: Client) -> None:
+        started.append(req.id)
+        await asyncio.sleep(0.05 if req.id == 1 else 0)
+
+    async def version_cb(req: VersionRequest, ui: Client) -> None:
+        started.append(req.id)
+
+    async def nothing(client: Client) -> None:
+        pass
+
+    rpc_dict = {SystemInfoRequest: system_info_cb, VersionRequest: version_cb}
+
+    async def run(concurrency: int) -> Client:
+
+        client = Client([SystemInfoRequest(id=1).to_json(), SystemInfoRequest(id=2).to_json(),
+                         VersionRequest(id=3).to_json(), SystemInfoRequest(id=4).to_json()])
+        await hlp.server(client, "", Logger(), nothing, nothing, rpc_dict, concurrency=concurrency)
+        return client
+
+    assert asyncio.run(run(0)).sent == [1, 2, 3, 4]
+    assert started == [1, 2, 3, 4]
+
+    started.clear()
+    assert asyncio.run(run(2)).sent == [2, 1, 3, 4]  # mutating RPC waits for previous read-only ones
+    assert started == [1, 2, 3, 4]
+
+
+def test_from_dict_without_validation():
+
+    data = SystemInfoRequest(id=1).to_dict()
+
+    assert from_dict(SystemInfoRequest, data, validate=False) == from_dict(SystemInfoRequest, data)
+
+    with pytest.raises(ValidationError):
+        from_dict(SystemInfoRequest, {**data, "id": "abc"}, validate=False)
+
+
+def test_server_rpc_metrics():
+
+    async def version_cb(req: VersionRequest, ui: Client) -> None:
+        raise Arcor2Exception("Failed.")
+
+    async def nothing(client: Client) -> None:
+        pass
+
+    def stats() -> RpcStats:
+        return next((st for st in rpc_metrics.server_stats().rpcs if st.request == VersionRequest.request),
+                    RpcStats(VersionRequest.request))
+
+    before = stats()
+
+    client = Client([VersionRequest(id=1).to_json(), VersionRequest(id=2).to_json()])
+    asyncio.run(hlp.server(client, "", Logger(), nothing, nothing, {VersionRequest: version_cb}))
+
+    after = stats()
+
+    assert client.sent == [1, 2]
+    assert after.count == before.count + 2
+    assert after.errors == before.errors + 2
+    assert after.in_flight == 0
+    assert after.handler > 0
+    assert "arcor2_rpc_seconds_count{request=\"Version\",phase=\"send\"}" in metrics.REGISTRY.prometheus_text()
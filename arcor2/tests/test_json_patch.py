@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+
+import copy
+import json
+
+import pytest  # type: ignore
+
+from arcor2 import json_patch
+from arcor2.data.common import Position, Project, ProjectActionPoint
+
+
+@pytest.mark.parametrize('old,new', [
+    ({"a": 1, "b": [1, 2, 3]}, {"a": 1.0, "b": [1, 2, 3]}),
+    ({"a": 1, "b": [1, 2, 3]}, {"b": [0, 1, 2, 3, 4], "c/d~": None}),
+    ({"b": [1, 2, 3, 4, 5]}, {"b": [1, 5]}),
+    ({"b": [{"x": 1}, {"x": 2}]}, {"b": [{"x": 1, "y": True}]}),
+    ([1, 2], {"a": 1}),
+])
+def test_diff_apply(old, new):
+
+    orig = copy.deepcopy(old)
+    patched = json_patch.apply(old, json_patch.diff(old, new))
+
+    assert json.dumps(patched) == json.dumps(new)
+    assert old == orig
+
+
+def test_diff_insert_remove():
+
+    project = Project("p", "project", "s", [ProjectActionPoint(f"ap{idx}", f"ap{idx}", Position(idx, 0, 0))
+                                            for idx in range(10)])
+    old = project.to_dict()
+
+    project.action_points.insert(3, ProjectActionPoint("new", "new", Position()))
+    del project.action_points[8]
+    project.action_points[0].name = "renamed"
+    new = project.to_dict()
+
+    ops = json_patch.diff(old, new)
+
+    assert {"op": "replace", "path": "/action_points/0/name", "value": "renamed"} in ops
+    assert len(ops) < 10
+    assert json_patch.apply(old, ops) == new
+
+    with pytest.raises(json_patch.JsonPatchException):
+        json_patch.apply(old, [{"op": "remove", "path": "/action_points/100"}])
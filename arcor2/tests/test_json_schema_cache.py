@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+
+import os
+
+import pytest  # type: ignore
+
+from dataclasses_jsonschema import ValidationError
+
+from arcor2 import json_schema_cache
+from arcor2.data.common import Scene
+
+
+@pytest.mark.skipif(not json_schema_cache.available(), reason="fastjsonschema not installed")
+def test_json_schema_cache(tmp_path) -> None:
+
+    path = str(tmp_path)
+    open(os.path.join(path, f"{json_schema_cache.FILE_PREFIX}0.0.1"), "w").close()  # cache of other version
+
+    assert json_schema_cache.prepare_validators(path) > 0
+    assert os.listdir(path) == [os.path.basename(json_schema_cache.cache_file(path))]
+
+    # e.g. another process
+    assert json_schema_cache.prepare_validators(path, (Scene,), compile_missing=False) == 0
+
+    assert Scene.from_dict({"id": "s1", "name": "scene"}).name == "scene"
+
+    with pytest.raises(ValidationError):
+        Scene.from_dict({"id": "s1"})
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+
+from typing import Dict, List
+
+from arcor2.data.object_type import ActionMetadata, ObjectAction, ObjectTypeMeta
+from arcor2.exceptions import Arcor2Exception
+from arcor2.object_types_utils import LazyActions
+
+
+def test_lazy_actions() -> None:
+
+    computed: List[str] = []
+    errors: Dict[str, Arcor2Exception] = {}
+
+    def compute(type_name: str, *action_names: str):
+
+        def inner():
+            computed.append(type_name)
+            return [ObjectAction(name, meta=ActionMetadata()) for name in action_names]
+
+        return inner
+
+    def broken():
+        raise Arcor2Exception("Invalid source.")
+
+    object_types = {"Base": ObjectTypeMeta("Base"), "Child": ObjectTypeMeta("Child", base="Base"),
+                    "Broken": ObjectTypeMeta("Broken")}
+
+    actions = LazyActions({"Base": compute("Base", "a", "b"), "Child": compute("Child", "b", "c"), "Broken": broken},
+                          object_types, errors.__setitem__)
+
+    assert not computed
+    assert set(actions.keys()) == {"Base", "Child", "Broken"}
+
+    # ancestors are computed as needed
+    assert [(act.name, act.origins) for act in actions["Child"]] == [("b", "Base"), ("c", None), ("a", "Base")]
+    assert computed == ["Child", "Base"]
+    assert actions.pending == ["Broken"]
+
+    assert "Broken" not in actions
+    assert "Broken" in errors
+    assert not actions.pending
+
+    actions["Child"]
+    assert computed == ["Child", "Base"]  # memoized
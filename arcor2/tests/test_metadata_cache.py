@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+
+import os
+
+from arcor2.metadata_cache import MetadataCache
+from arcor2.object_types import Generic
+from arcor2.type_registry import TypeRegistry
+from arcor2.tests.test_type_registry import SOURCE
+
+
+def not_computed() -> None:
+    raise AssertionError("Should be read from the cache.")
+
+
+def test_metadata_cache(tmp_path) -> None:
+
+    root = str(tmp_path)
+    registry = TypeRegistry(MetadataCache(root, "1.0.0"))
+
+    meta = registry.get("Box", SOURCE, Generic).meta()
+    assert os.listdir(os.path.join(root, "1.0.0"))
+
+    # after restart, the metadata are read from the disk
+    restarted = TypeRegistry(MetadataCache(root, "1.0.0"))
+    data = restarted.get("Box", SOURCE, Generic).cached("meta", not_computed, lambda x: x, lambda data: data)
+    assert data["description"] == meta.description
+
+    # other versions and unknown types are removed
+    MetadataCache(root, "0.9.0").put("meta", "Box", "abc", {})
+    restarted.cache.put("meta", "Unknown", "abc", {})  # type: ignore
+
+    assert restarted.gc() == 2
+    assert os.listdir(root) == ["1.0.0"]
+    assert len(os.listdir(os.path.join(root, "1.0.0"))) == 1
+
+    # e.g. when base of the type was changed
+    restarted.forget("Box", cached=True)
+    assert not os.listdir(os.path.join(root, "1.0.0"))
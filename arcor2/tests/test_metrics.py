@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+
+import pytest  # type: ignore
+
+from arcor2 import rest
+from arcor2.metrics import MetricsException, Registry
+
+
+def test_prometheus_text():
+
+    registry = Registry()
+
+    requests = registry.counter("requests_total", "Requests.", ("method",))
+    latency = registry.histogram("latency_seconds", "Latency.", buckets=(0.1, 1.0))
+
+    requests.labels("GET").inc()
+    requests.labels("GET").inc()
+    requests.labels('P"UT').inc(3)
+
+    for value in (0.05, 0.5, 5.0):
+        latency.labels().observe(value)
+
+    assert registry.counter("requests_total", "Requests.", ("method",)) is requests
+
+    with pytest.raises(MetricsException):
+        registry.gauge("requests_total")
+
+    assert registry.prometheus_text().splitlines() == [
+        "# HELP requests_total Requests.",
+        "# TYPE requests_total counter",
+        'requests_total{method="GET"} 2',
+        'requests_total{method="P\\"UT"} 3',
+        "# HELP latency_seconds Latency.",
+        "# TYPE latency_seconds histogram",
+        'latency_seconds_bucket{le="0.1"} 1',
+        'latency_seconds_bucket{le="1"} 2',
+        'latency_seconds_bucket{le="+Inf"} 3',
+        "latency_seconds_sum 5.55",
+        "latency_seconds_count 3",
+    ]
+
+
+def test_url_template():
+
+    @rest.handle_exceptions()
+    def get_action(project_id: str, action_id: str):
+        return rest.url_template(f"http://storage:11000/project/{project_id}/action/{action_id}")
+
+    assert get_action("p1", action_id="a1") == ("storage:11000", "/project/{project_id}/action/{action_id}")
+    assert rest.url_template("http://storage/project/0123456789abcdef0123456789abcdef") == ("storage", "/project/{id}")
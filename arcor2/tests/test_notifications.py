@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+
+import asyncio
+from typing import List
+
+from arcor2 import codec
+from arcor2.data.events import Event, EventBatch, ProjectSaved, SceneClosed, SceneSaved
+from arcor2.server import globals as glob, notifications as notif
+
+
+class Client:
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.sent: List[str] = []
+
+    async def send(self, message: str) -> None:
+        self.sent.append(message)
+
+
+def test_batching() -> None:
+
+    async def run() -> None:
+
+        batching, other = Client("/?batch"), Client("/")
+
+        for client in (batching, other):
+            notif.add_client(client)  # type: ignore
+            glob.INTERFACES.add(client)  # type: ignore
+
+        @notif.batching
+        async def callback() -> None:
+
+            await notif.broadcast_event(SceneSaved())
+            asyncio.ensure_future(notif.broadcast_event(SceneClosed()))  # sent from a task created by callback
+
+        try:
+            await callback()
+            await asyncio.sleep(0.1)  # let the send queues to send everything
+        finally:
+            for client in (batching, other):
+                notif.remove_client(client)  # type: ignore
+                glob.INTERFACES.discard(client)  # type: ignore
+
+        assert not notif.BATCH_CLIENTS
+        assert [codec.loads(msg)["event"] for msg in other.sent] == ["SceneSaved", "SceneClosed"]
+
+        assert len(batching.sent) == 1
+        envelope = codec.loads(batching.sent[0])
+        assert envelope["event"] == EventBatch.event
+        assert [evt["event"] for evt in envelope["data"]] == ["SceneSaved", "SceneClosed"]
+
+    asyncio.run(run())
+
+
+def test_response_after_events() -> None:
+
+    async def run() -> None:
+
+        client = Client("/")
+        notif.add_client(client)  # type: ignore
+        glob.INTERFACES.add(client)  # type: ignore
+
+        try:
+            # e.g. CloseScene: events are emitted by the callback, then the response is sent
+            await notif.broadcast_event(SceneClosed())
+            await notif.send_response(client, "response")  # type: ignore
+            await asyncio.sleep(0.1)
+        finally:
+            notif.remove_client(client)  # type: ignore
+            glob.INTERFACES.discard(client)  # type: ignore
+
+        assert client.sent[0] != "response"
+        assert codec.loads(client.sent[0])["event"] == "SceneClosed"
+        assert client.sent[1] == "response"
+
+    asyncio.run(run())
+
+
+def test_batching_spawned_tasks() -> None:
+
+    async def run() -> None:
+
+        client = Client("/?batch")
+        notif.add_client(client)  # type: ignore
+        glob.INTERFACES.add(client)  # type: ignore
+
+        async def later(evt: Event, delay: float) -> None:
+            await asyncio.sleep(0)
+            await asyncio.sleep(delay)
+            await notif.broadcast_event(evt)
+
+        async def nested() -> None:
+            await asyncio.sleep(0.01)
+            asyncio.ensure_future(later(SceneClosed(), 0.01))
+
+        @notif.batching
+        async def callback() -> None:
+
+            asyncio.ensure_future(later(SceneSaved(), 0.01))  # yields several times before the event is sent
+            asyncio.ensure_future(nested())
+            notif.background(later(ProjectSaved(), 0.05))  # e.g. robot movement, not part of the batch
+
+        try:
+            await callback()
+            await asyncio.sleep(0.1)
+        finally:
+            notif.remove_client(client)  # type: ignore
+            glob.INTERFACES.discard(client)  # type: ignore
+
+        assert len(client.sent) == 2
+        envelope = codec.loads(client.sent[0])
+        assert envelope["event"] == EventBatch.event
+        assert [evt["event"] for evt in envelope["data"]] == ["SceneSaved", "SceneClosed"]
+        assert codec.loads(client.sent[1])["event"] == "ProjectSaved"
+
+    asyncio.run(run())
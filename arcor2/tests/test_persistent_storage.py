@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+
+import asyncio
+from typing import List, Set
+
+import pytest  # type: ignore
+
+from arcor2 import aio_persistent_storage as aio_storage, aio_rest, persistent_storage as storage, rest
+from arcor2.data.object_type import Box, MetaModel3d, Model3dType, ObjectModel, ObjectType, Sphere
+
+
+def test_sort_by_keys():
+
+    assert storage.sort_by_keys(["b", "a", "b"], {"a": 1, "b": 2, "c": 3}, "Items") == [2, 1, 2]
+
+    with pytest.raises(rest.RestException, match="Items not found: c, d."):
+        storage.sort_by_keys(["a", "c", "d"], {"a": 1}, "Items")
+
+
+@pytest.fixture()
+def no_bulk(monkeypatch) -> Set[str]:
+
+    no_bulk: Set[str] = set()
+    monkeypatch.setattr(storage, "NO_BULK", no_bulk)
+    monkeypatch.setattr(aio_storage, "NO_BULK", no_bulk)
+    aio_storage.clear_caches()
+    return no_bulk
+
+
+def not_supported(url: str, *args, **kwargs):
+    raise rest.RestHttpException(f"404 Not Found for url: {url}", status=404)
+
+
+def test_bulk(monkeypatch, no_bulk):
+
+    calls: List[str] = []
+
+    def get_list(url: str, data_cls, params):
+        calls.append(url)
+        return [ObjectType(id, "source") for id in reversed(params["ids"]) if id != "unknown"]
+
+    monkeypatch.setattr(rest, "get_list", get_list)
+
+    assert [ot.id for ot in storage.get_object_types(["t1", "t2"])] == ["t1", "t2"]
+    assert calls == [f"{storage.URL}/object_types/bulk"]
+
+    with pytest.raises(storage.PersistentStorageException, match="not found: unknown"):
+        storage.get_object_types(["t1", "unknown"])
+
+    assert not no_bulk
+
+
+def test_bulk_not_supported(monkeypatch, no_bulk):
+
+    calls: List[str] = []
+
+    def get(url: str, data_cls, *args, **kwargs):
+        calls.append(url)
+        id = url.rsplit("/", 2)[-2] if data_cls is Box else url.rsplit("/", 1)[-1]
+        return Box(id, 1, 1, 1) if data_cls is Box else data_cls(id, "source")
+
+    monkeypatch.setattr(rest, "get_list", not_supported)
+    monkeypatch.setattr(rest, "get", get)
+
+    assert [st.id for st in storage.get_service_types(["s2", "s1"])] == ["s2", "s1"]
+    assert [ot.id for ot in storage.get_object_types(["t1"])] == ["t1"]
+    assert [m.id for m in storage.get_models([MetaModel3d("b1", Model3dType.BOX)])] == ["b1"]
+
+    assert no_bulk == {"service_types", "object_types", "models"}
+    assert len(calls) == 4
+
+    monkeypatch.setattr(rest, "get_list", None)  # bulk is not tried again
+    storage.get_object_types(["t1"])
+
+
+def test_bulk_error(monkeypatch, no_bulk):
+
+    def get_list(url: str, *args, **kwargs):
+        raise rest.RestHttpException("500 Internal Server Error", status=500)
+
+    monkeypatch.setattr(rest, "get_list", get_list)
+
+    with pytest.raises(storage.PersistentStorageException):
+        storage.get_object_types(["t1"])
+
+    assert not no_bulk
+
+
+def test_aio_bulk(monkeypatch, no_bulk):
+
+    async def get_list(url: str, data_cls, params):
+        return [ObjectModel(Model3dType.SPHERE, sphere=Sphere(id, 1)) for id in params["ids"]]
+
+    monkeypatch.setattr(aio_rest, "get_list", get_list)
+
+    async def run() -> None:
+
+        models = await aio_storage.get_models([MetaModel3d("s1", Model3dType.SPHERE),
+                                               MetaModel3d("s2", Model3dType.SPHERE)])
+        assert [m.id for m in models] == ["s1", "s2"]
+
+        with pytest.raises(aio_storage.PersistentStorageException, match="not found"):
+            await aio_storage.get_models([MetaModel3d("s1", Model3dType.BOX)])
+
+    asyncio.run(run())
+
+    assert not no_bulk
+
+
+def test_aio_bulk_not_supported(monkeypatch, no_bulk):
+
+    async def aio_not_supported(url: str, *args, **kwargs):
+        not_supported(url)
+
+    async def get(url: str, data_cls, *args, **kwargs):
+        return data_cls(url.rsplit("/", 1)[-1], "source")
+
+    monkeypatch.setattr(aio_rest, "get_list", aio_not_supported)
+    monkeypatch.setattr(aio_rest, "get", get)
+
+    async def run() -> None:
+
+        assert [ot.id for ot in await aio_storage.get_object_types(["t2", "t1", "t2"])] == ["t2", "t1", "t2"]
+        assert [st.id for st in await aio_storage.get_service_types(["s1"])] == ["s1"]
+
+    asyncio.run(run())
+
+    assert no_bulk == {"object_types", "service_types"}
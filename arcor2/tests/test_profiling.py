@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+
+import time
+
+from arcor2.profiling import Phases, import_times
+
+
+def test_phases() -> None:
+
+    phases = Phases()
+
+    with phases.phase("first"):
+        time.sleep(0.01)
+
+    for _ in range(2):  # durations of repeated phases are summed
+        with phases.phase("second"):
+            time.sleep(0.01)
+
+    assert list(phases.durations) == ["first", "second"]
+    assert phases.durations["second"] > phases.durations["first"]
+    assert phases.report().startswith("first: 0.0")
+
+
+def test_import_times() -> None:
+
+    times = {imp.name: imp for imp in import_times("arcor2.exceptions")}
+
+    assert times["arcor2.exceptions"].cumulative >= times["arcor2.exceptions"].self > 0
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+
+import asyncio
+
+import pytest  # type: ignore
+
+from arcor2 import aio_rest, rest
+from arcor2.data.common import Joint, Position, Project, ProjectActionPoint, ProjectRobotJoints
+from arcor2.exceptions import Arcor2Exception
+from arcor2.helpers import camel_case_to_snake_case, snake_case_to_camel_case
+
+
+class SomeException(Arcor2Exception):
+    pass
+
+
+@rest.handle_exceptions(SomeException)
+def raise_sync() -> None:
+    raise rest.RestException("Not found")
+
+
+@rest.handle_exceptions(SomeException)
+async def raise_async() -> None:
+    raise rest.RestException("Not found")
+
+
+def test_handle_exceptions_sync():
+
+    with pytest.raises(SomeException, match="Not found"):
+        raise_sync()
+
+
+def test_handle_exceptions_async():
+
+    assert asyncio.iscoroutinefunction(raise_async)
+
+    with pytest.raises(SomeException, match="Not found"):
+        asyncio.run(raise_async())
+
+
+def test_response_exception():
+
+    assert rest.response_exception(b'{"message": "Not found"}', "404", 404).message == "Not found"
+    assert rest.response_exception(b'"Not found"', "404", 404).message == "Not found"
+
+    exc = rest.response_exception(b'Not found', "404", 404)
+    assert exc.message == "Not found"
+    assert exc.status == 404
+
+
+def test_convert_keys():
+
+    proj = Project("pid", "name", "sid", [ProjectActionPoint("apid", "name", Position(), robot_joints=[
+        ProjectRobotJoints("jid", "name", "robot", [Joint("j1", 0.0)])])])
+    proj_dict = proj.to_dict()
+    proj_dict["someDynamicKey"] = {"nestedKey": 1}
+
+    camel = rest.convert_keys(proj_dict, snake_case_to_camel_case, Project)
+    assert camel["SceneId"] == "sid"
+    assert camel["ActionPoints"][0]["RobotJoints"][0]["RobotId"] == "robot"
+    assert camel["SomeDynamicKey"] == {"NestedKey": 1}
+
+    snake = rest.convert_keys(camel, camel_case_to_snake_case, Project)
+    assert snake == rest.convert_keys(camel, camel_case_to_snake_case)
+    assert Project.from_dict({k: v for k, v in snake.items() if k != "some_dynamic_key"}) == proj
+
+
+def test_session_per_loop():
+
+    async def get_session():
+        session = aio_rest.session()
+        assert aio_rest.session() is session  # shared within the loop
+        return session
+
+    first = asyncio.run(get_session())
+    second = asyncio.run(get_session())  # e.g. tests, each one with its own loop
+
+    assert first is not second
+    asyncio.run(aio_rest.close_session())
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+
+import asyncio
+from typing import List
+
+import pytest  # type: ignore
+
+from arcor2 import codec
+from arcor2.rpc_channel import Channel, RpcChannelException
+from arcor2.data.rpc.common import VersionData, VersionRequest, VersionResponse
+
+
+class Execution:
+
+    def __init__(self) -> None:
+        self.received: List[int] = []
+
+    async def send(self, message: str) -> None:
+        self.received.append(codec.loads(message)["id"])
+
+
+def test_channel() -> None:
+
+    async def run() -> None:
+
+        channel = Channel(timeout=0.1)
+
+        with pytest.raises(RpcChannelException):  # not connected
+            await channel.request(VersionRequest(1))
+
+        execution = Execution()
+        channel.connected(execution)
+
+        # two UIs might use the same request id
+        first = asyncio.ensure_future(channel.request(VersionRequest(1), timeout=1.0))
+        second = asyncio.ensure_future(channel.request(VersionRequest(1), timeout=1.0))
+        await asyncio.sleep(0)
+
+        assert len(set(execution.received)) == channel.pending == 2
+
+        for channel_id, version in zip(reversed(execution.received), ("2", "1")):  # responses might be reordered
+            assert channel.resolve(VersionResponse(channel_id, data=VersionData(version)))
+
+        first_resp, second_resp = await first, await second
+        assert isinstance(first_resp, VersionResponse) and isinstance(second_resp, VersionResponse)
+        assert first_resp.data.version == "1"
+        assert second_resp.data.version == "2"
+        assert first_resp.id == second_resp.id == 1
+
+        with pytest.raises(RpcChannelException):  # no response
+            await channel.request(VersionRequest(2))
+
+        assert not channel.resolve(VersionResponse(execution.received[-1]))  # too late
+        assert not channel.pending
+
+        pending = asyncio.ensure_future(channel.request(VersionRequest(3), timeout=1.0))
+        await asyncio.sleep(0)
+        channel.disconnected()
+
+        with pytest.raises(RpcChannelException):
+            await pending
+
+    asyncio.run(run())
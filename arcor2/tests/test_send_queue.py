@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+
+import asyncio
+from typing import List, Optional
+
+from arcor2.send_queue import SendPolicy, SendQueue
+
+
+class SlowClient:
+
+    def __init__(self) -> None:
+        self.sent: List[str] = []
+        self.closed: Optional[int] = None
+        self.unblock = asyncio.Event()
+
+    async def send(self, message: str) -> None:
+        await self.unblock.wait()
+        self.sent.append(message)
+
+    async def close(self, code: int, reason: str) -> None:
+        self.closed = code
+
+
+def test_send_queue_policies():
+
+    async def run() -> None:
+
+        client = SlowClient()
+        queue = SendQueue(client, max_size=3)
+
+        queue.put("blocked")  # taken by the sender, waits for the client
+        await asyncio.sleep(0)
+
+        queue.put("state 1", SendPolicy.COALESCE, "state")
+        for idx in range(5):
+            queue.put(f"joints {idx}", SendPolicy.DROP_OLDEST)
+        queue.put("state 2", SendPolicy.COALESCE, "state")
+
+        assert len(queue) == 3
+
+        client.unblock.set()
+        await asyncio.sleep(0.01)
+
+        assert client.sent == ["blocked", "joints 3", "joints 4", "state 2"]
+        assert not client.closed
+
+        client.unblock.clear()
+        queue.put("blocked")
+        await asyncio.sleep(0)
+
+        for idx in range(4):
+            queue.put(f"event {idx}")
+        await asyncio.sleep(0)
+
+        assert queue.closed
+        assert client.closed
+        assert not len(queue)
+
+    asyncio.run(run())
+
+
+def test_send_queue_drop_oldest_by_key():
+
+    async def run() -> None:
+
+        client = SlowClient()
+        queue = SendQueue(client, max_size=3)
+
+        queue.put("blocked")
+        await asyncio.sleep(0)
+
+        queue.put("robot A 0", SendPolicy.DROP_OLDEST, "A")
+        queue.put("robot B 0", SendPolicy.DROP_OLDEST, "B")
+        queue.put("robot A 1", SendPolicy.DROP_OLDEST, "A")
+        queue.put("robot B 1", SendPolicy.DROP_OLDEST, "B")  # replaces B 0, stream of A is not affected
+        queue.put("robot C 0", SendPolicy.DROP_OLDEST, "C")  # nothing of its key to drop
+        queue.put("event")  # any stream message may give way to it
+
+        client.unblock.set()
+        await asyncio.sleep(0.01)
+
+        assert client.sent == ["blocked", "robot A 1", "robot B 1", "event"]
+        assert not client.closed
+
+    asyncio.run(run())
@@ -0,0 +1,18 @@
+# -*- coding: utf-8 -*-
+
+from arcor2.data.object_type import ObjectTypeMeta
+from arcor2.object_types_utils import TypeGraph
+
+
+def test_type_graph() -> None:
+
+    graph = TypeGraph({"Generic": ObjectTypeMeta("Generic"),
+                       "Box": ObjectTypeMeta("Box", base="Generic"),
+                       "BigBox": ObjectTypeMeta("BigBox", base="Box"),
+                       "Robot": ObjectTypeMeta("Robot", base="Generic", needs_services={"RobotService"}),
+                       "Tool": ObjectTypeMeta("Tool", base="Generic")})
+
+    assert graph.affected({"Box"}) == {"Box", "BigBox"}
+    assert graph.affected({"Tool"}, {"RobotService"}) == {"Tool", "Robot"}
+    assert graph.affected({"Unknown"}) == {"Unknown"}
+    assert graph.ordered({"BigBox", "Box", "Generic"}) == ["Generic", "Box", "BigBox"]
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+
+import pytest  # type: ignore
+
+from arcor2 import helpers as hlp
+from arcor2.object_types import Generic
+from arcor2.services.service import Service
+from arcor2.type_registry import TypeRegistry
+
+SOURCE = """
+from arcor2.object_types import Generic
+
+
+class Box(Generic):
+    \"\"\"A box.\"\"\"
+"""
+
+
+def test_type_registry() -> None:
+
+    registry = TypeRegistry()
+
+    box = registry.type_def("Box", SOURCE, Generic)
+
+    for _ in range(10):
+        assert registry.type_def("Box", SOURCE, Generic) is box
+
+    assert registry.compiled == 1
+
+    meta = registry.get("Box", SOURCE, Generic).meta()
+    assert meta.description == "A box."
+    meta.disabled = True  # callers get a copy
+    assert not registry.get("Box", SOURCE, Generic).meta().disabled
+
+    with pytest.raises(hlp.TypeDefException):
+        registry.type_def("Box", SOURCE, Service)
+
+    changed = registry.type_def("Box", SOURCE.replace("A box", "Changed box"), Generic)
+    assert changed is not box
+    assert changed.description() == "Changed box."
+    assert registry.compiled == 2
+
+    registry.forget("Box")
+    assert registry.type_def("Box", SOURCE, Generic) is not box
+    assert registry.compiled == 3
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+
+import pytest  # type: ignore
+
+from arcor2 import codec, wire
+from arcor2.data.common import Joint
+from arcor2.data.events import RobotJointsData, RobotJointsEvent
+
+
+class Client:
+
+    def __init__(self, subprotocol=None) -> None:
+        self.subprotocol = subprotocol
+
+
+def test_encoding():
+
+    assert wire.encoding(Client()) == wire.JSON
+    assert wire.encoding(Client("something")) == wire.JSON
+    assert wire.encoding(Client(wire.MSGPACK)) == wire.MSGPACK
+
+
+@pytest.mark.skipif(not codec.MSGPACK, reason="msgpack not installed")
+def test_message():
+
+    evt = RobotJointsEvent(data=RobotJointsData("robot", [Joint("j1", 0.5)]))
+    received = codec.to_json(evt)
+
+    msg = wire.Message(encoded=received)
+    assert msg.encode(wire.JSON) is received
+
+    packed = msg.encode(wire.MSGPACK)
+    assert isinstance(packed, bytes)
+    assert len(packed) < len(received)
+    assert msg.encode(wire.MSGPACK) is packed
+    assert RobotJointsEvent.from_dict(wire.decode(packed, wire.MSGPACK)) == evt
+
+    with pytest.raises(wire.DecodeError):
+        wire.decode(packed[:-1], wire.MSGPACK)
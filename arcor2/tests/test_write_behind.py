@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+
+import asyncio
+from typing import List
+
+from arcor2 import metrics
+from arcor2.exceptions import Arcor2Exception
+from arcor2.write_behind import WriteBehind
+
+
+def test_write_behind_coalescing():
+
+    async def run() -> None:
+
+        wb: WriteBehind[str, str] = WriteBehind(delay=0.01)
+        written: List[str] = []
+
+        async def write(value: str) -> None:
+            await asyncio.sleep(0)
+            written.append(value)
+
+        for idx in range(10):
+            wb.schedule("p1", f"v{idx}", write)
+        wb.schedule("p2", "other", write)
+
+        assert wb.pending("p1") == "v9"
+        assert len(wb) == 2
+
+        await asyncio.sleep(0.05)
+        assert sorted(written) == ["other", "v9"]
+        assert wb.stats.coalesced == 9
+        assert not wb
+
+        # immediate write supersedes the pending one, flush then has nothing to do
+        wb.schedule("p1", "old", write)
+        await wb.write_now("p1", "new", write)
+        await wb.flush()
+        assert written[-1] == "new"
+        assert wb.stats.superseded == 1
+
+    asyncio.run(run())
+
+
+def test_write_behind_order_and_errors():
+
+    async def run() -> None:
+
+        errors: List[str] = []
+
+        async def on_error(key: str, e: Exception) -> None:
+            errors.append(key)
+
+        wb: WriteBehind[str, str] = WriteBehind(delay=60, on_error=on_error)
+        written: List[str] = []
+
+        async def slow_write(value: str) -> None:
+            await asyncio.sleep(0.01)
+            written.append(value)
+
+        async def fail(value: str) -> None:
+            raise Arcor2Exception("Storage down.")
+
+        wb.schedule("p1", "first", slow_write)
+        await wb.flush("p1")
+        wb.schedule("p1", "second", slow_write)
+        flush = asyncio.ensure_future(wb.flush())
+        await asyncio.sleep(0)
+        await wb.write_now("p1", "third", slow_write)  # has to wait for the write in progress
+        await flush
+        assert written == ["first", "second", "third"]
+
+        wb.schedule("p2", "value", fail)
+        await wb.flush()
+        assert errors == ["p2"]
+        assert wb.stats.failed == 1
+
+    asyncio.run(run())
+
+
+def test_delete_after_write_behind(monkeypatch):
+
+    from arcor2 import aio_persistent_storage as storage, aio_rest
+    from arcor2.data.common import Project
+
+    calls: List[str] = []
+
+    async def put(url: str, data) -> None:
+        await asyncio.sleep(0.01)
+        calls.append(f"PUT {url}")
+
+    async def delete(url: str) -> None:
+        calls.append(f"DELETE {url}")
+
+    monkeypatch.setattr(aio_rest, "put", put)
+    monkeypatch.setattr(aio_rest, "delete", delete)
+
+    async def run() -> None:
+
+        # e.g. project renamed (write deferred) and deleted right afterwards
+        storage.update_project_later(Project("p1", "renamed", "s1"))
+        await storage.delete_project("p1")
+        assert storage.WRITE_BEHIND.pending(("project", "p1")) is None  # get_project does not return it any more
+        await storage.flush_writes()
+
+        # write already in progress is finished before the delete
+        storage.update_project_later(Project("p2", "renamed", "s1"))
+        await storage.WRITE_BEHIND.flush()
+        storage.update_project_later(Project("p2", "renamed again", "s1"))
+        flush = asyncio.ensure_future(storage.WRITE_BEHIND.flush())
+        await asyncio.sleep(0)
+        await storage.delete_project("p2")
+        await flush
+
+    asyncio.run(run())
+
+    assert [call.rsplit("/", 1)[-1] for call in calls] == ["p1", "project", "project", "p2"]
+    assert calls[0].startswith("DELETE")
+
+
+def test_write_behind_metrics():
+
+    def sample(name: str, **labels: str) -> float:
+        for metric in metrics.REGISTRY.collect():
+            if metric.name == name:
+                for smp in metric.samples:
+                    if smp.labels == labels:
+                        return smp.value
+        return 0.0
+
+    async def run() -> None:
+
+        wb: WriteBehind[str, str] = WriteBehind(delay=0.01)
+        scheduled = sample("arcor2_write_behind_writes_total", event="scheduled")
+        written = sample("arcor2_write_behind_writes_total", event="written")
+        pending = sample("arcor2_write_behind_pending")  # all instances
+
+        async def write(value: str) -> None:
+            pass
+
+        wb.schedule("p1", "v1", write)
+        wb.schedule("p1", "v2", write)
+        wb.schedule("p2", "v1", write)
+        assert sample("arcor2_write_behind_pending") == pending + 2
+
+        await wb.flush()
+
+        assert sample("arcor2_write_behind_pending") == pending
+        assert sample("arcor2_write_behind_writes_total", event="scheduled") == scheduled + 3
+        assert sample("arcor2_write_behind_writes_total", event="written") == written + 2
+
+    asyncio.run(run())
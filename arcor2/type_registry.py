@@ -0,0 +1,212 @@
+"""
+Registry of compiled types (object types and services), so each source is exec'ed and parsed just once.
+
+Types are keyed by (type id, hash of the source) - a changed source is compiled again and replaces
+the previous version of the type. Metadata computed from sources might be also stored in the on-disk cache
+(see arcor2.metadata_cache), then unchanged types are not parsed again after restart.
+The registry might be used from executor threads.
+"""
+
+import copy
+import hashlib
+import inspect
+import threading
+from typing import Any, Callable, Dict, Iterator, List, Optional, Type, TypeVar
+
+import horast
+
+from dataclasses_jsonschema import ValidationError
+
+from typed_ast.ast3 import Module
+
+from arcor2 import helpers as hlp
+from arcor2 import object_types_utils as otu
+from arcor2.data.helpers import from_dict
+from arcor2.data.object_type import ObjectAction, ObjectActions, ObjectTypeMeta
+from arcor2.metadata_cache import Key, MetadataCache
+from arcor2.parameter_plugins import TYPE_TO_PLUGIN
+
+T = TypeVar('T')
+V = TypeVar('V')
+
+
+def source_hash(source: str) -> str:
+    return hashlib.sha1(source.encode()).hexdigest()
+
+
+class CompiledType:
+    """
+    Class created from the source, its AST, meta and actions are computed on demand.
+    """
+
+    def __init__(self, type_id: str, source: str, type_def: Type, cache: Optional[MetadataCache] = None) -> None:
+
+        self.id = type_id
+        self.source = source
+        self.hash = source_hash(source)
+        self.type_def = type_def
+        self.cache = cache
+
+        self._tree: Optional[Module] = None
+        self._computed: Dict[str, Any] = {}
+
+    @property
+    def tree(self) -> Module:
+
+        if self._tree is None:
+            self._tree = horast.parse(self.source)
+        return self._tree
+
+    def cached(self, kind: str, compute: Callable[[], V], dump: Callable[[V], Any], load: Callable[[Any], V]) -> V:
+        """
+        Gets metadata of the type - from memory, from the on-disk cache or computes (and stores) them.
+        :param kind: Name of the metadata, e.g. "meta".
+        :param compute:
+        :param dump: Converts metadata into JSON-serializable data.
+        :param load: Inverse to dump, might raise ValidationError (then the metadata are computed again).
+        :return: Copy of the metadata (they are often modified by callers).
+        """
+
+        try:
+            return copy.deepcopy(self._computed[kind])
+        except KeyError:
+            pass
+
+        value: Optional[V] = None
+
+        if self.cache:
+            data = self.cache.get(kind, self.id, self.hash)
+            if data is not None:
+                try:
+                    value = load(data)
+                except (ValidationError, KeyError, TypeError, ValueError):
+                    value = None
+
+        if value is None:
+            value = compute()
+            if self.cache:
+                self.cache.put(kind, self.id, self.hash, dump(value))
+
+        self._computed[kind] = value
+        return copy.deepcopy(value)
+
+    def meta(self) -> ObjectTypeMeta:
+        return self.cached("meta", lambda: otu.meta_from_def(self.type_def), lambda meta: meta.to_dict(),
+                           lambda data: from_dict(ObjectTypeMeta, data, validate=False))
+
+    def actions(self) -> ObjectActions:
+        """
+        :return: Actions defined by the type (without actions of ancestors).
+        """
+
+        return self.cached("actions", lambda: otu.object_actions(TYPE_TO_PLUGIN, self.type_def, self.source, self.tree),
+                           _dump_actions, _load_actions)
+
+
+def _dump_actions(actions: ObjectActions) -> List[Dict[str, Any]]:
+    return [act.to_dict() for act in actions]
+
+
+def _load_actions(data: List[Dict[str, Any]]) -> ObjectActions:
+    return [from_dict(ObjectAction, act, validate=False) for act in data]
+
+
+class TypeRegistry:
+
+    def __init__(self, cache: Optional[MetadataCache] = None) -> None:
+
+        self.cache = cache
+        self.compiled = 0  # number of exec'ed sources
+
+        self._lock = threading.Lock()
+        self._types: Dict[str, CompiledType] = {}
+        self._built_in: Dict[str, CompiledType] = {}
+
+    def get(self, type_id: str, source: str, output_type: Type) -> CompiledType:
+        """
+        Gets the compiled type, the source is exec'ed only if it was not seen before.
+        :param type_id: Name of the class.
+        :param source:
+        :param output_type: Expected base class.
+        :return:
+        """
+
+        src_hash = source_hash(source)
+        compiled = self._types.get(type_id)
+
+        if compiled is not None and compiled.hash == src_hash:
+            if not issubclass(compiled.type_def, output_type):
+                raise hlp.TypeDefException("Class is not of expected type.")
+            return compiled
+
+        # compiled outside of the lock, so different types might be compiled concurrently
+        compiled = CompiledType(type_id, source, hlp.type_def_from_source(source, type_id, output_type), self.cache)
+
+        with self._lock:
+            self.compiled += 1
+            current = self._types.get(type_id)
+            if current is not None and current.hash == src_hash:  # someone was faster
+                return current
+            self._types[type_id] = compiled
+
+        return compiled
+
+    def type_def(self, type_id: str, source: str, output_type: Type[T]) -> Type[T]:
+        return self.get(type_id, source, output_type).type_def
+
+    def built_in(self, type_def: Type) -> CompiledType:
+        """
+        Built-in types (part of arcor2) are not exec'ed, their sources are used for metadata.
+        :param type_def:
+        :return:
+        """
+
+        try:
+            return self._built_in[type_def.__name__]
+        except KeyError:
+            pass
+
+        compiled = CompiledType(type_def.__name__, inspect.getsource(type_def), type_def, self.cache)
+
+        with self._lock:
+            return self._built_in.setdefault(type_def.__name__, compiled)
+
+    def keys(self) -> Iterator[Key]:
+        """
+        :return: (type id, source hash) of all known types.
+        """
+
+        for compiled in (*self._types.values(), *self._built_in.values()):
+            yield compiled.id, compiled.hash
+
+    def gc(self) -> int:
+        """
+        Removes entries of unknown types from the on-disk cache.
+        :return: Number of removed entries.
+        """
+
+        if not self.cache:
+            return 0
+        return self.cache.gc(list(self.keys()))
+
+    def forget(self, type_id: str, cached: bool = False) -> None:
+        """
+        :param type_id:
+        :param cached: Removes also entries of the on-disk cache (metadata of the type might depend on its bases).
+        :return:
+        """
+
+        with self._lock:
+            self._types.pop(type_id, None)
+
+        if cached and self.cache:
+            self.cache.discard(type_id)
+
+    def clear(self) -> None:
+
+        with self._lock:
+            self._types.clear()
+            self._built_in.clear()
+
+
+TYPES = TypeRegistry()
@@ -0,0 +1,102 @@
+"""
+Encoding of websocket messages, negotiated per connection using websocket subprotocols.
+
+A client that does not ask for any subprotocol gets JSON in text frames (as before).
+A client asking for 'arcor2.msgpack' gets MessagePack in binary frames (when msgpack is installed).
+Compression (permessage-deflate) could be turned off by ARCOR2_WS_COMPRESSION=False, e.g. for fast local links.
+"""
+
+import os
+from typing import Any, Dict, List, Optional, Union
+
+from arcor2 import codec
+from arcor2.exceptions import Arcor2Exception
+
+JSON = "arcor2.json"
+MSGPACK = "arcor2.msgpack"
+
+# supported encodings, the preferred one first
+SUBPROTOCOLS: List[str] = [MSGPACK, JSON] if codec.MSGPACK else [JSON]
+
+COMPRESSION: Optional[str] = "deflate" if os.getenv("ARCOR2_WS_COMPRESSION", "True") == "True" else None
+
+Encoded = Union[str, bytes]
+
+
+class DecodeError(Arcor2Exception):
+    pass
+
+
+def encoding(websocket: Any) -> str:
+    """
+    Gets encoding negotiated for the connection.
+    :param websocket: Server or client protocol.
+    :return:
+    """
+
+    return MSGPACK if getattr(websocket, "subprotocol", None) == MSGPACK else JSON
+
+
+def encode(data: Any, enc: str) -> Encoded:
+    """
+    Encodes already serializable data (e.g. result of to_dict()).
+    :param data:
+    :param enc:
+    :return: str for JSON (sent as text frame), bytes for MessagePack (binary frame).
+    """
+
+    if enc == MSGPACK:
+        return codec.packb(data)
+    return codec.dumps(data)
+
+
+def decode(message: Encoded, enc: str) -> Any:
+
+    try:
+        if enc == MSGPACK and isinstance(message, bytes):
+            return codec.unpackb(message)
+        return codec.loads(message)
+    except ValueError as e:  # both codec.DecodeError and msgpack errors are ValueErrors
+        raise DecodeError(str(e)) from e
+
+
+class Message:
+    """
+    Message to be sent to many clients - it is encoded at most once for each encoding.
+    """
+
+    __slots__ = ("_data", "_encoded")
+
+    def __init__(self, data: Any = None, encoded: Optional[Encoded] = None, enc: str = JSON) -> None:
+        """
+        :param data: Serializable data (e.g. result of to_dict()).
+        :param encoded: Already encoded message (e.g. received from another node).
+        :param enc: Encoding of the encoded message.
+        """
+
+        assert data is not None or encoded is not None
+
+        self._data = data
+        self._encoded: Dict[str, Encoded] = {}
+
+        if encoded is not None:
+            self._encoded[enc] = encoded
+
+    @property
+    def data(self) -> Any:
+
+        if self._data is None:
+            other_enc, other = next(iter(self._encoded.items()))
+            self._data = decode(other, other_enc)
+
+        return self._data
+
+    def encode(self, enc: str) -> Encoded:
+
+        try:
+            return self._encoded[enc]
+        except KeyError:
+            pass
+
+        ret = self._encoded[enc] = encode(self.data, enc)
+        return ret
@@ -0,0 +1,211 @@
+"""
+Debounced write-behind for documents stored in remote services (e.g. the persistent storage).
+"""
+
+import asyncio
+import os
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Generic, Hashable, Optional, TypeVar
+
+from arcor2 import metrics
+
+K = TypeVar('K', bound=Hashable)
+V = TypeVar('V')
+
+DELAY = float(os.getenv("ARCOR2_STORAGE_WRITE_DELAY", 0.5))
+
+Write = Callable[[V], Awaitable[None]]
+ErrorHandler = Callable[[K, Exception], Awaitable[None]]
+
+# the same as WriteBehindStats, for all instances
+PENDING = metrics.REGISTRY.gauge("arcor2_write_behind_pending", "Deferred writes waiting to be written.")
+WRITES = metrics.REGISTRY.counter("arcor2_write_behind_writes_total",
+                                  "Deferred writes by what happened to them (see WriteBehindStats).", ("event",))
+
+
+@dataclass
+class WriteBehindStats:
+
+    scheduled: int = 0
+    coalesced: int = 0  # scheduled writes that replaced a pending one
+    superseded: int = 0  # pending writes dropped because of an immediate one
+    discarded: int = 0  # pending writes dropped because the document was deleted
+    written: int = 0
+    failed: int = 0
+
+
+@dataclass
+class _Pending(Generic[V]):
+
+    value: V
+    write: Write
+    timer: asyncio.TimerHandle
+
+
+class WriteBehind(Generic[K, V]):
+    """
+    Coalesces writes of the same document: a write is postponed by delay and any further write
+    of the document within that time just replaces the value to be written.
+    Writes of one document are never reordered, the last scheduled (or immediate) one wins.
+    The pending value is not copied, it should not be modified after it was scheduled.
+    """
+
+    def __init__(self, delay: float = DELAY, on_error: Optional[ErrorHandler] = None) -> None:
+
+        self.delay = delay
+        self.on_error = on_error
+        self.stats = WriteBehindStats()
+
+        self._pending: Dict[K, _Pending[V]] = {}
+        self._tasks: Dict[K, asyncio.Task] = {}
+
+    def __len__(self) -> int:
+        """
+        Number of pending writes.
+        """
+        return len(self._pending)
+
+    def __contains__(self, key: K) -> bool:
+        return key in self._pending
+
+    def pending(self, key: K) -> Optional[V]:
+        """
+        Returns the value waiting to be written (if there is any), so readers may see their writes.
+        :param key:
+        :return:
+        """
+
+        try:
+            return self._pending[key].value
+        except KeyError:
+            return None
+
+    def schedule(self, key: K, value: V, write: Write) -> None:
+
+        self._count("scheduled")
+
+        try:
+            pending = self._pending[key]
+        except KeyError:
+            timer = asyncio.get_event_loop().call_later(self.delay, self._start, key)
+            self._pending[key] = _Pending(value, write, timer)
+            PENDING.labels().inc()
+            return
+
+        # the window is not prolonged, so the document is written at most 'delay' after its first change
+        self._count("coalesced")
+        pending.value = value
+        pending.write = write
+
+    async def write_now(self, key: K, value: V, write: Write) -> None:
+        """
+        Writes immediately (after the write in progress, if any). A pending write is dropped as it is outdated.
+        Unlike scheduled writes, errors are raised.
+        :param key:
+        :param value:
+        :param write:
+        :return:
+        """
+
+        pending = self._pop(key)
+
+        if pending is not None:
+            pending.timer.cancel()
+            self._count("superseded")
+
+        await asyncio.shield(self._enqueue(key, self._write(value, write)))
+
+    async def discard(self, key: K) -> None:
+        """
+        Drops the pending value (e.g. before the document is deleted) and waits for the write in progress (if any),
+        so nothing is written afterwards.
+        :param key:
+        :return:
+        """
+
+        pending = self._pop(key)
+
+        if pending is not None:
+            pending.timer.cancel()
+            self._count("discarded")
+
+        task = self._tasks.get(key)
+
+        if task is not None:
+            await asyncio.wait([task])
+
+    async def flush(self, key: Optional[K] = None) -> None:
+        """
+        Writes pending value(s) now and waits for all writes to finish.
+        Errors are reported to on_error (if set).
+        :param key: Flush only this document.
+        :return:
+        """
+
+        keys = list(self._pending) if key is None else [key]
+
+        for k in keys:
+            pending = self._pending.get(k)
+            if pending is not None:
+                pending.timer.cancel()
+                self._start(k)
+
+        tasks = [task for k, task in self._tasks.items() if key is None or k == key]
+
+        if tasks:
+            await asyncio.wait(tasks)
+
+    def _enqueue(self, key: K, write: Awaitable[None]) -> asyncio.Task:
+        """
+        Writes of one document are chained, each one starts when the previous one is done.
+        """
+
+        prev = self._tasks.get(key)
+
+        async def _chained() -> None:
+            if prev is not None:
+                await asyncio.wait([prev])
+            await write
+
+        task = self._tasks[key] = asyncio.ensure_future(_chained())
+        task.add_done_callback(lambda t: self._tasks.pop(key) if self._tasks.get(key) is t else None)
+        return task
+
+    def _count(self, event: str) -> None:
+
+        setattr(self.stats, event, getattr(self.stats, event) + 1)
+        WRITES.labels(event).inc()
+
+    def _pop(self, key: K) -> Optional[_Pending[V]]:
+
+        pending = self._pending.pop(key, None)
+
+        if pending is not None:
+            PENDING.labels().dec()
+
+        return pending
+
+    def _start(self, key: K) -> None:
+
+        pending = self._pop(key)
+
+        if pending is not None:
+            self._enqueue(key, self._write_pending(key, pending))
+
+    async def _write(self, value: V, write: Write) -> None:
+
+        try:
+            await write(value)
+        except Exception:
+            self._count("failed")
+            raise
+        else:
+            self._count("written")
+
+    async def _write_pending(self, key: K, pending: _Pending[V]) -> None:
+
+        try:
+            await self._write(pending.value, pending.write)
+        except Exception as e:
+            if self.on_error is not None:
+                await self.on_error(key, e)
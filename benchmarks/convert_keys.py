@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Compares rest.convert_keys with the former implementation (regex applied to every key)
+on a project with 1000 actions.
+
+Usage: ARCOR2_PROJECT_PATH=/tmp python benchmarks/convert_keys.py
+"""
+
+import argparse
+import timeit
+from typing import Callable, Dict, List, Union
+
+from arcor2.data.common import Action, ActionIO, ActionParameter, NamedOrientation, Orientation, Position, Project, \
+    ProjectActionPoint
+from arcor2.helpers import camel_case_to_snake_case, snake_case_to_camel_case
+from arcor2.rest import convert_keys
+
+
+def convert_keys_regex(d: Union[Dict, List], func: Callable[[str], str]) -> Union[Dict, List]:
+
+    if isinstance(d, dict):
+        return {func(k): convert_keys_regex(v, func) for k, v in d.items()}
+    elif isinstance(d, list):
+        return [convert_keys_regex(dd, func) for dd in d]
+
+    return d
+
+
+def make_project(actions: int, actions_per_ap: int = 10) -> Project:
+
+    project = Project("project", "Benchmark project", "scene")
+
+    for ap_idx in range(actions // actions_per_ap):
+
+        ap = ProjectActionPoint(f"ap_{ap_idx}", f"ap_{ap_idx}", Position(ap_idx, 0, 0),
+                                orientations=[NamedOrientation("default", "default", Orientation())])
+
+        for act_idx in range(actions_per_ap):
+            act_id = f"act_{ap_idx}_{act_idx}"
+            ap.actions.append(Action(act_id, act_id, "obj/move_to", [
+                ActionParameter("target", "ActionPoint", f"ap_{ap_idx}"),
+                ActionParameter("speed", "double", "0.5")], [ActionIO("start")], [ActionIO("end")]))
+
+        project.action_points.append(ap)
+
+    return project
+
+
+def main() -> None:
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-a", "--actions", type=int, default=1000)
+    parser.add_argument("-n", "--number", type=int, default=50)
+    args = parser.parse_args()
+
+    snake = make_project(args.actions).to_dict()
+    camel = convert_keys_regex(snake, snake_case_to_camel_case)
+
+    cases = {
+        "regex, to camelCase": lambda: convert_keys_regex(snake, snake_case_to_camel_case),
+        "mapped, to camelCase": lambda: convert_keys(snake, snake_case_to_camel_case, Project),
+        "regex, to snake_case": lambda: convert_keys_regex(camel, camel_case_to_snake_case),
+        "mapped, to snake_case": lambda: convert_keys(camel, camel_case_to_snake_case, Project),
+        "memo only, to snake_case": lambda: convert_keys(camel, camel_case_to_snake_case),
+    }
+
+    assert cases["mapped, to camelCase"]() == camel
+    assert cases["mapped, to snake_case"]() == cases["memo only, to snake_case"]() == snake
+
+    print(f"{args.actions} actions, best of 3 runs ({args.number} conversions each):")
+
+    for name, case in cases.items():
+        best = min(timeit.repeat(case, number=args.number, repeat=3)) / args.number
+        print(f"{name:>26}: {best * 1000:8.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Measures how many messages per second could be decoded (JSON parsing + construction of data class),
+with JSON schema validation and without it (ARCOR2_TRUSTED_LINKS mode).
+
+Usage: ARCOR2_PROJECT_PATH=/tmp python benchmarks/message_decoding.py
+"""
+
+import argparse
+import timeit
+from typing import Callable, Dict, Type
+
+from dataclasses_jsonschema import JsonSchemaMixin
+
+from arcor2 import codec
+from arcor2.data import common, events, rpc
+from arcor2.data.helpers import EVENT_MAPPING, RPC_MAPPING, from_dict
+
+
+def messages() -> Dict[str, str]:
+
+    return {
+        "GetRobotJoints request": codec.to_json(rpc.robot.GetRobotJointsRequest(
+            id=1, args=rpc.robot.GetRobotJointsArgs("robot"))),
+        "RobotJoints event": codec.to_json(events.RobotJointsEvent(data=events.RobotJointsData(
+            "robot", [common.Joint(f"joint_{idx}", 0.1 * idx) for idx in range(7)]))),
+        "CurrentAction event": codec.to_json(events.CurrentActionEvent(data=common.CurrentAction(
+            "act", [common.ActionParameter("target", "ActionPoint", "ap")]))),
+        "PackageState event": codec.to_json(events.PackageStateEvent(data=common.PackageState(
+            common.PackageStateEnum.RUNNING, "package"))),
+    }
+
+
+def decoder(message: str, validate: bool) -> Callable[[], None]:
+
+    data = codec.loads(message)
+
+    cls: Type[JsonSchemaMixin]
+
+    if "request" in data:
+        cls = RPC_MAPPING[data["request"]][0]
+    else:
+        cls = EVENT_MAPPING[data["event"]]
+
+    def decode() -> None:
+        from_dict(cls, codec.loads(message), validate)
+
+    return decode
+
+
+def main() -> None:
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", "--number", type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"Messages per second, best of 3 runs ({args.number} messages each):")
+    print(f"{'':>24} {'validated':>12} {'trusted':>12}")
+
+    for name, message in messages().items():
+
+        validated, trusted = (args.number / min(timeit.repeat(decoder(message, validate), number=args.number,
+                                                              repeat=3)) for validate in (True, False))
+
+        print(f"{name:>24} {validated:12.0f} {trusted:12.0f}")
+
+
+if __name__ == '__main__':
+    main()
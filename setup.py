@@ -40,6 +40,7 @@ setup(
         'apispec_webframeworks',
         'flask',
         'requests',
+        'aiohttp',
         'cython',  # dependency of numpy, for some reason not installed automatically...
         'numpy-quaternion',
         'flask_swagger_ui',
@@ -56,7 +57,8 @@ setup(
             'pytest-docker-compose',
             'openapi-spec-validator'
             ],
-        'docs': ['sphinx']
+        'docs': ['sphinx'],
+        'fast': ['orjson', 'msgpack']
     },
     zip_safe=False,
     classifiers=[